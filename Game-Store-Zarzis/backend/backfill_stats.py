@@ -0,0 +1,51 @@
+"""
+Rebuild daily_stats rollups for a date range.
+
+Usage (from the backend/ directory):
+    python backfill_stats.py --start 2025-01-01 --end 2025-12-31
+    python backfill_stats.py --days-back 3      # re-run recent days for late rows
+"""
+
+import argparse
+import asyncio
+import sys
+from datetime import date, timedelta
+from dotenv import load_dotenv
+
+# Load env vars
+load_dotenv()
+
+from services.supabase_client import AsyncSupabaseSingleton
+from services.stats import business_day
+from services.stats_rollup import backfill, STATS_BACKFILL_CHUNK_DAYS, STATS_ROLLUP_CONCURRENCY
+
+
+async def main(args):
+    today = business_day()
+    if args.days_back:
+        start, end = today - timedelta(days=args.days_back), today
+    elif args.start:
+        start, end = date.fromisoformat(args.start), min(date.fromisoformat(args.end) if args.end else today, today)
+    else:
+        print("Error: --start or --days-back is required")
+        sys.exit(1)
+
+    supabase = await AsyncSupabaseSingleton.get_client()
+    try:
+        print(f"Rebuilding daily_stats from {start} to {end}...")
+        result = await backfill(supabase, start, end, args.chunk_days, args.concurrency)
+        print(f"Done: {result['done']} days in {result['chunks']} chunks, {len(result['failed'])} failed")
+        for day in result["failed"]:
+            print(f"  - {day}")
+    finally:
+        await AsyncSupabaseSingleton.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--start")
+    parser.add_argument("--end")
+    parser.add_argument("--days-back", type=int)
+    parser.add_argument("--chunk-days", type=int, default=STATS_BACKFILL_CHUNK_DAYS)
+    parser.add_argument("--concurrency", type=int, default=STATS_ROLLUP_CONCURRENCY)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,91 @@
+"""
+Analytics report throughput on synthetic data.
+
+Compares a row-by-row Python loop (one dict update per session-hour) with
+the vectorized utilization heatmap, and times the other reports.
+
+Usage (from the backend/ directory):
+    python benchmarks/bench_analytics.py --sessions 200000
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.analytics import STATS_TIMEZONE, points_liability, retention_cohorts, revenue_per_console, utilization_heatmap
+
+
+def synthetic(n: int, days: int, consoles: int, clients: int):
+    rng = np.random.default_rng(42)
+    end = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    start = end - timedelta(days=days)
+    starts = pd.to_datetime(start) + pd.to_timedelta(rng.integers(0, days * 86400, n), unit="s")
+    ends = starts + pd.to_timedelta(rng.integers(10, 240, n), unit="m")
+    sessions = pd.DataFrame({
+        "id": np.arange(n).astype(str),
+        "console_id": rng.integers(0, consoles, n).astype(str),
+        "client_id": rng.integers(0, clients, n).astype(str),
+        "start_time": starts.strftime("%Y-%m-%dT%H:%M:%S+00:00"),
+        "end_time": ends.strftime("%Y-%m-%dT%H:%M:%S+00:00"),
+        "created_at": starts.strftime("%Y-%m-%dT%H:%M:%S+00:00"),
+        "status": "completed",
+        "total_amount": rng.integers(2, 20, n).astype(float),
+    })
+    console_frame = pd.DataFrame({"id": np.arange(consoles).astype(str), "name": "PS5", "station_number": np.arange(consoles), "console_type": "ps5"})
+    client_frame = pd.DataFrame({"id": np.arange(clients).astype(str), "created_at": sessions["created_at"].iloc[:clients].to_numpy()})
+    return sessions, console_frame, client_frame, start, end
+
+
+def loop_utilization(sessions: pd.DataFrame, start: datetime, end: datetime) -> dict:
+    occupied = {}
+    for row in sessions.itertuples():
+        s = max(datetime.fromisoformat(row.start_time), start)
+        e = min(datetime.fromisoformat(row.end_time), end)
+        bucket = s.replace(minute=0, second=0, microsecond=0)
+        while bucket < e:
+            nxt = bucket + timedelta(hours=1)
+            local = bucket.astimezone(STATS_TIMEZONE)
+            key = (local.weekday(), local.hour)
+            occupied[key] = occupied.get(key, 0) + (min(e, nxt) - max(s, bucket)).total_seconds() / 60
+            bucket = nxt
+    return occupied
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=200000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--consoles", type=int, default=12)
+    parser.add_argument("--clients", type=int, default=5000)
+    args = parser.parse_args()
+
+    sessions, consoles, clients, start, end = synthetic(args.sessions, args.days, args.consoles, args.clients)
+    print(f"{args.sessions:,} sessions over {args.days} days, {args.consoles} consoles")
+
+    loop = timed(lambda: loop_utilization(sessions, start, end))
+    vectorized = timed(lambda: utilization_heatmap(sessions, args.consoles, start, end, now=end))
+    print(f"{'utilization (python loop)':<32}{loop * 1000:>10.0f} ms")
+    print(f"{'utilization (vectorized)':<32}{vectorized * 1000:>10.0f} ms   {loop / vectorized:.1f}x")
+
+    print(f"{'revenue-per-console':<32}{timed(lambda: revenue_per_console(sessions, consoles)) * 1000:>10.0f} ms")
+    activity = sessions[["client_id", "created_at"]]
+    print(f"{'cohorts':<32}{timed(lambda: retention_cohorts(clients, activity)) * 1000:>10.0f} ms")
+    transactions = pd.DataFrame({"created_at": sessions["created_at"], "amount": sessions["total_amount"]})
+    print(f"{'points-liability':<32}{timed(lambda: points_liability(transactions, 0, start.date(), end.date())) * 1000:>10.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
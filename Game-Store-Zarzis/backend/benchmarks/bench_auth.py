@@ -0,0 +1,95 @@
+"""
+Per-request authentication cost: remote Supabase Auth vs local JWT verification.
+
+Usage:
+    python benchmarks/bench_auth.py                      # simulated remote latency
+    python benchmarks/bench_auth.py --token <jwt>        # real Supabase Auth call (needs .env)
+
+Run from the backend/ directory.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+from jose import jwt
+
+load_dotenv()
+
+from utils.jwt_verifier import JWTVerifier
+
+BENCH_SECRET = "benchmark-secret-not-for-production-use-0123456789"
+
+
+def make_token(secret: str) -> str:
+    now = int(time.time())
+    claims = {
+        "sub": "00000000-0000-0000-0000-000000000001",
+        "email": "bench@gamestorezarzis.com.tn",
+        "role": "authenticated",
+        "aud": "authenticated",
+        "iat": now,
+        "exp": now + 3600,
+    }
+    return jwt.encode(claims, secret, algorithm="HS256")
+
+
+def timed(fn, iterations: int) -> list:
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+async def timed_async(fn, iterations: int) -> list:
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def report(label: str, samples: list):
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(f"{label:<28} mean={statistics.mean(samples):8.3f} ms  p50={statistics.median(samples):8.3f} ms  p95={p95:8.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=1000)
+    parser.add_argument("--remote-iterations", type=int, default=20)
+    parser.add_argument("--remote-latency-ms", type=float, default=120.0, help="Simulated Supabase Auth round-trip")
+    parser.add_argument("--token", help="Real access token to verify against Supabase Auth")
+    args = parser.parse_args()
+
+    # Before: one HTTP round-trip to Supabase Auth per request
+    if args.token:
+        from supabase import create_client
+        client = create_client(os.environ["SUPABASE_URL"], os.environ["SUPABASE_SERVICE_KEY"])
+        remote = timed(lambda: client.auth.get_user(args.token), args.remote_iterations)
+        report("remote (supabase.auth)", remote)
+    else:
+        remote = timed(lambda: time.sleep(args.remote_latency_ms / 1000), args.remote_iterations)
+        report(f"remote (simulated {args.remote_latency_ms:g} ms)", remote)
+
+    # After: signature + expiry checked in-process
+    token = make_token(BENCH_SECRET)
+    verifier = JWTVerifier(secret=BENCH_SECRET)
+    local = asyncio.run(timed_async(lambda: verifier.verify(token), args.iterations))
+    report("local (HS256)", local)
+
+    print(f"\nSpeedup: x{statistics.mean(remote) / statistics.mean(local):,.0f} per authenticated request")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Email template render throughput per language.
+
+Compares a cold render (template compiled on every call, as the old inline
+f-string builders effectively did) with the cached compiled templates.
+
+Usage (from the backend/ directory):
+    python benchmarks/bench_email_templates.py --iterations 20000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from email_templates import EMAIL_TRANSLATIONS, SUPPORTED_LANGUAGES, compile_template, render_email
+
+SAMPLE_VALUES = {
+    "otp": {"otp_code": "482913"},
+    "staff_invite": {
+        "role_name": "Staff",
+        "email": "new.staff@gamestorezarzis.com.tn",
+        "password": "Temp#Pass<2026>",
+        "frontend_url": "https://gamestorezarzis.com.tn",
+    },
+    "password_reset": {"recovery_url": "https://example.supabase.co/auth/v1/verify?token=abc&type=recovery"},
+}
+
+
+def throughput(fn, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return iterations / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"{'template':<16}{'lang':<6}{'cold renders/s':>16}{'cached renders/s':>18}{'speedup':>10}")
+    for name, values in SAMPLE_VALUES.items():
+        assert name in EMAIL_TRANSLATIONS
+        for lang in SUPPORTED_LANGUAGES:
+            def cold():
+                compile_template.cache_clear()
+                render_email(name, lang, **values)
+
+            cold_rate = throughput(cold, max(1, args.iterations // 10))
+            render_email(name, lang, **values)  # warm the cache
+            cached_rate = throughput(lambda: render_email(name, lang, **values), args.iterations)
+            print(f"{name:<16}{lang:<6}{cold_rate:>16,.0f}{cached_rate:>18,.0f}{cached_rate / cold_rate:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Per-request overhead of the rate limiter storage backends.
+
+Times a trivial rate-limited endpoint through the ASGI stack with no limiter,
+the in-process memory storage, a shared Redis storage, and a Redis storage
+that is down (in-memory fallback). It then checks that two limiters sharing
+the Redis storage, standing in for two workers, enforce one common limit.
+
+Usage:
+    python benchmarks/bench_limiter.py                               # fakeredis TCP stand-in
+    python benchmarks/bench_limiter.py --redis redis://localhost:6379/15
+
+Needs `pip install redis` (and `pip install fakeredis[lua]` for the stand-in).
+Run from the backend/ directory.
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import sys
+import threading
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from fastapi import FastAPI, Request
+
+from utils.limiter import build_limiter, limiter_status
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_stand_in() -> str:
+    from fakeredis import TcpFakeServer
+    port = free_port()
+    server = TcpFakeServer(("127.0.0.1", port), server_type="redis")
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"redis://127.0.0.1:{port}/0"
+
+
+def preload_scripts(limiter):
+    """
+    Loads the storage's Lua scripts so no timed request pays for a NOSCRIPT
+    retry (the fakeredis stand-in also drops the connection on NOSCRIPT).
+    """
+    from redis.commands.core import Script
+    storage = limiter._storage
+    for script in [v for v in vars(storage).values() if isinstance(v, Script)]:
+        storage.storage.script_load(script.script)
+    return limiter
+
+
+def make_app(limiter, limit: str) -> FastAPI:
+    app = FastAPI()
+    if limiter is None:
+        @app.get("/ping")
+        async def ping(request: Request):
+            return {"ok": True}
+    else:
+        app.state.limiter = limiter
+
+        @app.get("/ping")
+        @limiter.limit(limit)
+        async def ping(request: Request):
+            return {"ok": True}
+    return app
+
+
+async def timed(app: FastAPI, iterations: int) -> list:
+    samples = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(20):
+            await client.get("/ping")  # warm-up, connections and script loading
+        for _ in range(iterations):
+            start = time.perf_counter()
+            res = await client.get("/ping")
+            samples.append((time.perf_counter() - start) * 1000)
+            assert res.status_code == 200, res.status_code
+    return samples
+
+
+def report(label: str, samples: list, baseline: float = None):
+    samples = sorted(samples)
+    mean = statistics.mean(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    extra = f"  overhead={mean - baseline:+7.3f} ms" if baseline is not None else ""
+    print(f"{label:<26} mean={mean:7.3f} ms  p50={statistics.median(samples):7.3f} ms  p95={p95:7.3f} ms{extra}")
+    return mean
+
+
+async def shared_limit(uri: str, strategy: str) -> bool:
+    """Two limiters on the same store (two workers) allow 3 requests in total, not 3 each."""
+    prefix = f"bench-{uuid.uuid4().hex[:8]}"
+    workers = [make_app(preload_scripts(build_limiter(uri, strategy, key_prefix=prefix)), "3/minute") for _ in range(2)]
+    codes = []
+    for i in range(6):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=workers[i % 2]), base_url="http://bench") as client:
+            codes.append((await client.get("/ping")).status_code)
+    print(f"{'two workers, 3/minute':<26} {codes}")
+    return codes == [200, 200, 200, 429, 429, 429]
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--redis", help="redis:// URI of a scratch server (default: fakeredis TCP stand-in)")
+    parser.add_argument("--strategy", default="moving-window")
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    uri = args.redis or start_stand_in()
+    limit = f"{args.iterations * 10}/minute"
+    print(f"{args.iterations:,} requests per backend, strategy {args.strategy}, redis at {uri}\n")
+
+    baseline = report("no limiter", await timed(make_app(None, limit), args.iterations))
+    report("memory://", await timed(make_app(build_limiter("memory://", args.strategy), limit), args.iterations), baseline)
+    prefix = f"bench-{uuid.uuid4().hex[:8]}"
+    shared = preload_scripts(build_limiter(uri, args.strategy, key_prefix=prefix))
+    report("redis", await timed(make_app(shared, limit), args.iterations), baseline)
+    assert not limiter_status(shared)["fallback"], "redis storage fell back to memory"
+
+    down = build_limiter(f"redis://127.0.0.1:{free_port()}/0", args.strategy)
+    report("redis down (fallback)", await timed(make_app(down, limit), args.iterations), baseline)
+    print(f"{'':<26} {limiter_status(down)}\n")
+
+    ok = await shared_limit(uri, args.strategy)
+    print("\n✅ Limit shared across workers" if ok else "\n❌ Limit not shared across workers")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,145 @@
+"""
+Order pipeline load test against a local Postgres stand-in.
+
+Drives the database side of the pipeline the way the API and workers do:
+idempotent order inserts (with a share of duplicate retries), concurrent
+`process_order` stock reservations on a few hot products, then batched
+`transition_orders` completions and cancellations. Prints the throughput
+of each phase and checks that no stock was oversold or lost.
+
+Needs a scratch database with docs/database_schema.sql applied (all rows the
+test creates are deleted afterwards):
+    python benchmarks/bench_orders.py --dsn postgresql://postgres@localhost/scratch --orders 5000 --workers 8
+
+Run from the backend/ directory.
+"""
+
+import argparse
+import json
+import os
+import random
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import psycopg2
+
+
+def connect(dsn: str):
+    conn = psycopg2.connect(dsn)
+    conn.autocommit = True
+    return conn
+
+
+def timed(label: str, count: int, fn):
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28}{count:>8,} in {elapsed:7.2f} s   {count / elapsed:>8,.0f}/s")
+    return result
+
+
+def run_pool(dsn: str, workers: int, jobs: list, work):
+    """Runs work(cursor, job) over jobs with one connection per worker thread; results keep the job order."""
+    chunks = [jobs[i::workers] for i in range(workers)]
+    results = [None] * len(jobs)
+
+    def drain(chunk):
+        conn = connect(dsn)
+        try:
+            with conn.cursor() as cur:
+                return [work(cur, job) for job in chunk]
+        finally:
+            conn.close()
+
+    with ThreadPoolExecutor(workers) as pool:
+        for i, chunk_results in enumerate(pool.map(drain, chunks)):
+            results[i::workers] = chunk_results
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dsn", default=os.getenv("DATABASE_URL"), help="scratch database (default: $DATABASE_URL)")
+    parser.add_argument("--orders", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--products", type=int, default=20, help="fewer products means more lock contention")
+    parser.add_argument("--stock", type=int, default=400, help="initial stock per product")
+    parser.add_argument("--duplicates", type=float, default=0.2, help="share of submissions that are retries")
+    parser.add_argument("--batch", type=int, default=100, help="orders per bulk transition")
+    args = parser.parse_args()
+    if not args.dsn:
+        parser.error("--dsn or DATABASE_URL is required")
+
+    rng = random.Random(42)
+    run = uuid.uuid4().hex[:8]
+    conn = connect(args.dsn)
+    cur = conn.cursor()
+    cur.execute(
+        "INSERT INTO public.products (name, category, price, stock_quantity, is_active) "
+        "SELECT %s || '-' || n, 'bench', 10, %s, true FROM generate_series(1, %s) n RETURNING id",
+        (f"order-bench-{run}", args.stock, args.products),
+    )
+    product_ids = [row[0] for row in cur.fetchall()]
+
+    submissions = []
+    for i in range(args.orders):
+        lines = [{"product_id": pid, "quantity": rng.randint(1, 3)} for pid in rng.sample(product_ids, rng.randint(1, 3))]
+        submissions.append((f"{run}-{i:08d}", json.dumps(lines)))
+    retries = [submissions[rng.randrange(args.orders)] for _ in range(int(args.orders * args.duplicates))]
+    shuffled = submissions + retries
+    rng.shuffle(shuffled)
+
+    print(f"{args.orders:,} orders (+{len(retries):,} retries) over {args.products} products, {args.workers} workers")
+    try:
+        def insert(c, submission):
+            c.execute(
+                "INSERT INTO public.orders (client_name, client_phone, items, subtotal, total_amount, delivery_method, "
+                "payment_method, idempotency_key) VALUES ('Bench', '00000000', %s, 0, 0, 'pickup', 'cash', %s) "
+                "ON CONFLICT (idempotency_key) DO NOTHING RETURNING id",
+                (submission[1], submission[0]),
+            )
+            return c.fetchone()
+
+        created = timed("create (idempotent)", len(shuffled), lambda: run_pool(args.dsn, args.workers, shuffled, insert))
+        order_ids = [row[0] for row in created if row]
+        assert len(order_ids) == args.orders, f"{len(order_ids)} orders created for {args.orders} keys"
+
+        def reserve(c, order_id):
+            c.execute("SELECT public.process_order(%s)", (order_id,))
+            return c.fetchone()[0]["status"]
+
+        outcomes = timed("process_order", len(order_ids), lambda: run_pool(args.dsn, args.workers, order_ids, reserve))
+        reserved = [oid for oid, status in zip(order_ids, outcomes) if status == "processing"]
+        print(f"{'':<28}reserved {len(reserved):,}, cancelled for stock {outcomes.count('cancelled'):,}")
+
+        # Every tenth batch is cancelled, which gives its stock back
+        batches = [(reserved[i:i + args.batch], "cancelled" if (i // args.batch) % 10 == 9 else "completed")
+                   for i in range(0, len(reserved), args.batch)]
+
+        def transition(c, job):
+            c.execute("SELECT public.transition_orders(%s::uuid[], %s)", job)
+            return len(c.fetchone()[0]["updated"])
+
+        moved = timed("transition_orders", len(reserved), lambda: run_pool(args.dsn, args.workers, batches, transition))
+        assert sum(moved) == len(reserved), "some transitions were skipped"
+
+        # Stock left must equal the initial stock minus what completed orders still hold
+        cur.execute(
+            "SELECT p.id, p.stock_quantity, COALESCE(SUM((i->>'quantity')::int) FILTER (WHERE o.status = 'completed'), 0) "
+            "FROM public.products p LEFT JOIN public.orders o ON o.idempotency_key LIKE %s "
+            "AND o.items @> jsonb_build_array(jsonb_build_object('product_id', p.id)) "
+            "LEFT JOIN LATERAL jsonb_array_elements(o.items) i ON (i->>'product_id')::uuid = p.id "
+            "WHERE p.id = ANY(%s::uuid[]) GROUP BY p.id",
+            (f"{run}-%", product_ids),
+        )
+        broken = [row for row in cur.fetchall() if row[1] < 0 or row[1] + row[2] != args.stock]
+        print("\n✅ Stock consistent" if not broken else f"\n❌ Stock mismatch on {len(broken)} products: {broken[:3]}")
+    finally:
+        cur.execute("DELETE FROM public.orders WHERE idempotency_key LIKE %s", (f"{run}-%",))
+        cur.execute("DELETE FROM public.products WHERE id = ANY(%s::uuid[])", (product_ids,))
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
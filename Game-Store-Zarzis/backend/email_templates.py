@@ -0,0 +1,367 @@
+"""
+Email Template Engine
+
+Templates are compiled once per (template, language, direction): translated
+strings, layout and direction are baked into static fragments, leaving only
+the per-message slots (codes, links, credentials). Rendering joins the cached
+fragments with the HTML-escaped slot values.
+
+Syntax: `{{name}}` is filled at compile time when `name` is a translation
+key of the template (or `dir`), otherwise it becomes a render-time slot.
+"""
+
+import re
+import html
+from functools import lru_cache
+
+SUPPORTED_LANGUAGES = ("fr", "en", "ar")
+DEFAULT_LANGUAGE = "fr"
+RTL_LANGUAGES = ("ar",)
+
+_SLOT_RE = re.compile(r"\{\{(\w+)\}\}")
+
+
+# Translation Dictionary for Emails
+EMAIL_TRANSLATIONS = {
+    "staff_invite": {
+        "subject": {
+            "fr": "Invitation Staff - Game Store Zarzis",
+            "en": "Staff Invitation - Game Store Zarzis",
+            "ar": "دعوة موظف - Game Store Zarzis"
+        },
+        "welcome": {
+            "fr": "Bienvenue dans l'Équipe!",
+            "en": "Welcome to the Team!",
+            "ar": "مرحباً بك في الفريق!"
+        },
+        "greeting": {
+            "fr": "Bonjour!",
+            "en": "Hello!",
+            "ar": "مرحباً!"
+        },
+        "invite_text": {
+            "fr": "Vous avez été invité à rejoindre Game Store Zarzis en tant que",
+            "en": "You have been invited to join Game Store Zarzis as",
+            "ar": "لقد تمت دعوتك للانضمام إلى Game Store Zarzis بصفتك"
+        },
+        "credentials": {
+            "fr": "Vos identifiants de connexion:",
+            "en": "Your login credentials:",
+            "ar": "بيانات تسجيل الدخول:"
+        },
+        "temp_password": {
+            "fr": "Mot de passe temporaire:",
+            "en": "Temporary password:",
+            "ar": "كلمة المرور المؤقتة:"
+        },
+        "action_required": {
+            "fr": "Connectez-vous et changez votre mot de passe dès que possible.",
+            "en": "Log in and change your password as soon as possible.",
+            "ar": "قم بتسجيل الدخول وتغيير كلمة المرور في أقرب وقت."
+        },
+        "button": {
+            "fr": "Accéder au Dashboard",
+            "en": "Access Dashboard",
+            "ar": "الدخول إلى لوحة التحكم"
+        },
+        "roles": {
+            "owner": {"fr": "Propriétaire", "en": "Owner", "ar": "مالك"},
+            "worker": {"fr": "Employé", "en": "Staff", "ar": "موظف"}
+        }
+    },
+    "otp": {
+        "subject": {
+            "fr": "Votre Code - Game Store Zarzis",
+            "en": "Your Code - Game Store Zarzis",
+            "ar": "رمزك - Game Store Zarzis"
+        },
+        "title": {
+            "fr": "Code de Vérification",
+            "en": "Verification Code",
+            "ar": "رمز التحقق"
+        },
+        "instruction": {
+            "fr": "Voici votre code pour accéder à votre compte:",
+            "en": "Here is your code to access your account:",
+            "ar": "إليك الرمز للوصول إلى حسابك:"
+        },
+        "expiry": {
+            "fr": "Ce code expire dans 10 minutes.",
+            "en": "This code expires in 10 minutes.",
+            "ar": "تنتهي صلاحية هذا الرمز خلال 10 دقائق."
+        }
+    },
+    "login_code": {
+        "subject": {
+            "fr": "Code de Connexion - Game Store",
+            "en": "Login Code - Game Store",
+            "ar": "رمز الدخول - Game Store"
+        },
+        "title": {
+            "fr": "Connexion Sécurisée",
+            "en": "Secure Login",
+            "ar": "تسجيل دخول آمن"
+        },
+        "request_text": {
+            "fr": "Nouvelle demande de connexion",
+            "en": "New login request",
+            "ar": "طلب دخول جديد"
+        },
+        "instruction": {
+            "fr": "Utilisez ce code unique:",
+            "en": "Use this unique code:",
+            "ar": "استخدم هذا الرمز الفريد:"
+        },
+        "expiry": {
+            "fr": "Expire dans 10 minutes",
+            "en": "Expires in 10 minutes",
+            "ar": "تنتهي صلاحيته خلال 10 دقائق"
+        },
+        "ignore_text": {
+            "fr": "Si vous n'avez pas demandé ce code, ignorez cet email.",
+            "en": "If you didn't request this, ignore this email.",
+            "ar": "إذا لم تطلب هذا، تجاهل هذا البريد."
+        }
+    },
+    "password_reset": {
+        "subject": {
+            "fr": "Réinitialisation Mot de Passe",
+            "en": "Password Reset",
+            "ar": "إعادة تعيين كلمة المرور"
+        },
+        "title": {
+            "fr": "Réinitialiser votre Mot de Passe",
+            "en": "Reset Your Password",
+            "ar": "إعادة تعيين كلمة المرور"
+        },
+        "greeting": {
+            "fr": "Bonjour,",
+            "en": "Hello,",
+            "ar": "مرحباً،"
+        },
+        "instruction": {
+            "fr": "Cliquez ci-dessous pour réinitialiser votre mot de passe:",
+            "en": "Click below to reset your password:",
+            "ar": "انقر أدناه لإعادة تعيين كلمة المرور:"
+        },
+        "button": {
+            "fr": "Réinitialiser",
+            "en": "Reset Password",
+            "ar": "إعادة تعيين"
+        },
+        "expiry": {
+            "fr": "Lien valable 1 heure",
+            "en": "Link valid for 1 hour",
+            "ar": "رابط صالح لمدة ساعة"
+        },
+        "ignore": {
+            "fr": "Si vous n'avez pas demandé ceci, ignorez cet email.",
+            "en": "If you didn't request this, ignore this email.",
+            "ar": "إذا لم تطلب هذا، تجاهل البريد."
+        }
+    },
+    "notification": {
+        "subject": {
+            "fr": "Notification - Game Store Zarzis",
+            "en": "Notification - Game Store Zarzis",
+            "ar": "إشعار - Game Store Zarzis"
+        },
+        "greeting": {
+            "fr": "Bonjour",
+            "en": "Hello",
+            "ar": "مرحباً"
+        },
+        "button": {
+            "fr": "Visiter le site",
+            "en": "Visit the website",
+            "ar": "زيارة الموقع"
+        }
+    }
+}
+
+
+# Shared document shell: header band, body block and footer
+LAYOUT = """
+    <!DOCTYPE html>
+    <html dir="{{dir}}">
+    <head>
+        <meta charset="UTF-8">
+        <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    </head>
+    <body style="margin:0;padding:0;font-family:Arial,sans-serif;background:#f5f5f5;">
+        <div style="max-width:600px;margin:20px auto;background:#ffffff;border-radius:12px;overflow:hidden;box-shadow:0 4px 12px rgba(0,0,0,0.1);">
+            <!-- Header -->
+            <div style="background:__HEADER_BACKGROUND__;padding:32px 24px;text-align:center;">
+                <h1 style="margin:0;color:__HEADER_COLOR__;font-size:28px;font-weight:bold;letter-spacing:0.5px;">__HEADER_TITLE__</h1>
+            </div>
+            
+            <!-- Body -->
+__BODY__
+            
+            <!-- Footer -->
+            <div style="background:#1a1a1a;padding:24px;text-align:center;">
+                <p style="margin:0;color:#999;font-size:13px;">Zarzis, Tunisie | Tel: 23 290 065</p>
+                <p style="margin:8px 0 0;color:#666;font-size:12px;">Game Store Zarzis © 2026</p>
+            </div>
+        </div>
+    </body>
+    </html>
+    """
+
+BRAND_GRADIENT = "linear-gradient(135deg,#667eea 0%,#764ba2 100%)"
+GOLD_GRADIENT = "linear-gradient(135deg,#FFD700 0%,#FDB931 100%)"
+
+TEMPLATES = {
+    "otp": {
+        "header": (BRAND_GRADIENT, "#ffffff", "Game Store Zarzis"),
+        "html": """
+            <div style="padding:40px 32px;text-align:center;">
+                <h2 style="margin:0 0 16px;color:#333;font-size:24px;font-weight:600;">{{title}}</h2>
+                <p style="margin:0 0 32px;color:#666;font-size:16px;line-height:1.6;">{{instruction}}</p>
+                
+                <!-- OTP Code Box -->
+                <div style="display:inline-block;background:#f8f9fa;border:3px solid #667eea;border-radius:12px;padding:24px 48px;margin:0 0 24px;">
+                    <div style="font-size:42px;font-weight:bold;color:#667eea;letter-spacing:12px;font-family:monospace;">
+                        {{otp_code}}
+                    </div>
+                </div>
+                
+                <p style="margin:0;color:#999;font-size:14px;">{{expiry}}</p>
+            </div>""",
+        "text": "{{instruction}} {{otp_code}}. {{expiry}}",
+    },
+    "staff_invite": {
+        "header": (GOLD_GRADIENT, "#333", "{{welcome}}"),
+        "html": """
+            <div style="padding:40px 32px;">
+                <h2 style="margin:0 0 16px;color:#333;font-size:20px;">{{greeting}}</h2>
+                <p style="margin:0 0 24px;color:#666;font-size:16px;line-height:1.6;">
+                    {{invite_text}} <strong style="color:#FDB931;">{{role_name}}</strong>.
+                </p>
+                
+                <!-- Credentials Box -->
+                <div style="background:#f8f9fa;border-left:5px solid #FDB931;border-radius:8px;padding:24px;margin:0 0 24px;">
+                    <p style="margin:0 0 12px;color:#333;font-weight:600;font-size:15px;">{{credentials}}</p>
+                    <p style="margin:0 0 8px;color:#555;"><strong>Email:</strong> {{email}}</p>
+                    <p style="margin:0;color:#555;"><strong>{{temp_password}}</strong> {{password}}</p>
+                </div>
+                
+                <p style="margin:0 0 32px;color:#666;font-size:14px;line-height:1.6;">
+                    {{action_required}}
+                </p>
+                
+                <!-- CTA Button -->
+                <div style="text-align:center;">
+                    <a href="{{frontend_url}}/staff-login" style="display:inline-block;background:#333;color:#fff;padding:14px 32px;text-decoration:none;border-radius:8px;font-weight:600;font-size:16px;">
+                        {{button}}
+                    </a>
+                </div>
+            </div>""",
+        "text": "{{welcome}}! {{invite_text}} {{role_name}}. Email: {{email}}, Password: {{password}}",
+    },
+    "password_reset": {
+        "header": (BRAND_GRADIENT, "#ffffff", "Game Store Zarzis"),
+        "html": """
+            <div style="padding:40px 32px;">
+                <h2 style="margin:0 0 16px;color:#333;font-size:24px;">{{title}}</h2>
+                <p style="margin:0 0 8px;color:#666;font-size:16px;">{{greeting}}</p>
+                <p style="margin:0 0 32px;color:#666;font-size:16px;line-height:1.6;">
+                    {{instruction}}
+                </p>
+                
+                <!-- CTA Button -->
+                <div style="text-align:center;margin:0 0 32px;">
+                    <a href="{{recovery_url}}" style="display:inline-block;background:linear-gradient(135deg,#667eea 0%,#764ba2 100%);color:#fff;padding:16px 40px;text-decoration:none;border-radius:8px;font-weight:600;font-size:16px;">
+                        {{button}}
+                    </a>
+                </div>
+                
+                <p style="margin:0 0 16px;color:#999;font-size:14px;text-align:center;">{{expiry}}</p>
+                <p style="margin:0;color:#aaa;font-size:13px;text-align:center;">{{ignore}}</p>
+                
+                <!-- Link Fallback -->
+                <div style="margin:32px 0 0;padding:16px;background:#f8f9fa;border-radius:6px;">
+                    <p style="margin:0 0 8px;color:#666;font-size:12px;font-weight:600;">Lien direct:</p>
+                    <p style="margin:0;color:#999;font-size:11px;word-break:break-all;">{{recovery_url}}</p>
+                </div>
+            </div>""",
+        "text": "{{instruction}} {{recovery_url}}. {{expiry}}",
+    },
+    "notification": {
+        "header": (BRAND_GRADIENT, "#ffffff", "Game Store Zarzis"),
+        "html": """
+            <div style="padding:40px 32px;">
+                <h2 style="margin:0 0 16px;color:#333;font-size:24px;">{{title}}</h2>
+                <p style="margin:0 0 16px;color:#666;font-size:16px;">{{greeting}} {{name}},</p>
+                <p style="margin:0 0 32px;color:#666;font-size:16px;line-height:1.6;white-space:pre-line;">{{message}}</p>
+                
+                <!-- CTA Button -->
+                <div style="text-align:center;">
+                    <a href="{{frontend_url}}" style="display:inline-block;background:linear-gradient(135deg,#667eea 0%,#764ba2 100%);color:#fff;padding:14px 32px;text-decoration:none;border-radius:8px;font-weight:600;font-size:16px;">
+                        {{button}}
+                    </a>
+                </div>
+            </div>""",
+        "text": "{{greeting}} {{name}},\n\n{{title}}\n\n{{message}}\n\n{{frontend_url}}",
+    },
+}
+
+
+class CompiledTemplate:
+    """Static fragments interleaved with named slots: parts[0] slot[0] parts[1] ..."""
+
+    __slots__ = ("parts", "slots")
+
+    def __init__(self, source: str, static: dict):
+        pieces = _SLOT_RE.split(source)  # literal, name, literal, name, ..., literal
+        parts, slots = [], []
+        buffer = pieces[0]
+        for i in range(1, len(pieces), 2):
+            name, literal = pieces[i], pieces[i + 1]
+            if name in static:
+                buffer += static[name] + literal
+            else:
+                parts.append(buffer)
+                slots.append(name)
+                buffer = literal
+        parts.append(buffer)
+        self.parts = tuple(parts)
+        self.slots = tuple(slots)
+
+    def render(self, values: dict, escape: bool = True) -> str:
+        out = [self.parts[0]]
+        for name, literal in zip(self.slots, self.parts[1:]):
+            value = str(values[name])
+            out.append(html.escape(value) if escape else value)
+            out.append(literal)
+        return "".join(out)
+
+
+def normalize_language(lang: str) -> str:
+    return lang if lang in SUPPORTED_LANGUAGES else DEFAULT_LANGUAGE
+
+
+@lru_cache(maxsize=None)
+def compile_template(name: str, lang: str, direction: str) -> tuple:
+    """Returns (subject, html template, text template), compiled once per key."""
+    spec = TEMPLATES[name]
+    translations = EMAIL_TRANSLATIONS[name]
+    static = {key: value[lang] for key, value in translations.items() if lang in value}
+    static["dir"] = direction
+
+    background, color, title = spec["header"]
+    source = (
+        LAYOUT.replace("__HEADER_BACKGROUND__", background)
+        .replace("__HEADER_COLOR__", color)
+        .replace("__HEADER_TITLE__", title)
+        .replace("__BODY__", spec["html"].lstrip("\n"))
+    )
+    return static["subject"], CompiledTemplate(source, static), CompiledTemplate(spec["text"], static)
+
+
+def render_email(template: str, lang: str, **values) -> tuple:
+    """Renders a template; returns (subject, html_content, text_content)."""
+    lang = normalize_language(lang)
+    direction = "rtl" if lang in RTL_LANGUAGES else "ltr"
+    subject, html_template, text_template = compile_template(template, lang, direction)
+    return subject, html_template.render(values), text_template.render(values, escape=False)
@@ -3,16 +3,26 @@ Game Store Zarzis Backend API
 Secure FastAPI backend with rate limiting and email integration
 """
 
+import os
+from dotenv import load_dotenv
+
+# Before any project import: services and utils read their settings at import time
+load_dotenv()
+
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from slowapi import _rate_limit_exceeded_handler, Limiter
 from slowapi.errors import RateLimitExceeded
 from slowapi.util import get_remote_address
-from utils.limiter import limiter
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
+from utils.limiter import limiter, limiter_status
+from services.supabase_client import AsyncSupabaseSingleton, get_async_supabase
+from services.email_queue import email_queue
+from services.stats_rollup import stats_rollup, STATS_ROLLUP_ENABLED
+from services.session_state import session_index
+from services.order_pipeline import order_pipeline, ORDER_PIPELINE_ENABLED
+from services.store_settings import store_settings
+from services.otp_store import otp_store
+from database import pool_status
 
 # Environment Settings
 DEBUG = os.environ.get("DEBUG", "False").lower() == "true"
@@ -22,6 +32,13 @@ from routers.email_routes import router as email_router
 from routers.verification_routes import router as verification_router
 from routers.expenses_routes import router as expenses_router
 from routers.admin_routes import router as admin_router, diag_router as diag_router
+from routers.notification_routes import router as notification_router
+from routers.stats_routes import router as stats_router
+from routers.analytics_routes import router as analytics_router
+from routers.session_routes import router as session_router
+from routers.sales_routes import router as sales_router
+from routers.order_routes import router as order_router
+from routers.catalogue_routes import router as catalogue_router
 
 # Rate limiter - Already initialized in utils/limiter.py
 # If re-initialization is needed:
@@ -93,6 +110,72 @@ app.include_router(expenses_router)
 if DEBUG:
     app.include_router(diag_router)
 app.include_router(admin_router)
+app.include_router(notification_router)
+app.include_router(stats_router)
+app.include_router(analytics_router)
+app.include_router(session_router)
+app.include_router(sales_router)
+app.include_router(order_router)
+app.include_router(catalogue_router)
+
+
+@app.on_event("startup")
+async def start_stats_rollup():
+    if STATS_ROLLUP_ENABLED:
+        stats_rollup.start(get_async_supabase)
+
+
+@app.on_event("startup")
+async def start_session_sync():
+    session_index.start_sync(get_async_supabase)
+
+
+@app.on_event("startup")
+async def start_settings_refresh():
+    store_settings.start(get_async_supabase)
+
+
+@app.on_event("startup")
+async def start_order_pipeline():
+    if ORDER_PIPELINE_ENABLED:
+        order_pipeline.start(get_async_supabase)
+
+
+@app.on_event("shutdown")
+async def stop_stats_rollup():
+    await stats_rollup.stop()
+
+
+@app.on_event("shutdown")
+async def stop_session_sync():
+    await session_index.stop_sync()
+
+
+@app.on_event("shutdown")
+async def stop_order_pipeline():
+    await order_pipeline.stop()
+
+
+@app.on_event("shutdown")
+async def stop_settings_refresh():
+    await store_settings.stop()
+
+
+@app.on_event("shutdown")
+async def close_otp_store():
+    await otp_store.close()
+
+
+@app.on_event("shutdown")
+async def close_supabase_connections():
+    await AsyncSupabaseSingleton.close()
+
+
+@app.on_event("shutdown")
+def drain_email_queue():
+    email_queue.shutdown()
+    from email_service import smtp_pool
+    smtp_pool.close_all()
 
 
 
@@ -113,7 +196,10 @@ async def health_check(request: Request):
         "status": "healthy",
         "services": {
             "api": "online",
-            "email": "configured" if os.getenv("RESEND_API_KEY") else "not_configured"
+            "email": "configured" if os.getenv("RESEND_API_KEY") else "not_configured",
+            "settings_age_seconds": store_settings.age_seconds(),
+            "rate_limit": limiter_status(limiter),
+            "direct_db": pool_status()
         }
     }
 
@@ -125,19 +211,24 @@ async def cleanup_temp_data(request: Request):
     Should be called periodically (e.g., daily cron job).
     """
     try:
-        from routers.verification_routes import supabase
         from datetime import datetime
+        supabase = await get_async_supabase()
         
         # Delete expired verification codes
-        res = supabase.table("verification_codes")\
+        res = await supabase.table("verification_codes")\
             .delete()\
             .lt("expires_at", datetime.utcnow().isoformat())\
             .execute()
-            
+        deleted = len(res.data) if res.data else 0
+
+        # In-memory codes and counters (Redis expires its keys by itself)
+        if otp_store.name != "supabase":
+            deleted += await otp_store.purge_expired()
+
         return {
             "success": True, 
             "message": "Cleanup completed", 
-            "deleted_codes": len(res.data) if res.data else 0
+            "deleted_codes": deleted
         }
     except Exception as e:
         print(f"Cleanup error: {e}")
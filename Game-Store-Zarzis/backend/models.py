@@ -1,38 +1,388 @@
+"""
+ORM models of the public schema (docs/database_schema.sql).
 
-from sqlalchemy import Column, Integer, String, Boolean, Float, ForeignKey, DateTime
+Used by the direct SQL paths (database.py); the schema itself is managed in
+Supabase, not created from these models. UUIDs are handled as strings and
+amounts as Decimal, the same as in PostgREST responses. References to
+auth.users are plain UUID columns.
+
+The indexes declared in __table_args__ mirror the ones of the schema file
+(and docs/migrations/), so a database created from the models, such as the
+SQLite stand-in of the checks, plans the same queries the same way.
+"""
+
+import uuid
+from sqlalchemy import Column, Integer, String, Text, Boolean, Numeric, ForeignKey, DateTime, Date, Uuid, Index, JSON, func
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
-from .database import Base
-from datetime import datetime
-
-class User(Base):
-    __tablename__ = "users"
-
-    id = Column(String, primary_key=True, index=True) # UUID stored as string
-    email = Column(String, unique=True, index=True)
-    full_name = Column(String)
-    role = Column(String, default="worker") # 'owner' or 'worker'
-    created_at = Column(DateTime, default=datetime.utcnow)
-    
+from database import Base
+
+JSONType = JSON().with_variant(JSONB(), "postgresql")
+
+
+def _uuid() -> str:
+    return str(uuid.uuid4())
+
+
+def _id():
+    return Column(Uuid(as_uuid=False), primary_key=True, default=_uuid)
+
+
+def _created_at():
+    return Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+
+def _updated_at():
+    return Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+
+class Profile(Base):
+    __tablename__ = "profiles"
+
+    id = Column(Uuid(as_uuid=False), primary_key=True)  # auth.users id
+    full_name = Column(Text, nullable=False)
+    email = Column(Text)
+    avatar_url = Column(Text)
+    phone = Column(Text)
+    is_active = Column(Boolean, default=True)
+    created_at = _created_at()
+    updated_at = _updated_at()
+
+
+class UserRole(Base):
+    __tablename__ = "user_roles"
+
+    id = _id()
+    user_id = Column(Uuid(as_uuid=False), nullable=False, unique=True)
+    role = Column(String, nullable=False)  # app_role enum: 'owner' or 'worker'
+    created_at = _created_at()
+
+
+class Client(Base):
+    __tablename__ = "clients"
+
+    id = _id()
+    name = Column(Text, nullable=False)
+    phone = Column(Text, nullable=False, unique=True)
+    email = Column(Text)
+    points = Column(Integer, default=0)
+    total_spent = Column(Numeric(12, 3), default=0)
+    total_games_played = Column(Integer, default=0)
+    created_by = Column(Uuid(as_uuid=False))
+    created_at = _created_at()
+    updated_at = _updated_at()
+
+
+class Console(Base):
+    __tablename__ = "consoles"
+
+    id = _id()
+    name = Column(Text, nullable=False)
+    station_number = Column(Integer, nullable=False)
+    console_type = Column(Text, nullable=False)  # 'ps4' or 'ps5'
+    status = Column(Text, default="available")  # 'available', 'in_use', 'maintenance'
+    current_session_id = Column(Uuid(as_uuid=False))
+    created_at = _created_at()
+    updated_at = _updated_at()
+
+
+class Pricing(Base):
+    __tablename__ = "pricing"
+
+    id = _id()
+    name = Column(Text, nullable=False)
+    name_fr = Column(Text)
+    name_ar = Column(Text)
+    console_type = Column(Text, nullable=False)
+    price_type = Column(Text, nullable=False)  # 'hourly', 'fixed'
+    game_duration_minutes = Column(Integer)
+    price = Column(Numeric(10, 3), nullable=False)
+    extra_time_price = Column(Numeric(10, 3))
+    points_earned = Column(Integer, default=0)
+    is_active = Column(Boolean, default=True)
+    sort_order = Column(Integer, default=0)
+    created_at = _created_at()
+    updated_at = _updated_at()
+
+
 class Product(Base):
     __tablename__ = "products"
 
-    id = Column(String, primary_key=True, index=True)
-    name = Column(String, index=True)
-    name_fr = Column(String)
-    description = Column(String, nullable=True)
-    price = Column(Float)
+    id = _id()
+    name = Column(Text, nullable=False)
+    name_fr = Column(Text)
+    name_ar = Column(Text)
+    description = Column(Text)
+    description_fr = Column(Text)
+    description_ar = Column(Text)
+    category = Column(Text, nullable=False)
+    price = Column(Numeric(10, 3), nullable=False)
+    cost_price = Column(Numeric(10, 3))
     stock_quantity = Column(Integer, default=0)
-    category = Column(String, index=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    
+    points_earned = Column(Integer, default=0)
+    points_price = Column(Integer)
+    image_url = Column(Text)
+    is_active = Column(Boolean, default=True)
+    created_at = _created_at()
+    updated_at = _updated_at()
+
+
+class GamingSession(Base):
+    __tablename__ = "gaming_sessions"
+    __table_args__ = (
+        Index("idx_gaming_sessions_status_created", "status", "created_at"),
+        Index("idx_gaming_sessions_created", "created_at", "id"),
+        Index("idx_gaming_sessions_updated", "updated_at", "id"),
+    )
+
+    id = _id()
+    console_id = Column(Uuid(as_uuid=False), ForeignKey("consoles.id"), nullable=False)
+    client_id = Column(Uuid(as_uuid=False), ForeignKey("clients.id"))
+    pricing_id = Column(Uuid(as_uuid=False), ForeignKey("pricing.id"), nullable=False)
+    staff_id = Column(Uuid(as_uuid=False), nullable=False)
+    session_type = Column(Text, nullable=False)
+    start_time = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    end_time = Column(DateTime(timezone=True))
+    games_played = Column(Integer, default=0)
+    extra_time_minutes = Column(Integer, default=0)
+    base_amount = Column(Numeric(10, 3), default=0)
+    extra_amount = Column(Numeric(10, 3), default=0)
+    total_amount = Column(Numeric(10, 3), default=0)
+    points_earned = Column(Integer, default=0)
+    points_used = Column(Integer, default=0)
+    payment_method = Column(Text)
+    status = Column(Text, default="active")
+    is_free_game = Column(Boolean, default=False)
+    notes = Column(Text)
+    created_at = _created_at()
+    updated_at = _updated_at()
+
+    console = relationship("Console")
+    client = relationship("Client")
+    pricing = relationship("Pricing")
+
+
 class Sale(Base):
     __tablename__ = "sales"
+    __table_args__ = (
+        Index("idx_sales_created", "created_at", "id"),
+        Index("idx_sales_updated", "updated_at", "id"),
+    )
 
-    id = Column(String, primary_key=True, index=True)
-    product_id = Column(String, ForeignKey("products.id"))
-    quantity = Column(Integer)
-    total_amount = Column(Float)
-    payment_method = Column(String) # 'cash', 'points', 'mixed'
-    created_at = Column(DateTime, default=datetime.utcnow)
+    id = _id()
+    product_id = Column(Uuid(as_uuid=False), ForeignKey("products.id"), nullable=False)
+    client_id = Column(Uuid(as_uuid=False), ForeignKey("clients.id"))
+    staff_id = Column(Uuid(as_uuid=False), nullable=False)
+    quantity = Column(Integer, default=1, nullable=False)
+    unit_price = Column(Numeric(10, 3), nullable=False)
+    total_amount = Column(Numeric(10, 3), nullable=False)
+    payment_method = Column(Text)
+    points_earned = Column(Integer, default=0)
+    points_used = Column(Integer, default=0)
+    notes = Column(Text)
+    created_at = _created_at()
+    updated_at = _updated_at()
 
     product = relationship("Product")
+    client = relationship("Client")
+
+
+class ServiceCatalogItem(Base):
+    __tablename__ = "services_catalog"
+
+    id = _id()
+    name = Column(Text, nullable=False)
+    name_fr = Column(Text)
+    name_ar = Column(Text)
+    description = Column(Text)
+    description_fr = Column(Text)
+    description_ar = Column(Text)
+    category = Column(Text, nullable=False)
+    price = Column(Numeric(10, 3))
+    is_complex = Column(Boolean, default=False)
+    estimated_duration = Column(Text)
+    is_active = Column(Boolean, default=True)
+    sort_order = Column(Integer, default=0)
+    created_at = _created_at()
+    updated_at = _updated_at()
+
+
+class ServiceRequest(Base):
+    __tablename__ = "service_requests"
+    __table_args__ = (
+        Index("idx_service_requests_status_created", "status", "created_at"),
+        Index("idx_service_requests_updated", "updated_at", "id"),
+    )
+
+    id = _id()
+    service_id = Column(Uuid(as_uuid=False), ForeignKey("services_catalog.id"), nullable=False)
+    client_id = Column(Uuid(as_uuid=False), ForeignKey("clients.id"))
+    client_name = Column(Text, nullable=False)
+    client_phone = Column(Text, nullable=False)
+    staff_id = Column(Uuid(as_uuid=False), nullable=False)
+    assigned_to = Column(Uuid(as_uuid=False))
+    device_type = Column(Text)
+    device_brand = Column(Text)
+    device_model = Column(Text)
+    issue_description = Column(Text, nullable=False)
+    diagnosis = Column(Text)
+    estimated_cost = Column(Numeric(10, 3))
+    final_cost = Column(Numeric(10, 3))
+    status = Column(Text, default="pending")
+    priority = Column(Text, default="normal")
+    is_complex = Column(Boolean, default=False)
+    internal_notes = Column(Text)
+    notes = Column(Text)
+    started_at = Column(DateTime(timezone=True))
+    completed_at = Column(DateTime(timezone=True))
+    created_at = _created_at()
+    updated_at = _updated_at()
+
+    service = relationship("ServiceCatalogItem")
+
+
+class Expense(Base):
+    __tablename__ = "expenses"
+    __table_args__ = (
+        Index("idx_expenses_date", "date", "id"),
+    )
+
+    id = _id()
+    name = Column(Text, nullable=False)
+    amount = Column(Numeric(10, 3), nullable=False)
+    category = Column(Text, nullable=False)
+    date = Column(Date, server_default=func.current_date(), nullable=False)
+    notes = Column(Text)
+    created_at = _created_at()
+    updated_at = _updated_at()
+
+
+class PointsTransaction(Base):
+    __tablename__ = "points_transactions"
+    __table_args__ = (
+        Index("idx_points_transactions_client_created", "client_id", "created_at"),
+    )
+
+    id = _id()
+    client_id = Column(Uuid(as_uuid=False), ForeignKey("clients.id"), nullable=False)
+    transaction_type = Column(Text, nullable=False)
+    amount = Column(Integer, nullable=False)
+    balance_after = Column(Integer, nullable=False)
+    description = Column(Text)
+    reference_type = Column(Text)
+    reference_id = Column(Uuid(as_uuid=False))
+    staff_id = Column(Uuid(as_uuid=False))
+    confirmed_by_staff = Column(Boolean, default=True)
+    confirmed_by_client = Column(Boolean, default=False)
+    created_at = _created_at()
+
+    client = relationship("Client")
+
+
+class StaffShift(Base):
+    __tablename__ = "staff_shifts"
+
+    id = _id()
+    staff_id = Column(Uuid(as_uuid=False), nullable=False)
+    check_in = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    check_out = Column(DateTime(timezone=True))
+    notes = Column(Text)
+    created_at = _created_at()
+
+
+class BlogPost(Base):
+    __tablename__ = "blog_posts"
+
+    id = _id()
+    title = Column(Text, nullable=False)
+    title_fr = Column(Text, nullable=False)
+    title_ar = Column(Text, nullable=False)
+    content = Column(Text, nullable=False)
+    content_fr = Column(Text, nullable=False)
+    content_ar = Column(Text, nullable=False)
+    category = Column(Text)
+    image_url = Column(Text)
+    author_id = Column(Uuid(as_uuid=False), nullable=False)
+    is_published = Column(Boolean, default=False)
+    published_at = Column(DateTime(timezone=True))
+    created_at = _created_at()
+    updated_at = _updated_at()
+
+
+class StoreSetting(Base):
+    __tablename__ = "store_settings"
+
+    id = _id()
+    key = Column(Text, nullable=False, unique=True)
+    value = Column(JSONType, nullable=False)
+    updated_at = _updated_at()
+    updated_by = Column(Uuid(as_uuid=False))
+
+
+class Order(Base):
+    __tablename__ = "orders"
+    __table_args__ = (
+        Index("idx_orders_status_created", "status", "created_at"),
+    )
+
+    id = _id()
+    user_id = Column(Uuid(as_uuid=False))  # empty for guest checkout
+    client_name = Column(Text)
+    client_phone = Column(Text)
+    client_email = Column(Text)
+    delivery_address = Column(Text)
+    items = Column(JSONType, nullable=False)
+    subtotal = Column(Numeric(12, 3))
+    delivery_cost = Column(Numeric(12, 3), default=0)
+    total_amount = Column(Numeric(12, 3), nullable=False)
+    delivery_method = Column(Text, nullable=False)  # 'pickup', 'rapid_post', 'local_delivery'
+    payment_method = Column(Text, nullable=False)  # 'cash', 'bank_transfer', 'd17', 'card'
+    payment_reference = Column(Text)
+    payment_status = Column(Text, default="pending")
+    status = Column(Text, default="pending", nullable=False)
+    status_reason = Column(Text)
+    stock_reserved = Column(Boolean, default=False, nullable=False)
+    idempotency_key = Column(Text, unique=True)
+    request_hash = Column(Text)
+    notes = Column(Text)
+    created_at = _created_at()
+    updated_at = _updated_at()
+
+
+class CheckoutRequest(Base):
+    __tablename__ = "checkout_requests"
+
+    idempotency_key = Column(Text, primary_key=True)
+    request_hash = Column(Text, nullable=False)
+    response = Column(JSONType, nullable=False)
+    created_at = _created_at()
+
+
+class VerificationCode(Base):
+    __tablename__ = "verification_codes"
+    __table_args__ = (
+        Index("idx_verification_codes_lookup", "identifier", "code", "expires_at"),
+    )
+
+    id = _id()
+    identifier = Column(Text, nullable=False)  # email or phone number
+    code = Column(Text, nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    is_verified = Column(Boolean, default=False, nullable=False)
+    created_at = _created_at()
+
+
+class DailyStats(Base):
+    __tablename__ = "daily_stats"
+
+    id = _id()
+    date = Column(Date, nullable=False, unique=True)
+    total_revenue = Column(Numeric(12, 3), default=0)
+    gaming_revenue = Column(Numeric(12, 3), default=0)
+    sales_revenue = Column(Numeric(12, 3), default=0)
+    service_revenue = Column(Numeric(12, 3), default=0)
+    total_sessions = Column(Integer, default=0)
+    total_sales = Column(Integer, default=0)
+    total_services = Column(Integer, default=0)
+    created_at = _created_at()
+    updated_at = _updated_at()
@@ -1,27 +1,39 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from typing import Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 import datetime
-from supabase import create_client, Client
+import time
+from supabase import AsyncClient
+from starlette.concurrency import run_in_threadpool
 import os
 import json
 from utils.security import require_admin
 from utils.limiter import limiter
+from utils.role_cache import role_cache
+from services.email_queue import email_queue, EmailQueueFull
+from services.chunked_delete import (
+    CLEANUP_BATCH_SIZE, CLEANUP_PAUSE_MS, CLEANUP_MAX_SECONDS, CLEANUP_CONCURRENCY, CLEANUP_TABLE_TIMEOUT,
+    count_older_than, delete_older_than, encode_resume_token, decode_resume_token,
+)
+from services.stats import business_day
+from services.stats_rollup import stats_rollup, STATS_BACKFILL_CHUNK_DAYS
+from services.store_settings import store_settings
+from services.table_export import EXPORT_TABLES, export_ndjson, gzip_stream, decode_checkpoint
+from services.fanout import fan_out
+from services.profile_sync import sync_profiles as sync_profiles_service
 
-from services.supabase_client import get_supabase
-
-# Initialize Supabase client via Singleton
-supabase: Client = get_supabase()
+from services.supabase_client import get_async_supabase
 
 # Move status to a public diagnostic router or define it before the protected one
 diag_router = APIRouter(prefix="/api/diag", tags=["Diagnostics"])
 
 @diag_router.get("/status")
-def get_admin_status():
+async def get_admin_status(supabase: AsyncClient = Depends(get_async_supabase)):
     """Diagnostic endpoint to verify Supabase service role connectivity (Public)"""
     try:
         # Try to read from a restricted table to verify service role permissions
-        res = supabase.table("user_roles").select("count").limit(1).execute()
+        res = await supabase.table("user_roles").select("count").limit(1).execute()
         return {
             "status": "online",
             "supabase_connectivity": "ok",
@@ -44,78 +56,136 @@ router = APIRouter(
 class CleanupRequest(BaseModel):
     days_to_keep: int
     tables: list[str] = ["gaming_sessions", "sales", "expenses"]
+    dry_run: bool = False  # only count what would be deleted
+    batch_size: int = Field(CLEANUP_BATCH_SIZE, ge=1, le=1000)
+    pause_ms: int = Field(CLEANUP_PAUSE_MS, ge=0, le=5000)
+    resume_token: Optional[str] = None  # continue an interrupted cleanup
+
+# Hard warning: protecting critical tables not in list
+CLEANUP_ALLOWED_TABLES = ["gaming_sessions", "sales", "expenses", "audit_logs", "staff_sessions", "points_transactions"]
 
 @router.delete("/cleanup")
-@limiter.limit("5/hour")
-def cleanup_data(request: Request, body: CleanupRequest):
+@limiter.limit("20/hour")
+async def cleanup_data(request: Request, body: CleanupRequest, supabase: AsyncClient = Depends(get_async_supabase)):
     """
     Deletes data older than X days from specified tables to free up space.
+    Rows are deleted in bounded id batches; when the time budget runs out the
+    response is 'partial' and carries a resume_token to continue from.
     """
     try:
         request_data = body
-        cutoff_date = (datetime.datetime.now() - datetime.timedelta(days=request_data.days_to_keep)).isoformat()
-        
-        results = {}
-        # Hard warning: protecting critical tables not in list
-        allowed_tables = ["gaming_sessions", "sales", "expenses", "audit_logs", "staff_sessions", "points_transactions"]
-        
-        for table in request_data.tables:
-            if table not in allowed_tables:
-                results[table] = "Skipped: table not in allowed list"
-                continue
-                
+        deleted_so_far = {}
+        if request_data.resume_token:
             try:
-                # Perform deletion
-                response = supabase.table(table).delete().lt("created_at", cutoff_date).execute()
-                
-                # Check for errors in response (Postgrest response format)
-                if hasattr(response, 'error') and response.error:
-                     results[table] = f"Error: {response.error}"
-                else:
-                     results[table] = f"Cleanup executed successfully (Cutoff: {cutoff_date})"
-            except Exception as table_err:
-                results[table] = f"Execution failed: {str(table_err)}"
+                state = decode_resume_token(request_data.resume_token)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            cutoff_date = state["cutoff"]
+            tables = state["pending"]
+            deleted_so_far = state.get("deleted", {})
+        else:
+            cutoff_date = (datetime.datetime.now() - datetime.timedelta(days=request_data.days_to_keep)).isoformat()
+            tables = request_data.tables
+        
+        # Tables finished by earlier calls of a resumed cleanup
+        results = {t: {"status": "done", "deleted": n} for t, n in deleted_so_far.items() if t not in tables}
+        pending = []
+        deadline = time.monotonic() + CLEANUP_MAX_SECONDS
 
-        return {
-            "status": "completed", 
+        allowed = []
+        for table in dict.fromkeys(tables):
+            if table not in CLEANUP_ALLOWED_TABLES:
+                results[table] = {"status": "skipped", "detail": "table not in allowed list"}
+            else:
+                allowed.append(table)
+
+        # Rows removed by each table's committed batches, readable after a cancel
+        progress = {table: {"deleted": 0} for table in allowed}
+
+        async def clean(table: str):
+            if request_data.dry_run:
+                return await count_older_than(supabase, table, cutoff_date)
+            return await delete_older_than(
+                supabase, table, cutoff_date,
+                batch_size=request_data.batch_size,
+                pause_ms=request_data.pause_ms,
+                deadline=deadline,
+                progress=progress[table],
+            )
+
+        # Tables are cleaned in parallel; the shared deadline stops them between batches,
+        # the per-table timeout cancels one stuck on a hung request
+        outcomes = await fan_out(allowed, clean, concurrency=CLEANUP_CONCURRENCY, timeout=CLEANUP_TABLE_TIMEOUT)
+        for table, outcome in outcomes.items():
+            if not outcome.ok:
+                # Batches committed before the timeout or error still count; resuming picks up the rest
+                total = deleted_so_far.get(table, 0) + progress[table]["deleted"]
+                results[table] = {"status": outcome.status, "deleted": total, "error": outcome.error}
+                if not request_data.dry_run:
+                    deleted_so_far[table] = total
+                    pending.append(table)
+            elif request_data.dry_run:
+                results[table] = {"status": "dry_run", "would_delete": outcome.value}
+            else:
+                deleted, finished = outcome.value
+                total = deleted_so_far.get(table, 0) + deleted
+                deleted_so_far[table] = total
+                results[table] = {"status": "done" if finished else "pending", "deleted": total}
+                if not finished:
+                    pending.append(table)
+            results[table]["seconds"] = outcome.seconds
+
+        response = {
+            "status": "dry_run" if request_data.dry_run else ("partial" if pending else "completed"),
             "cutoff_date": cutoff_date, 
             "details": results
         }
+        if pending and not request_data.dry_run:
+            response["resume_token"] = encode_resume_token(cutoff_date, pending, deleted_so_far)
+        return response
 
+    except HTTPException:
+        raise
     except Exception as e:
         # logger.error(f"Cleanup general error: {e}")
         raise HTTPException(status_code=500, detail=f"Cleanup process failed: {str(e)}")
 
 @router.get("/export")
 @limiter.limit("2/hour")
-def export_data(request: Request):
+async def export_data(
+    request: Request,
+    compress: bool = Query(False, description="gzip the NDJSON stream"),
+    since: Optional[str] = Query(None, description="Checkpoint token from a previous export; returns only changes since then"),
+    supabase: AsyncClient = Depends(get_async_supabase),
+):
     """
-    Exports core data as JSON for backup.
+    Streams a backup of the core tables as NDJSON (one record per line).
+    Tables are paged with keyset pagination on (created_at, id), so memory
+    stays constant and no rows are dropped whatever the table size.
+    The footer carries a checkpoint token; pass it as `since` for a delta export.
     """
-    try:
-        backup = {}
-        # Aligning with actual table names and preventing huge dumps
-        tables = ["gaming_sessions", "sales", "expenses", "clients", "products", "services_catalog"]
-        
-        for table in tables:
-            try:
-                # Fetch last 2000 records (increased from 1000)
-                response = supabase.table(table).select("*").order("created_at", desc=True).limit(2000).execute()
-                
-                if hasattr(response, 'error') and response.error:
-                    backup[table] = {"error": str(response.error)}
-                else:
-                    backup[table] = response.data
-            except Exception as table_err:
-                backup[table] = {"error": f"Table fetch failed: {str(table_err)}"}
-            
-        return {
-            "timestamp": datetime.datetime.now().isoformat(),
-            "data": backup
-        }
-    except Exception as e:
-        # logger.error(f"Export general error: {e}")
-        raise HTTPException(status_code=500, detail=f"Export failed: {str(e)}")
+    checkpoint = None
+    if since:
+        try:
+            checkpoint = decode_checkpoint(since)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid checkpoint: {e}")
+
+    kind = "delta" if checkpoint is not None else "backup"
+    stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+    stream = export_ndjson(supabase, EXPORT_TABLES, checkpoint=checkpoint)
+
+    if compress:
+        return StreamingResponse(
+            gzip_stream(stream),
+            media_type="application/gzip",
+            headers={"Content-Disposition": f'attachment; filename="{kind}-{stamp}.ndjson.gz"'},
+        )
+    return StreamingResponse(
+        stream,
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{kind}-{stamp}.ndjson"'},
+    )
 
 
 
@@ -131,7 +201,7 @@ class CreateStaffRequest(BaseModel):
 
 @router.post("/staff")
 @limiter.limit("10/minute")
-def create_staff_member(request: Request, body: CreateStaffRequest):
+async def create_staff_member(request: Request, body: CreateStaffRequest, supabase: AsyncClient = Depends(get_async_supabase)):
     request_data = body
     """
     Creates a new staff member:
@@ -159,7 +229,7 @@ def create_staff_member(request: Request, body: CreateStaffRequest):
         try:
             # create_user is the admin method
             # Reverting to dictionary attributes for better compatibility with this SDK version
-            user_response = supabase.auth.admin.create_user(attributes)
+            user_response = await supabase.auth.admin.create_user(attributes)
             user_id = user_response.user.id
         except Exception as auth_error:
             error_str = str(auth_error)
@@ -178,21 +248,22 @@ def create_staff_member(request: Request, body: CreateStaffRequest):
 
         # 2. Assign Role
         try:
-            supabase.table("user_roles").insert({
+            await supabase.table("user_roles").insert({
                 "user_id": user_id,
                 "role": request_data.role
             }).execute()
+            role_cache.invalidate(user_id)
         except Exception as role_error:
             # logger.error(f"Failed to assign role: {role_error}")
             # Clean up user if role assignment fails
             try:
-                supabase.auth.admin.delete_user(user_id)
+                await supabase.auth.admin.delete_user(user_id)
             except:
                 pass
             raise HTTPException(status_code=400, detail=f"Impossible d'assigner le rôle: {str(role_error)}")
 
         try:
-            supabase.table("profiles").upsert({
+            await supabase.table("profiles").upsert({
                 "id": user_id,
                 "email": request_data.email,
                 "full_name": request_data.full_name,
@@ -207,21 +278,28 @@ def create_staff_member(request: Request, body: CreateStaffRequest):
             
         # 4. Send Invitation Email
         # We import here to avoid circular dependencies if simple structure
-        from email_service import send_staff_invitation
+        from email_service import compose_staff_invitation, send_email_core
         
         email_sent = False
+        email_message_id = None
         if not request_data.skip_email:
-            email_sent = send_staff_invitation(
+            message = compose_staff_invitation(
                 email=request_data.email,
                 role=request_data.role,
                 password=request_data.password,
                 lang=request_data.lang
             )
+            try:
+                email_message_id = email_queue.enqueue(**message)
+                email_sent = True
+            except EmailQueueFull:
+                email_sent = await run_in_threadpool(send_email_core, **message)
         
         return {
             "status": "success", 
             "user_id": user_id, 
             "email_sent": email_sent,
+            "email_message_id": email_message_id,
             "message": "Staff member created and invited successfully"
         }
 
@@ -232,42 +310,15 @@ def create_staff_member(request: Request, body: CreateStaffRequest):
         raise HTTPException(status_code=500, detail=str(e))
 @router.post("/sync-profiles")
 @limiter.limit("5/minute")
-def sync_profiles(request: Request):
+async def sync_profiles(request: Request, supabase: AsyncClient = Depends(get_async_supabase)):
     """
     Force-syncs auth.users data to public.profiles.
-    Fixes 'Email non disponible' issues.
+    Fixes 'Email non disponible' issues. Walks every page of auth users and
+    only writes new or changed profiles, in bulk upserts.
     """
     try:
-        # 1. Fetch all users from Auth (using admin client)
-        # Note: list_users returns a UserList object with .users prop
-        all_users = supabase.auth.admin.list_users()
-        
-        synced_count = 0
-        errors = []
-
-        for user in all_users:
-            try:
-                # Extract metadata
-                user_meta = user.user_metadata or {}
-                full_name = user_meta.get("full_name", "Staff Member")
-                
-                # Upsert to profiles
-                supabase.table("profiles").upsert({
-                    "id": user.id,
-                    "full_name": full_name,
-                    "is_active": True,
-                    "updated_at": datetime.datetime.now().isoformat()
-                }).execute()
-                synced_count += 1
-            except Exception as u_err:
-                errors.append(f"Failed to sync {user.email}: {u_err}")
-        
-        return {
-            "status": "success",
-            "synced_count": synced_count,
-            "total_found": len(all_users),
-            "errors": errors
-        }
+        result = await sync_profiles_service(supabase)
+        return {"status": "success" if not result["errors"] else "partial", **result}
 
     except Exception as e:
         # logger.error(f"Sync profiles error: {e}")
@@ -276,7 +327,7 @@ def sync_profiles(request: Request):
 
 @router.delete("/staff/{user_id}")
 @limiter.limit("10/minute")
-def delete_staff_member(request: Request, user_id: str):
+async def delete_staff_member(request: Request, user_id: str, supabase: AsyncClient = Depends(get_async_supabase)):
     """
     Fully deletes a staff member:
     1. Removes from auth.users
@@ -287,7 +338,7 @@ def delete_staff_member(request: Request, user_id: str):
     try:
         # 1. Delete from auth.users (using admin API)
         try:
-            supabase.auth.admin.delete_user(user_id)
+            await supabase.auth.admin.delete_user(user_id)
         except Exception as auth_err:
             error_str = str(auth_err)
             # logger.error(f"Auth delete error: {error_str}")
@@ -296,14 +347,17 @@ def delete_staff_member(request: Request, user_id: str):
         
         # 2. Delete from user_roles
         try:
-            supabase.table("user_roles").delete().eq("user_id", user_id).execute()
+            await supabase.table("user_roles").delete().eq("user_id", user_id).execute()
         except Exception as role_err:
             # logger.error(f"Role delete error: {role_err}")
             pass
+        finally:
+            # Revoke cached admin access immediately, even if the delete partially failed
+            role_cache.invalidate(user_id)
         
         # 3. Delete from profiles
         try:
-            supabase.table("profiles").delete().eq("id", user_id).execute()
+            await supabase.table("profiles").delete().eq("id", user_id).execute()
         except Exception as profile_err:
             # logger.error(f"Profile delete error: {profile_err}")
             pass
@@ -318,3 +372,69 @@ def delete_staff_member(request: Request, user_id: str):
         # logger.error(f"Delete staff error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+
+@router.get("/role-cache")
+async def get_role_cache_stats(request: Request):
+    """Hit/miss counters for the require_admin role cache"""
+    return role_cache.stats()
+
+
+@router.get("/email-queue")
+async def get_email_queue_stats(request: Request):
+    """Email delivery queue depth, status counts, SMTP pool usage and dead letters"""
+    from email_service import smtp_pool
+    return {
+        **email_queue.stats(),
+        "smtp_pool": smtp_pool.stats(),
+        "dead_letter_items": list(email_queue.dead_letters),
+    }
+
+
+@router.get("/settings/cache")
+async def get_settings_cache_stats(request: Request):
+    """Version, size and age (seconds since the last refresh) of the store settings snapshot"""
+    return store_settings.stats()
+
+
+@router.post("/settings/refresh")
+@limiter.limit("30/minute")
+async def refresh_settings_cache(request: Request, supabase: AsyncClient = Depends(get_async_supabase)):
+    """Reloads the store settings snapshot now"""
+    await store_settings.refresh(supabase)
+    return store_settings.stats()
+
+
+class StatsBackfillRequest(BaseModel):
+    start: Optional[datetime.date] = None
+    end: Optional[datetime.date] = None
+    days_back: Optional[int] = Field(None, ge=1, le=366)  # re-run the last N days instead of start/end
+    chunk_days: int = Field(STATS_BACKFILL_CHUNK_DAYS, ge=1, le=31)
+
+
+@router.get("/stats/rollup")
+async def get_stats_rollup_status(request: Request):
+    """Change-feed marks, last pass and backfill progress of the daily_stats rollup worker"""
+    return stats_rollup.stats()
+
+
+@router.post("/stats/backfill", status_code=202)
+@limiter.limit("10/hour")
+async def backfill_daily_stats(request: Request, body: StatsBackfillRequest, supabase: AsyncClient = Depends(get_async_supabase)):
+    """
+    Rebuilds daily_stats for a date range in parallel chunks (idempotent).
+    Progress is reported by GET /api/admin/stats/rollup.
+    """
+    today = business_day()
+    if body.days_back:
+        start, end = today - datetime.timedelta(days=body.days_back), today
+    elif body.start:
+        start, end = body.start, min(body.end or today, today)
+    else:
+        raise HTTPException(status_code=400, detail="start or days_back is required")
+    if end < start:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+
+    try:
+        return stats_rollup.start_backfill(supabase, start, end, body.chunk_days)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
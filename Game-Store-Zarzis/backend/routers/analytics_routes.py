@@ -0,0 +1,53 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+from datetime import date, timedelta
+from typing import Optional
+from supabase import AsyncClient
+from utils.security import require_admin
+from utils.limiter import limiter
+from services.supabase_client import get_async_supabase
+from services.stats import business_day
+from services.analytics import REPORTS, get_report, analytics_cache
+
+router = APIRouter(
+    prefix="/api/admin/analytics",
+    tags=["Analytics"],
+    dependencies=[Depends(require_admin)]
+)
+
+MAX_RANGE_DAYS = 366
+DEFAULT_RANGE_DAYS = 30
+
+
+def _resolve_range(start: Optional[date], end: Optional[date]) -> tuple:
+    end = end or business_day()
+    start = start or end - timedelta(days=DEFAULT_RANGE_DAYS - 1)
+    if end < start:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+    if (end - start).days >= MAX_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"Range is limited to {MAX_RANGE_DAYS} days")
+    return start, end
+
+
+@router.get("/cache")
+async def get_analytics_cache_stats(request: Request):
+    """Hit/miss counters of the report cache"""
+    return analytics_cache.stats()
+
+
+@router.get("/{report}")
+@limiter.limit("60/minute")
+async def get_analytics_report(
+    request: Request,
+    report: str,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    supabase: AsyncClient = Depends(get_async_supabase)
+):
+    """
+    Owner reports over business days [start, end] (default: last 30 days):
+    revenue-per-console, utilization, cohorts, points-liability
+    """
+    if report not in REPORTS:
+        raise HTTPException(status_code=404, detail=f"Unknown report. Available: {', '.join(REPORTS)}")
+    start, end = _resolve_range(start, end)
+    return await get_report(supabase, report, start, end)
@@ -0,0 +1,82 @@
+import os
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from supabase import AsyncClient
+from utils.security import require_staff
+from utils.limiter import limiter
+from services.supabase_client import get_async_supabase
+from services.catalogue import catalogue, SECTIONS
+
+router = APIRouter(
+    prefix="/api/catalogue",
+    tags=["Catalogue"]
+)
+
+CATALOGUE_MAX_AGE = int(os.getenv("CATALOGUE_MAX_AGE", "0"))  # seconds browsers may reuse a response before revalidating
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison: a proxy may have stripped or added the W/ prefix
+    bare = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == bare for tag in if_none_match.split(","))
+
+
+async def _serve(request: Request, supabase: AsyncClient, names: tuple) -> Response:
+    headers = {
+        "Cache-Control": f"public, max-age={CATALOGUE_MAX_AGE}, must-revalidate",
+        "Vary": "Accept-Encoding",
+    }
+    if_none_match = request.headers.get("if-none-match", "")
+
+    # Revalidation of an unchanged catalogue is answered from memory, without loading or serializing
+    if if_none_match:
+        etag = await catalogue.etag(supabase, names)
+        if etag and _matches(if_none_match, etag):
+            catalogue.not_modified += 1
+            return Response(status_code=304, headers={**headers, "ETag": etag})
+
+    rendered = await catalogue.render(supabase, names)
+    headers["ETag"] = rendered.etag
+    if _matches(if_none_match, rendered.etag):
+        catalogue.not_modified += 1
+        return Response(status_code=304, headers=headers)
+
+    if rendered.gzip is not None and "gzip" in request.headers.get("accept-encoding", ""):
+        headers["Content-Encoding"] = "gzip"
+        return Response(content=rendered.gzip, media_type="application/json", headers=headers)
+    return Response(content=rendered.body, media_type="application/json", headers=headers)
+
+
+@router.get("")
+@limiter.limit("300/minute")
+async def get_catalogue(request: Request, supabase: AsyncClient = Depends(get_async_supabase)):
+    """
+    Public catalogue in one response: active products, services and pricing,
+    and all consoles. Supports ETag / If-None-Match and gzip.
+    """
+    return await _serve(request, supabase, tuple(SECTIONS))
+
+
+@router.get("/cache", dependencies=[Depends(require_staff)])
+async def get_catalogue_cache_stats():
+    """Versions, sizes and hit counters of the catalogue cache"""
+    return catalogue.stats()
+
+
+@router.post("/invalidate", dependencies=[Depends(require_staff)])
+async def invalidate_catalogue():
+    """Re-checks the catalogue versions on the next request (after editing products, pricing, ...)."""
+    catalogue.invalidate()
+    return {"status": "ok"}
+
+
+@router.get("/{section}")
+@limiter.limit("300/minute")
+async def get_catalogue_section(request: Request, section: str, supabase: AsyncClient = Depends(get_async_supabase)):
+    """One catalogue section as a JSON array: products, services, pricing or consoles"""
+    if section not in SECTIONS:
+        raise HTTPException(status_code=404, detail=f"Unknown section. Available: {', '.join(SECTIONS)}")
+    return await _serve(request, supabase, (section,))
@@ -9,6 +9,7 @@ from pydantic import BaseModel, EmailStr
 from typing import Optional
 import secrets
 from services.supabase_client import get_supabase
+from services.email_queue import email_queue
 from email_service import (
     send_booking_confirmation,
     send_contact_form_notification,
@@ -24,6 +25,15 @@ supabase = get_supabase()
 router = APIRouter(prefix="/email", tags=["Email"])
 
 
+@router.get("/status/{message_id}")
+async def api_email_status(message_id: str):
+    """Delivery status of a queued email (queued, sending, retrying, sent, dead)"""
+    status = email_queue.get_status(message_id)
+    if not status:
+        raise HTTPException(status_code=404, detail="Unknown message id")
+    return status
+
+
 class BookingConfirmationRequest(BaseModel):
     client_name: str
     client_email: EmailStr
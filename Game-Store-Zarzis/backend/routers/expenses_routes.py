@@ -1,17 +1,15 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query
 from pydantic import BaseModel
 from typing import Optional, List
-from datetime import datetime
+from datetime import date, datetime
 import os
-from services.supabase_client import get_supabase
+from services.supabase_client import get_async_supabase
+from services.expenses import list_expenses, EXPENSES_PAGE_SIZE, EXPENSES_MAX_PAGE_SIZE
 from utils.security import get_current_user
-from supabase import Client
+from supabase import AsyncClient
 
 router = APIRouter(prefix="/expenses", tags=["Expenses"])
 
-# Supabase setup
-supabase: Client = get_supabase()
-
 class ExpenseCreate(BaseModel):
     description: str
     amount: float
@@ -26,15 +24,34 @@ class ExpenseUpdate(BaseModel):
     date: Optional[str] = None
 
 @router.get("/")
-def get_expenses(user = Depends(get_current_user)):
+async def get_expenses(
+    limit: int = Query(EXPENSES_PAGE_SIZE, ge=1, le=EXPENSES_MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    start: Optional[date] = Query(None, description="First day included"),
+    end: Optional[date] = Query(None, description="Last day included"),
+    category: Optional[List[str]] = Query(None, description="Repeat to match several categories"),
+    fields: Optional[str] = Query(None, description="Comma-separated columns to return; id and date are always included"),
+    summary: bool = Query(False, description="Add totals per category and month over all matching expenses"),
+    user = Depends(get_current_user),
+    supabase: AsyncClient = Depends(get_async_supabase)
+):
+    """
+    One page of expenses, newest first. Pass `next_cursor` back as `cursor`
+    for the following page; it is null on the last one. Ask for the summary
+    with the first page only, it does not depend on the cursor.
+    """
+    if start and end and end < start:
+        raise HTTPException(status_code=400, detail="end must not be before start")
     try:
-        res = supabase.table("expenses").select("*").order("date", desc=True).execute()
-        return res.data
+        return await list_expenses(supabase, limit=limit, cursor=cursor, start=start, end=end,
+                                   categories=category, fields=fields, summary=summary)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/")
-def create_expense(expense: ExpenseCreate, user = Depends(get_current_user)):
+async def create_expense(expense: ExpenseCreate, user = Depends(get_current_user), supabase: AsyncClient = Depends(get_async_supabase)):
     try:
         data = expense.model_dump(exclude_unset=True)
         # If staff_id is required by DB but not provided by frontend yet, handle it or rely on DB default if nullable
@@ -64,7 +81,7 @@ def create_expense(expense: ExpenseCreate, user = Depends(get_current_user)):
         # Actually, best to just insert and let the frontend/backend contract hold. 
         # Frontend sends: description, amount, category, date.
         
-        res = supabase.table("expenses").insert(insert_data).execute()
+        res = await supabase.table("expenses").insert(insert_data).execute()
         return res.data[0]
     except Exception as e:
         # logger.error(f"Error creating expense: {e}")
@@ -72,9 +89,9 @@ def create_expense(expense: ExpenseCreate, user = Depends(get_current_user)):
         raise HTTPException(status_code=500, detail=f"Failed to create expense: {str(e)}")
 
 @router.delete("/{expense_id}")
-def delete_expense(expense_id: str, user = Depends(get_current_user)):
+async def delete_expense(expense_id: str, user = Depends(get_current_user), supabase: AsyncClient = Depends(get_async_supabase)):
     try:
-        res = supabase.table("expenses").delete().eq("id", expense_id).execute()
+        res = await supabase.table("expenses").delete().eq("id", expense_id).execute()
         return {"success": True}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
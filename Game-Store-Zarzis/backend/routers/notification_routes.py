@@ -0,0 +1,69 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+from pydantic import BaseModel, EmailStr
+from typing import Optional, List
+from supabase import AsyncClient
+from utils.security import require_admin
+from utils.limiter import limiter
+from services.supabase_client import get_async_supabase
+from services.bulk_email import start_bulk_job, get_job, iter_client_recipients
+
+router = APIRouter(
+    prefix="/api/notifications",
+    tags=["Notifications"],
+    dependencies=[Depends(require_admin)]
+)
+
+
+class BulkRecipient(BaseModel):
+    email: EmailStr
+    name: Optional[str] = ""
+
+
+class ClientFilter(BaseModel):
+    min_points: Optional[int] = None
+    min_total_spent: Optional[float] = None
+    created_after: Optional[str] = None
+    created_before: Optional[str] = None
+
+
+class BulkNotificationRequest(BaseModel):
+    subject: str
+    message: str
+    title: Optional[str] = "Notification"
+    lang: str = "fr"
+    recipients: Optional[List[BulkRecipient]] = None  # explicit list...
+    client_filter: Optional[ClientFilter] = None  # ...or clients streamed from the database
+
+
+async def _explicit_pages(recipients: List[BulkRecipient]):
+    yield [r.model_dump() for r in recipients]
+
+
+@router.post("/bulk", status_code=202)
+@limiter.limit("5/hour")
+async def send_bulk_notification(request: Request, body: BulkNotificationRequest, supabase: AsyncClient = Depends(get_async_supabase)):
+    """
+    Starts a bulk announcement job and returns its id immediately.
+    Progress is available at GET /api/notifications/bulk/{job_id}.
+    """
+    if body.recipients and body.client_filter:
+        raise HTTPException(status_code=400, detail="Provide either recipients or client_filter, not both")
+
+    if body.recipients:
+        pages = _explicit_pages(body.recipients)
+    elif body.client_filter is not None:
+        pages = iter_client_recipients(supabase, **body.client_filter.model_dump())
+    else:
+        raise HTTPException(status_code=400, detail="recipients or client_filter is required")
+
+    job = start_bulk_job(body.subject, body.message, body.title, body.lang, pages)
+    return {"status": "accepted", "job_id": job.id}
+
+
+@router.get("/bulk/{job_id}")
+async def get_bulk_notification_status(job_id: str):
+    """Progress counters of a bulk announcement job"""
+    job = get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Unknown job id")
+    return job.to_dict()
@@ -0,0 +1,119 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from pydantic import BaseModel, Field
+from typing import Optional, List, Literal
+from supabase import AsyncClient
+from utils.security import get_current_user, require_staff
+from utils.limiter import limiter
+from services.supabase_client import get_async_supabase
+from services.order_pipeline import order_pipeline, create_order, transition_orders, OrderError
+
+router = APIRouter(
+    prefix="/api/orders",
+    tags=["Orders"]
+)
+
+# Guests can order too; a valid token just links the order to the account
+optional_bearer = HTTPBearer(auto_error=False)
+
+
+class OrderItem(BaseModel):
+    product_id: str
+    quantity: int = Field(..., ge=1, le=100)
+
+
+class OrderCreateRequest(BaseModel):
+    client_name: str = Field(..., min_length=1, max_length=200)
+    client_phone: str = Field(..., min_length=4, max_length=30)
+    client_email: Optional[str] = Field(None, max_length=254)
+    delivery_address: Optional[str] = Field(None, max_length=500)
+    items: List[OrderItem] = Field(..., min_length=1, max_length=50)
+    delivery_method: Literal["pickup", "rapid_post", "local_delivery"] = "pickup"
+    payment_method: Literal["cash", "bank_transfer", "d17", "card"] = "cash"
+    payment_reference: Optional[str] = Field(None, max_length=200)
+    notes: Optional[str] = Field(None, max_length=1000)
+    idempotency_key: Optional[str] = Field(None, min_length=16, max_length=128)  # or the Idempotency-Key header
+
+
+class BulkStatusRequest(BaseModel):
+    order_ids: List[str] = Field(..., min_length=1, max_length=200)
+    status: Optional[Literal["processing", "completed", "cancelled"]] = None
+    payment_status: Optional[Literal["paid", "failed"]] = None
+    reason: Optional[str] = Field(None, max_length=500)  # stored as status_reason when cancelling
+
+
+def _public_order(order: dict) -> dict:
+    """Order as returned to the customer: digital content is only released by staff."""
+    items = [{k: v for k, v in item.items() if k != "digital_content"} for item in order.get("items") or []]
+    return {**order, "items": items}
+
+
+def _http_error(e: OrderError) -> HTTPException:
+    detail = {"message": e.detail, "product_id": e.product_id} if e.product_id else e.detail
+    return HTTPException(status_code=e.status_code, detail=detail)
+
+
+@router.post("", status_code=201)
+@limiter.limit("10/minute")
+async def place_order(
+    request: Request,
+    body: OrderCreateRequest,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_bearer),
+    supabase: AsyncClient = Depends(get_async_supabase)
+):
+    """
+    Places an online order. Lines are priced from the product catalogue, the
+    order is stored as pending and stock is reserved in the background.
+    Retries with the same idempotency key and the same order return the
+    original order; a key reused for a different order is rejected (422).
+    """
+    key = idempotency_key or body.idempotency_key
+    if not key or len(key) < 16:
+        raise HTTPException(status_code=400, detail="Idempotency-Key header of at least 16 characters is required")
+    if body.delivery_method != "pickup" and not body.delivery_address:
+        raise HTTPException(status_code=400, detail="A delivery address is required for delivery")
+
+    user_id = None
+    if credentials:
+        user_response = await get_current_user(credentials)
+        user_id = user_response.user.id
+
+    try:
+        order = await create_order(supabase, key, body.model_dump(exclude={"idempotency_key"}), user_id=user_id)
+    except OrderError as e:
+        raise _http_error(e)
+    return _public_order(order)
+
+
+@router.get("/pipeline", dependencies=[Depends(require_staff)])
+async def pipeline_stats():
+    """Queue depth and outcome counters of the order workers."""
+    return order_pipeline.stats()
+
+
+@router.post("/bulk-status", dependencies=[Depends(require_staff)])
+@limiter.limit("60/minute")
+async def bulk_status(
+    request: Request,
+    body: BulkStatusRequest,
+    supabase: AsyncClient = Depends(get_async_supabase)
+):
+    """
+    Moves up to 200 orders to a new status and/or payment status in one
+    transaction. Orders whose current state does not allow the move are
+    listed under "skipped" with the reason; the others are updated.
+    """
+    try:
+        result = await transition_orders(supabase, list(dict.fromkeys(body.order_ids)), body.status, body.payment_status, body.reason)
+    except OrderError as e:
+        raise _http_error(e)
+    return {**result, "updated_count": len(result["updated"]), "skipped_count": len(result["skipped"])}
+
+
+@router.get("/{order_id}", dependencies=[Depends(require_staff)])
+async def get_order(order_id: str, supabase: AsyncClient = Depends(get_async_supabase)):
+    res = await supabase.table("orders").select("*").eq("id", order_id).limit(1).execute()
+    if not res.data:
+        raise HTTPException(status_code=404, detail="Order not found")
+    return res.data[0]
@@ -0,0 +1,60 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
+from pydantic import BaseModel, Field
+from typing import Optional, List
+from supabase import AsyncClient
+from utils.security import require_staff
+from utils.limiter import limiter
+from services.supabase_client import get_async_supabase
+from services.checkout import checkout, CheckoutError
+
+router = APIRouter(
+    prefix="/api/sales",
+    tags=["Sales"],
+    dependencies=[Depends(require_staff)]
+)
+
+
+class BasketItem(BaseModel):
+    product_id: str
+    quantity: int = Field(..., ge=1, le=1000)
+
+
+class CheckoutRequest(BaseModel):
+    items: List[BasketItem] = Field(..., min_length=1, max_length=100)
+    client_id: Optional[str] = None
+    payment_method: str = "cash"  # cash, points, mixed
+    points_used: int = Field(0, ge=0)
+    notes: Optional[str] = None
+    idempotency_key: Optional[str] = Field(None, min_length=8, max_length=128)  # or the Idempotency-Key header
+
+
+@router.post("/checkout")
+@limiter.limit("120/minute")
+async def checkout_basket(
+    request: Request,
+    body: CheckoutRequest,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    user=Depends(require_staff),
+    supabase: AsyncClient = Depends(get_async_supabase)
+):
+    """
+    Sells a whole basket atomically: stock is checked and decremented, one
+    sale is recorded per product and points are applied in one transaction.
+    Retries with the same idempotency key return the original result.
+    """
+    key = idempotency_key or body.idempotency_key
+    if not key:
+        raise HTTPException(status_code=400, detail="Idempotency-Key header is required")
+
+    try:
+        return await checkout(
+            supabase, key, user.id,
+            items=[item.model_dump() for item in body.items],
+            client_id=body.client_id,
+            payment_method=body.payment_method,
+            points_used=body.points_used,
+            notes=body.notes,
+        )
+    except CheckoutError as e:
+        detail = {"message": e.detail, "product_id": e.product_id} if e.product_id else e.detail
+        raise HTTPException(status_code=e.status_code, detail=detail)
@@ -0,0 +1,116 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from typing import Optional
+from supabase import AsyncClient
+import asyncio
+from utils.security import require_staff
+from services.supabase_client import get_async_supabase
+from services.session_state import session_index, sse_event, SessionStateError
+
+router = APIRouter(
+    prefix="/api/sessions",
+    tags=["Sessions"],
+    dependencies=[Depends(require_staff)]
+)
+
+SSE_KEEPALIVE_SECONDS = 15
+
+
+class StartSessionRequest(BaseModel):
+    console_id: str
+    pricing_id: str
+    session_type: str
+    client_id: Optional[str] = None
+    is_free_game: bool = False
+    notes: Optional[str] = None
+
+
+class EndSessionRequest(BaseModel):
+    total_amount: float = Field(..., ge=0)
+    games_played: int = Field(0, ge=0)
+    extra_time_minutes: int = Field(0, ge=0)
+    extra_amount: float = Field(0, ge=0)
+    points_earned: int = Field(0, ge=0)
+    payment_method: str = "cash"
+    points_used: int = Field(0, ge=0)
+    client_id: Optional[str] = None
+
+
+class AddGamesRequest(BaseModel):
+    games_played: int = Field(..., ge=0)
+    extra_time_minutes: int = Field(0, ge=0)
+    extra_amount: float = Field(0, ge=0)
+
+
+@router.get("/active")
+async def get_active_sessions(supabase: AsyncClient = Depends(get_async_supabase)):
+    """Active sessions with console, client and pricing, served from the in-memory index"""
+    await session_index.ensure_loaded(supabase)
+    return session_index.active_sessions()
+
+
+@router.get("/occupancy")
+async def get_occupancy(supabase: AsyncClient = Depends(get_async_supabase)):
+    """Console id -> active session summary"""
+    await session_index.ensure_loaded(supabase)
+    return session_index.occupancy()
+
+
+@router.post("/start")
+async def start_session(body: StartSessionRequest, user=Depends(require_staff), supabase: AsyncClient = Depends(get_async_supabase)):
+    """Creates a session and marks its console in use (one transaction)"""
+    await session_index.ensure_loaded(supabase)
+    try:
+        return await session_index.start(supabase, staff_id=user.id, **body.model_dump())
+    except SessionStateError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+
+@router.post("/{session_id}/end")
+async def end_session(session_id: str, body: EndSessionRequest, supabase: AsyncClient = Depends(get_async_supabase)):
+    """Completes a session, frees its console and updates client totals (one transaction)"""
+    await session_index.ensure_loaded(supabase)
+    try:
+        return await session_index.end(supabase, session_id, **body.model_dump())
+    except SessionStateError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+
+@router.post("/{session_id}/games")
+async def add_games(session_id: str, body: AddGamesRequest, supabase: AsyncClient = Depends(get_async_supabase)):
+    """Updates the game count and extra time of an active session"""
+    await session_index.ensure_loaded(supabase)
+    try:
+        return await session_index.add_games(supabase, session_id, **body.model_dump())
+    except SessionStateError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+
+@router.get("/events")
+async def session_events(request: Request, supabase: AsyncClient = Depends(get_async_supabase)):
+    """
+    Server-Sent Events stream of occupancy changes. Starts with a 'snapshot'
+    event; a 'resync' event means the client fell behind and should reload.
+    """
+    await session_index.ensure_loaded(supabase)
+    queue = session_index.subscribe()
+
+    async def stream():
+        try:
+            yield sse_event({"type": "snapshot", **session_index.occupancy()})
+            while not await request.is_disconnected():
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield sse_event(message)
+        finally:
+            session_index.unsubscribe(queue)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,55 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from datetime import date, timedelta
+from typing import Optional
+from supabase import AsyncClient
+from utils.security import require_staff
+from services.supabase_client import get_async_supabase
+from services.stats import business_day, get_range_stats, today_stats
+
+router = APIRouter(
+    prefix="/api/stats",
+    tags=["Statistics"],
+    dependencies=[Depends(require_staff)]
+)
+
+MAX_RANGE_DAYS = 366
+
+
+@router.get("/today")
+async def get_today_stats(supabase: AsyncClient = Depends(get_async_supabase)):
+    """Live totals of the current business day (cached for a few seconds)"""
+    day, stats, age = await today_stats.get(supabase)
+    return {"date": day.isoformat(), **stats, "age_seconds": age}
+
+
+@router.get("/range")
+async def get_stats_range(
+    start: date,
+    end: Optional[date] = None,
+    include_days: bool = False,
+    supabase: AsyncClient = Depends(get_async_supabase)
+):
+    """Totals over business days [start, end], optionally with one entry per day"""
+    end = end or business_day()
+    if end < start:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+    if (end - start).days >= MAX_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"Range is limited to {MAX_RANGE_DAYS} days")
+    return await get_range_stats(supabase, start, end, include_days=include_days)
+
+
+@router.get("/monthly")
+async def get_monthly_stats(
+    year: Optional[int] = Query(None, ge=2000, le=2100),
+    month: Optional[int] = Query(None, ge=1, le=12),
+    include_days: bool = False,
+    supabase: AsyncClient = Depends(get_async_supabase)
+):
+    """Totals of a calendar month (defaults to the current one)"""
+    today = business_day()
+    start = date(year or today.year, month or today.month, 1)
+    next_month = (start + timedelta(days=32)).replace(day=1)
+    end = min(next_month - timedelta(days=1), today)
+    if end < start:
+        raise HTTPException(status_code=400, detail="Month is in the future")
+    return await get_range_stats(supabase, start, end, include_days=include_days)
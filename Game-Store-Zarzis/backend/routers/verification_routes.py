@@ -1,24 +1,21 @@
 from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel, EmailStr
 from typing import Optional
-from datetime import datetime, timedelta
 import random
 import string
-from services.supabase_client import get_supabase
-from supabase import Client
+from services.supabase_client import get_async_supabase
+from supabase import AsyncClient
+from starlette.concurrency import run_in_threadpool
 import os
 from services.sms_service import sms_service
+from services.email_queue import email_queue, EmailQueueFull
+from services.store_settings import store_settings
+from services.otp_store import otp_store, OTP_TTL, OTP_MAX_ATTEMPTS
 # Need to import email sending logic, currently in email_routes but should be in a service
 # I'll modify email_service.py briefly to export a simple send_otp function or use existing one
 
 router = APIRouter(prefix="/verify", tags=["Verification"])
 
-# Supabase setup for backend
-supabase: Client = get_supabase()
-
-class TIMEOUTS:
-    OTP_EXPIRY_MINUTES = 10
-
 class SendCodeRequest(BaseModel):
     identifier: str # Email or Phone
     type: str # 'email' or 'sms'
@@ -36,31 +33,22 @@ from fastapi import Request
 
 @router.post("/send")
 @limiter.limit("3/minute")
-def send_verification_code(request: Request, body: SendCodeRequest):
+async def send_verification_code(request: Request, body: SendCodeRequest, supabase: AsyncClient = Depends(get_async_supabase)):
     # Map body to original logic args
     request_data = body
     code = generate_otp()
-    expires_at = (datetime.utcnow() + timedelta(minutes=TIMEOUTS.OTP_EXPIRY_MINUTES)).isoformat()
-    
-    # Store in DB
+
+    # Store the code (replaces any previous one, expires after OTP_TTL)
     try:
-        data = {
-            "identifier": request_data.identifier,
-            "code": code,
-            "expires_at": expires_at,
-            "is_verified": False
-        }
-        res = supabase.table("verification_codes").insert(data).execute()
+        await otp_store.save(request_data.identifier, code, OTP_TTL)
+        await otp_store.reset_attempts(request_data.identifier)
     except Exception as e:
         # logger.error(f"Error storing OTP: {e}")
         raise HTTPException(status_code=500, detail="Database error")
 
-    # Check global SMS setting
-    try:
-        settings_res = supabase.table("store_settings").select("value").eq("key", "sms_enabled").single().execute()
-        sms_enabled = settings_res.data.get("value", True) if settings_res.data else True
-    except Exception:
-        sms_enabled = True # Default to True if error
+    # Check global SMS setting (in-memory settings snapshot, defaults to enabled)
+    settings = await store_settings.ensure_fresh(supabase)
+    sms_enabled = settings.get_bool("sms_enabled", True)
 
     effective_type = request_data.type
     if effective_type == 'sms' and not sms_enabled:
@@ -75,46 +63,46 @@ def send_verification_code(request: Request, body: SendCodeRequest):
             )
 
     sent = False
+    message_id = None
     if effective_type == 'sms':
         if not sms_enabled:
             raise HTTPException(status_code=400, detail="SMS verification is currently disabled. Please use email.")
-        sent = sms_service.send_sms(request_data.identifier, f"Your Game Store Zarzis verification code is: {code}")
+        sent = await run_in_threadpool(sms_service.send_sms, request_data.identifier, f"Your Game Store Zarzis verification code is: {code}")
 
     elif effective_type == 'email':
-        from email_service import send_otp_email_alternative
-        sent = send_otp_email_alternative(request_data.identifier, code, lang=request_data.lang or "fr")
+        from email_service import compose_otp_email, send_email_core
+        message = compose_otp_email(request_data.identifier, code, lang=request_data.lang or "fr")
+        try:
+            # Delivered in the background by the email worker pool
+            message_id = email_queue.enqueue(**message)
+            sent = True
+        except EmailQueueFull:
+            sent = await run_in_threadpool(send_email_core, **message)
     
     if sent:
-        return {"success": True, "message": "Verification code sent"}
+        return {"success": True, "message": "Verification code sent", "message_id": message_id}
     else:
         raise HTTPException(status_code=500, detail="Failed to send verification code")
 
 @router.post("/check")
 @limiter.limit("5/minute")
-def check_verification_code(request: Request, body: VerifyCodeRequest):
+async def check_verification_code(request: Request, body: VerifyCodeRequest):
     request_data = body
     try:
-        # Check for valid, non-expired, matching code
-        res = supabase.table("verification_codes")\
-            .select("*")\
-            .eq("identifier", request_data.identifier)\
-            .eq("code", request_data.code)\
-            .eq("is_verified", False)\
-            .gt("expires_at", datetime.utcnow().isoformat())\
-            .order("created_at", desc=True)\
-            .limit(1)\
-            .execute()
-            
-        if len(res.data) > 0:
-            # Mark as verified
-            otp_id = res.data[0]['id']
-            supabase.table("verification_codes").update({"is_verified": True}).eq("id", otp_id).execute()
+        # Counted before the comparison so concurrent guesses cannot slip past the limit
+        attempts = await otp_store.register_attempt(request_data.identifier, OTP_TTL)
+        if attempts > OTP_MAX_ATTEMPTS:
+            await otp_store.discard(request_data.identifier)
+            raise HTTPException(status_code=429, detail="Too many attempts. Please request a new code.")
+
+        # Compare-and-delete: a matching, unexpired code is accepted exactly once
+        if await otp_store.consume(request_data.identifier, request_data.code):
+            await otp_store.reset_attempts(request_data.identifier)
             return {"success": True, "message": "Verification successful"}
-        else:
-            raise HTTPException(status_code=400, detail="Invalid or expired code")
-            
+        raise HTTPException(status_code=400, detail="Invalid or expired code")
+
     except HTTPException:
-        raise  # Re-raise 400 "Invalid or expired code" as-is
+        raise  # Re-raise 400 / 429 as-is
     except Exception as e:
         # logger.error(f"Error verifying OTP: {e}")
         raise HTTPException(status_code=500, detail="Verification failed")
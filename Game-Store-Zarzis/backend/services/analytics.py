@@ -0,0 +1,365 @@
+"""
+Owner Analytics
+
+Pulls the needed columns of gaming_sessions, sales, clients and
+points_transactions in keyset-paginated batches straight into column
+arrays, then computes each report with vectorized pandas/NumPy group-bys
+in a worker thread (the event loop never runs the number crunching).
+
+Reports cover business days [start, end] (see services.stats) and are
+cached per (report, start, end): ranges that are fully closed rarely
+change and are kept much longer than ranges that include today.
+"""
+
+import os
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from datetime import date, datetime, timezone
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from services.stats import STATS_TIMEZONE, STATS_DAY_START_HOUR, business_day, day_bounds
+from services.table_export import keyset_filter
+
+logger = logging.getLogger(__name__)
+
+ANALYTICS_PAGE_SIZE = int(os.getenv("ANALYTICS_PAGE_SIZE", "2000"))
+ANALYTICS_CACHE_TTL = float(os.getenv("ANALYTICS_CACHE_TTL", "300"))  # seconds, ranges including today
+ANALYTICS_CLOSED_CACHE_TTL = float(os.getenv("ANALYTICS_CLOSED_CACHE_TTL", "86400"))  # seconds, past ranges
+ANALYTICS_CACHE_SIZE = int(os.getenv("ANALYTICS_CACHE_SIZE", "128"))
+
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+HOUR_NS = 3_600_000_000_000
+
+
+# ---------------------------------------------------------------------------
+# Columnar loading
+# ---------------------------------------------------------------------------
+
+async def fetch_columns(supabase, table: str, columns: list, start: Optional[str] = None, end: Optional[str] = None,
+                        time_column: str = "created_at", page_size: int = ANALYTICS_PAGE_SIZE) -> pd.DataFrame:
+    """
+    Loads `columns` of rows with time_column in [start, end) into a DataFrame.
+    Pages are appended column by column, so no per-row dicts are kept around.
+    """
+    columns = list(dict.fromkeys(["id", time_column, *columns]))
+    data = {column: [] for column in columns}
+    cursor = None
+    while True:
+        query = supabase.table(table).select(", ".join(columns))
+        if start:
+            query = query.gte(time_column, start)
+        if end:
+            query = query.lt(time_column, end)
+        if cursor:
+            query = query.or_(keyset_filter(time_column, *cursor))
+        res = await query.order(time_column).order("id").limit(page_size).execute()
+
+        rows = res.data or []
+        for column in columns:
+            data[column].extend(row.get(column) for row in rows)
+        if len(rows) < page_size:
+            return pd.DataFrame(data)
+        cursor = (rows[-1][time_column], rows[-1]["id"])
+
+
+def _timestamps(series: pd.Series) -> pd.Series:
+    return pd.to_datetime(series, utc=True, format="ISO8601")
+
+
+def _numbers(series: pd.Series) -> pd.Series:
+    return pd.to_numeric(series, errors="coerce").fillna(0.0)
+
+
+def _business_dates(timestamps: pd.Series) -> pd.Series:
+    """Business day of each timestamp (local time shifted by the rollover hour)."""
+    return (timestamps.dt.tz_convert(STATS_TIMEZONE) - pd.Timedelta(hours=STATS_DAY_START_HOUR)).dt.date
+
+
+def _month_index(timestamps: pd.Series) -> np.ndarray:
+    local = timestamps.dt.tz_convert(STATS_TIMEZONE)
+    return (local.dt.year * 12 + local.dt.month - 1).to_numpy()
+
+
+def _month_label(index: int) -> str:
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+# ---------------------------------------------------------------------------
+# Reports (pure functions: DataFrames in, JSON-ready dicts out)
+# ---------------------------------------------------------------------------
+
+def revenue_per_console(sessions: pd.DataFrame, consoles: pd.DataFrame) -> dict:
+    """Revenue, played hours and revenue per played hour of each console."""
+    done = sessions[(sessions["status"] == "completed") & sessions["end_time"].notna()]
+    if done.empty:
+        return {"consoles": [], "total_revenue": 0.0, "total_hours": 0.0}
+
+    hours = ((_timestamps(done["end_time"]) - _timestamps(done["start_time"])).dt.total_seconds() / 3600).clip(lower=0)
+    grouped = done.assign(hours=hours, revenue=_numbers(done["total_amount"])).groupby("console_id").agg(
+        sessions=("id", "size"), hours=("hours", "sum"), revenue=("revenue", "sum"),
+    )
+    grouped["revenue_per_hour"] = grouped["revenue"] / grouped["hours"].where(grouped["hours"] > 0)
+    grouped = grouped.join(consoles.set_index("id")[["name", "station_number", "console_type"]], how="left")
+    grouped = grouped.sort_values("revenue", ascending=False).round({"hours": 2, "revenue": 3, "revenue_per_hour": 3})
+
+    return {
+        "consoles": [
+            {
+                "console_id": console_id,
+                "name": row["name"] if pd.notna(row["name"]) else None,
+                "station_number": int(row["station_number"]) if pd.notna(row["station_number"]) else None,
+                "console_type": row["console_type"] if pd.notna(row["console_type"]) else None,
+                "sessions": int(row["sessions"]),
+                "hours": float(row["hours"]),
+                "revenue": float(row["revenue"]),
+                "revenue_per_hour": float(row["revenue_per_hour"]) if pd.notna(row["revenue_per_hour"]) else None,
+            }
+            for console_id, row in grouped.iterrows()
+        ],
+        "total_revenue": round(float(grouped["revenue"].sum()), 3),
+        "total_hours": round(float(grouped["hours"].sum()), 2),
+    }
+
+
+def utilization_heatmap(sessions: pd.DataFrame, console_count: int, range_start: datetime, range_end: datetime,
+                        now: Optional[datetime] = None) -> dict:
+    """
+    Share of console capacity in use per (weekday, local hour). Every session
+    is split into the hour buckets it overlaps with NumPy repeat/arange, so
+    the cost is linear in session-hours with no Python loop per session.
+    """
+    start_ns = pd.Timestamp(range_start).value
+    end_ns = pd.Timestamp(min(range_end, now or datetime.now(timezone.utc))).value
+
+    # Capacity: how many times each (weekday, hour) occurs in the range, times consoles
+    hours = pd.date_range(pd.Timestamp(start_ns, tz="UTC"), pd.Timestamp(end_ns, tz="UTC"), freq="h", inclusive="left")
+    hours_local = hours.tz_convert(STATS_TIMEZONE)
+    capacity = np.zeros((7, 24))
+    np.add.at(capacity, (hours_local.weekday, hours_local.hour), 60.0 * max(console_count, 0))
+
+    occupied = np.zeros((7, 24))
+    if not sessions.empty:
+        s = _timestamps(sessions["start_time"]).to_numpy(dtype="datetime64[ns]").astype(np.int64)
+        e_series = _timestamps(sessions["end_time"]) if "end_time" in sessions else pd.Series(pd.NaT, index=sessions.index)
+        e = e_series.to_numpy(dtype="datetime64[ns]").astype(np.int64)
+        e = np.where(e_series.isna().to_numpy(), end_ns, e)  # active sessions run until now
+        s, e = np.clip(s, start_ns, end_ns), np.clip(e, start_ns, end_ns)
+        keep = e > s
+        s, e = s[keep], e[keep]
+
+        if len(s):
+            # Hour buckets are aligned in UTC, which matches local hours for whole-hour offsets
+            first = s - (s % HOUR_NS)
+            counts = ((e - first + HOUR_NS - 1) // HOUR_NS).astype(np.int64)
+            idx = np.repeat(np.arange(len(s)), counts)
+            offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+            bucket = first[idx] + offsets * HOUR_NS
+            minutes = (np.minimum(e[idx], bucket + HOUR_NS) - np.maximum(s[idx], bucket)) / 60e9
+
+            local = pd.DatetimeIndex(bucket, tz="UTC").tz_convert(STATS_TIMEZONE)
+            np.add.at(occupied, (local.weekday, local.hour), minutes)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        share = np.where(capacity > 0, occupied / capacity, np.nan)
+
+    return {
+        "weekdays": WEEKDAYS,
+        "hours": list(range(24)),
+        "console_count": console_count,
+        "utilization": [[None if np.isnan(v) else round(float(v), 4) for v in row] for row in share],
+        "occupied_hours": [[round(float(v) / 60, 2) for v in row] for row in occupied],
+        "average_utilization": round(float(occupied.sum() / capacity.sum()), 4) if capacity.sum() else None,
+    }
+
+
+def retention_cohorts(clients: pd.DataFrame, activity: pd.DataFrame) -> dict:
+    """
+    Monthly signup cohorts and the share of each cohort active (a gaming
+    session or purchase) in each following month.
+    """
+    if clients.empty:
+        return {"cohorts": []}
+
+    cohort = pd.Series(_month_index(_timestamps(clients["created_at"])), index=clients["id"].to_numpy())
+    sizes = cohort.value_counts().sort_index()
+
+    offsets = pd.DataFrame(columns=["cohort", "offset", "client_id"])
+    if not activity.empty:
+        active = activity[activity["client_id"].isin(cohort.index)]
+        if not active.empty:
+            client_cohort = cohort.loc[active["client_id"].to_numpy()].to_numpy()
+            offsets = pd.DataFrame({
+                "cohort": client_cohort,
+                "offset": _month_index(_timestamps(active["created_at"])) - client_cohort,
+                "client_id": active["client_id"].to_numpy(),
+            })
+            offsets = offsets[offsets["offset"] >= 0]
+
+    retained = offsets.groupby(["cohort", "offset"])["client_id"].nunique()
+    cohorts = []
+    for month, size in sizes.items():
+        by_offset = retained.loc[month] if month in retained.index.get_level_values(0) else pd.Series(dtype=float)
+        width = int(by_offset.index.max()) + 1 if len(by_offset) else 0
+        counts = by_offset.reindex(range(width), fill_value=0).to_numpy()
+        cohorts.append({
+            "cohort": _month_label(int(month)),
+            "clients": int(size),
+            "active": [int(c) for c in counts],
+            "retention": [round(float(c) / size, 4) for c in counts],
+        })
+    return {"cohorts": cohorts}
+
+
+def points_liability(transactions: pd.DataFrame, points_now: int, start_day: date, end_day: date) -> dict:
+    """
+    Outstanding loyalty points at the end of each business day. Walks back
+    from today's balance: liability(d) = points_now - net points issued after d.
+    """
+    days = pd.date_range(start_day, max(end_day, business_day()), freq="D").date
+    net = pd.Series(0.0, index=days)
+    issued = pd.Series(0.0, index=days)
+    redeemed = pd.Series(0.0, index=days)
+
+    if not transactions.empty:
+        day = _business_dates(_timestamps(transactions["created_at"]))
+        amount = _numbers(transactions["amount"])
+        grouped = pd.DataFrame({"day": day, "issued": amount.clip(lower=0), "redeemed": -amount.clip(upper=0), "net": amount})\
+            .groupby("day")[["issued", "redeemed", "net"]].sum()
+        net = net.add(grouped["net"], fill_value=0)
+        issued = issued.add(grouped["issued"], fill_value=0)
+        redeemed = redeemed.add(grouped["redeemed"], fill_value=0)
+
+    # Net issued strictly after each day, via a reversed cumulative sum
+    after = net[::-1].cumsum()[::-1].shift(-1, fill_value=0.0)
+    liability = points_now - after
+
+    series = [
+        {"date": d.isoformat(), "liability": int(liability[d]), "issued": int(issued[d]), "redeemed": int(redeemed[d])}
+        for d in days if start_day <= d <= end_day
+    ]
+    return {"points_now": int(points_now), "days": series}
+
+
+# ---------------------------------------------------------------------------
+# Loading + caching
+# ---------------------------------------------------------------------------
+
+class AnalyticsCache:
+    """LRU of report results keyed by (report, start, end); concurrent misses share one computation."""
+
+    def __init__(self, maxsize: int = ANALYTICS_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._inflight: dict = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def get_or_compute(self, key: tuple, ttl: float, compute) -> dict:
+        entry = self._data.get(key)
+        if entry and entry[0] > time.monotonic():
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+        if key in self._inflight:
+            self.hits += 1
+            return await asyncio.shield(self._inflight[key])
+
+        self.misses += 1
+        future = asyncio.ensure_future(compute())
+        self._inflight[key] = future
+        try:
+            result = await future
+        finally:
+            self._inflight.pop(key, None)
+        self._data[key] = (time.monotonic() + ttl, result)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+        return result
+
+    def clear(self):
+        self._data.clear()
+
+    def stats(self) -> dict:
+        return {"size": len(self._data), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+
+async def _sessions(supabase, range_start: str, range_end: str) -> pd.DataFrame:
+    return await fetch_columns(
+        supabase, "gaming_sessions", ["console_id", "client_id", "start_time", "end_time", "status", "total_amount"],
+        range_start, range_end,
+    )
+
+
+async def _build_report(supabase, report: str, start_day: date, end_day: date) -> dict:
+    range_start, _ = day_bounds(start_day)
+    _, range_end = day_bounds(end_day)
+
+    if report == "revenue-per-console":
+        sessions, consoles = await asyncio.gather(
+            _sessions(supabase, range_start, range_end),
+            fetch_columns(supabase, "consoles", ["name", "station_number", "console_type"]),
+        )
+        result = await asyncio.to_thread(revenue_per_console, sessions, consoles)
+
+    elif report == "utilization":
+        sessions, consoles = await asyncio.gather(
+            _sessions(supabase, range_start, range_end),
+            fetch_columns(supabase, "consoles", ["status"]),
+        )
+        result = await asyncio.to_thread(
+            utilization_heatmap, sessions, len(consoles),
+            datetime.fromisoformat(range_start), datetime.fromisoformat(range_end),
+        )
+
+    elif report == "cohorts":
+        clients, sessions, sales = await asyncio.gather(
+            fetch_columns(supabase, "clients", [], range_start, range_end),
+            fetch_columns(supabase, "gaming_sessions", ["client_id"], range_start, None),
+            fetch_columns(supabase, "sales", ["client_id"], range_start, None),
+        )
+        activity = pd.concat([sessions[["client_id", "created_at"]], sales[["client_id", "created_at"]]], ignore_index=True)
+        result = await asyncio.to_thread(retention_cohorts, clients, activity.dropna(subset=["client_id"]))
+
+    elif report == "points-liability":
+        # Everything after the range start is needed to walk back from today's balances
+        transactions, clients = await asyncio.gather(
+            fetch_columns(supabase, "points_transactions", ["amount"], range_start, None),
+            fetch_columns(supabase, "clients", ["points"]),
+        )
+        points_now = int(_numbers(clients["points"]).sum()) if not clients.empty else 0
+        result = await asyncio.to_thread(points_liability, transactions, points_now, start_day, end_day)
+
+    else:
+        raise ValueError(f"Unknown report: {report}")
+
+    return {
+        "report": report,
+        "start": start_day.isoformat(),
+        "end": end_day.isoformat(),
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        **result,
+    }
+
+
+REPORTS = ("revenue-per-console", "utilization", "cohorts", "points-liability")
+# Reports that only read rows inside the range; the others follow activity up to today
+RANGE_BOUNDED_REPORTS = ("revenue-per-console", "utilization")
+
+
+async def get_report(supabase, report: str, start_day: date, end_day: date) -> dict:
+    closed = end_day < business_day() and report in RANGE_BOUNDED_REPORTS
+    ttl = ANALYTICS_CLOSED_CACHE_TTL if closed else ANALYTICS_CACHE_TTL
+    return await analytics_cache.get_or_compute(
+        (report, start_day, end_day), ttl, lambda: _build_report(supabase, report, start_day, end_day)
+    )
+
+
+# Singleton instance
+analytics_cache = AnalyticsCache()
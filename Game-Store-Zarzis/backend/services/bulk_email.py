@@ -0,0 +1,222 @@
+"""
+Bulk Email Jobs
+
+Sends one announcement to many recipients in the background: an explicit
+recipient list, or `clients` rows streamed from the database page by page.
+Delivery goes through Resend's batch API when configured (up to 100 emails
+per call), otherwise through the pooled SMTP transport. Each provider has
+its own rate shaping. Jobs are tracked in memory with progress counters.
+"""
+
+import os
+import time
+import uuid
+import asyncio
+import logging
+from collections import OrderedDict
+from datetime import datetime
+from typing import AsyncIterator, Optional
+
+import resend
+
+logger = logging.getLogger(__name__)
+
+BULK_PAGE_SIZE = int(os.getenv("BULK_EMAIL_PAGE_SIZE", "500"))
+RESEND_BATCH_SIZE = 100  # Resend batch API limit
+RESEND_BATCH_RATE = float(os.getenv("RESEND_BATCH_RATE", "2"))  # batch calls per second
+SMTP_SEND_RATE = float(os.getenv("SMTP_SEND_RATE", "5"))  # messages per second
+BULK_JOB_RETENTION = 100
+
+
+class AsyncRateLimiter:
+    """Token bucket: `rate` tokens per second, bursting up to `burst`."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, tokens: int = 1):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+
+
+class BulkEmailJob:
+    def __init__(self, subject: str, message: str, title: str, lang: str):
+        self.id = str(uuid.uuid4())
+        self.subject = subject
+        self.message = message
+        self.title = title
+        self.lang = lang
+        self.provider: Optional[str] = None
+        self.status = "pending"  # pending, running, completed, failed
+        self.total = 0
+        self.sent = 0
+        self.failed = 0
+        self.skipped = 0
+        self.errors: list = []
+        self.created_at = datetime.utcnow().isoformat()
+        self.finished_at: Optional[str] = None
+        self.task: Optional[asyncio.Task] = None
+
+    def record_error(self, error: str):
+        # Keep the first few errors only; counters carry the totals
+        if len(self.errors) < 20:
+            self.errors.append(error)
+
+    def to_dict(self) -> dict:
+        processed = self.sent + self.failed + self.skipped
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "provider": self.provider,
+            "total": self.total,
+            "sent": self.sent,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "processed": processed,
+            "errors": self.errors,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+
+bulk_jobs: "OrderedDict[str, BulkEmailJob]" = OrderedDict()
+
+
+def get_job(job_id: str) -> Optional[BulkEmailJob]:
+    return bulk_jobs.get(job_id)
+
+
+async def iter_client_recipients(supabase, min_points: Optional[int] = None, min_total_spent: Optional[float] = None,
+                                 created_after: Optional[str] = None, created_before: Optional[str] = None,
+                                 page_size: int = BULK_PAGE_SIZE) -> AsyncIterator[list]:
+    """Yields pages of {email, name} from `clients`, keyset-paginated on id."""
+    last_id = None
+    while True:
+        query = supabase.table("clients").select("id, name, email").not_.is_("email", "null")
+        if min_points is not None:
+            query = query.gte("points", min_points)
+        if min_total_spent is not None:
+            query = query.gte("total_spent", min_total_spent)
+        if created_after:
+            query = query.gte("created_at", created_after)
+        if created_before:
+            query = query.lt("created_at", created_before)
+        if last_id:
+            query = query.gt("id", last_id)
+
+        res = await query.order("id").limit(page_size).execute()
+        rows = res.data or []
+        if not rows:
+            return
+        yield [{"email": r["email"], "name": r.get("name") or ""} for r in rows]
+        if len(rows) < page_size:
+            return
+        last_id = rows[-1]["id"]
+
+
+async def _send_resend_batch(job: BulkEmailJob, messages: list, limiter: AsyncRateLimiter):
+    from email_service import FROM_NAME, FROM_EMAIL
+
+    for i in range(0, len(messages), RESEND_BATCH_SIZE):
+        chunk = messages[i:i + RESEND_BATCH_SIZE]
+        params = [{
+            "from": f"{FROM_NAME} <{FROM_EMAIL}>",
+            "to": [m["recipient_email"]],
+            "subject": m["subject"],
+            "html": m["html_content"],
+            "text": m["text_content"],
+        } for m in chunk]
+
+        for attempt in range(2):
+            await limiter.acquire()
+            try:
+                await asyncio.to_thread(resend.Batch.send, params)
+                job.sent += len(chunk)
+                break
+            except Exception as e:
+                if attempt:
+                    job.failed += len(chunk)
+                    job.record_error(f"Resend batch of {len(chunk)} failed: {e}")
+                else:
+                    await asyncio.sleep(1)
+
+
+async def _send_smtp(job: BulkEmailJob, messages: list, limiter: AsyncRateLimiter):
+    from email_service import send_email_core, smtp_pool
+
+    # Never more in flight than the pool has sessions
+    semaphore = asyncio.Semaphore(smtp_pool.max_connections)
+
+    async def send_one(message: dict):
+        async with semaphore:
+            await limiter.acquire()
+            if await asyncio.to_thread(send_email_core, **message):
+                job.sent += 1
+            else:
+                job.failed += 1
+                job.record_error(f"Delivery failed for {message['recipient_email']}")
+
+    await asyncio.gather(*(send_one(m) for m in messages))
+
+
+async def run_bulk_job(job: BulkEmailJob, pages: AsyncIterator[list]):
+    from email_service import RESEND_API_KEY, SMTP_USER, SMTP_PASS, compose_notification_email
+
+    if RESEND_API_KEY:
+        job.provider, send = "resend_batch", _send_resend_batch
+        limiter = AsyncRateLimiter(RESEND_BATCH_RATE)
+    elif SMTP_USER and SMTP_PASS:
+        job.provider, send = "smtp_pool", _send_smtp
+        limiter = AsyncRateLimiter(SMTP_SEND_RATE, burst=max(1, int(SMTP_SEND_RATE)))
+    else:
+        job.status = "failed"
+        job.record_error("No email delivery method configured")
+        job.finished_at = datetime.utcnow().isoformat()
+        return
+
+    job.status = "running"
+    seen = set()
+    try:
+        async for page in pages:
+            messages = []
+            for recipient in page:
+                email = (recipient.get("email") or "").strip().lower()
+                job.total += 1
+                if "@" not in email or email in seen:
+                    job.skipped += 1
+                    continue
+                seen.add(email)
+                messages.append(compose_notification_email(
+                    email, job.subject, job.message, job.title,
+                    name=recipient.get("name") or "", lang=job.lang
+                ))
+            if messages:
+                await send(job, messages, limiter)
+        job.status = "completed"
+    except Exception as e:
+        logger.error(f"Bulk email job {job.id} failed: {e}")
+        job.status = "failed"
+        job.record_error(str(e))
+    finally:
+        job.finished_at = datetime.utcnow().isoformat()
+        logger.info(f"Bulk email job {job.id} {job.status}: {job.sent} sent, {job.failed} failed, {job.skipped} skipped")
+
+
+def start_bulk_job(subject: str, message: str, title: str, lang: str, pages: AsyncIterator[list]) -> BulkEmailJob:
+    job = BulkEmailJob(subject, message, title, lang)
+    bulk_jobs[job.id] = job
+    while len(bulk_jobs) > BULK_JOB_RETENTION:
+        bulk_jobs.popitem(last=False)
+    job.task = asyncio.create_task(run_bulk_job(job, pages))
+    return job
@@ -0,0 +1,216 @@
+"""
+Catalogue Cache
+
+In-process copy of the read-mostly catalogue tables (products,
+services_catalog, pricing, consoles), served to the public site by
+/api/catalogue and used by the order pipeline to validate and price lines.
+
+Invalidation is versioned: a deferred trigger on each table bumps a
+per-table sequence when a write commits (docs/database_schema.sql), and the
+cache reads all four versions with one `catalogue_versions()` call at most
+every CATALOGUE_VERSION_TTL seconds. A section is reloaded only when its
+version moved, so between writes requests never touch the database. Each
+loaded section is kept pre-serialized and pre-gzipped with a content ETag,
+which lets the endpoint answer If-None-Match with a bodiless 304.
+
+If the version function is missing, sections simply expire every
+CATALOGUE_TTL seconds; CATALOGUE_TTL also bounds the age of any section as
+a safety net.
+
+Stock figures in the products section are only indicative: the database
+functions re-check stock under row locks.
+"""
+
+import os
+import json
+import gzip
+import time
+import asyncio
+import hashlib
+import logging
+from typing import Optional
+
+from postgrest.exceptions import APIError
+
+from services.table_export import iter_table_pages
+
+logger = logging.getLogger(__name__)
+
+CATALOGUE_VERSION_TTL = float(os.getenv("CATALOGUE_VERSION_TTL", "5"))  # seconds between version checks
+CATALOGUE_TTL = float(os.getenv("CATALOGUE_TTL", "300"))  # seconds, max age of a section
+CATALOGUE_PAGE_SIZE = int(os.getenv("CATALOGUE_PAGE_SIZE", "1000"))
+CATALOGUE_GZIP_MIN_BYTES = 512
+
+# Public section name -> source table, row filter for the public body, sort keys and hidden columns
+SECTIONS = {
+    "products": {"table": "products", "active_only": True, "order": ("category", "name"),
+                 "private": ("cost_price", "cost", "digital_content")},
+    "services": {"table": "services_catalog", "active_only": True, "order": ("sort_order", "name"), "private": ()},
+    "pricing": {"table": "pricing", "active_only": True, "order": ("sort_order", "name"), "private": ()},
+    "consoles": {"table": "consoles", "active_only": False, "order": ("station_number",), "private": ()},
+}
+
+
+def _sort_key(order: tuple):
+    # Missing values sort first instead of breaking the comparison
+    return lambda row: tuple((row.get(col) is not None, row.get(col)) for col in order)
+
+
+class CatalogueSection:
+    """One loaded table: all rows (private columns included) and the rendered public body."""
+
+    def __init__(self, name: str, version, rows: list):
+        spec = SECTIONS[name]
+        self.name = name
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.rows = {row["id"]: row for row in rows}
+
+        public = [
+            {k: v for k, v in row.items() if k not in spec["private"]}
+            for row in rows if not spec["active_only"] or row.get("is_active") is not False
+        ]
+        public.sort(key=_sort_key(spec["order"]))
+        self.body = json.dumps(public, default=str, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self.etag = hashlib.sha1(self.body).hexdigest()[:20]
+
+
+class RenderedCatalogue:
+    """Response bytes for a set of sections, plain and gzipped, with a weak ETag."""
+
+    def __init__(self, sections: list):
+        if len(sections) == 1:
+            self.body = sections[0].body
+        else:
+            self.body = b"{" + b",".join(f'"{s.name}":'.encode() + s.body for s in sections) + b"}"
+        self.section_etags = [s.etag for s in sections]
+        self.etag = 'W/"' + "-".join(s.etag[:10] for s in sections) + '"'
+        self.gzip = gzip.compress(self.body, compresslevel=6) if len(self.body) >= CATALOGUE_GZIP_MIN_BYTES else None
+
+
+class CatalogueCache:
+    """Versioned section cache plus the rendered responses built from it."""
+
+    def __init__(self, version_ttl: float = CATALOGUE_VERSION_TTL, max_age: float = CATALOGUE_TTL):
+        self.version_ttl = version_ttl
+        self.max_age = max_age
+        self._versions: dict = {}
+        self._checked_at = 0.0
+        self._versioned = True
+        self._sections: dict = {}
+        self._rendered: dict = {}
+        self._version_lock = asyncio.Lock()
+        self._locks = {name: asyncio.Lock() for name in SECTIONS}
+        self.hits = 0
+        self.reloads = 0
+        self.not_modified = 0
+
+    # -- versions ---------------------------------------------------------
+
+    def invalidate(self):
+        """Forces a version check on the next request (call after writing catalogue tables)."""
+        self._checked_at = 0.0
+        if not self._versioned:
+            self._sections.clear()
+
+    async def versions(self, supabase) -> dict:
+        if time.monotonic() - self._checked_at > self.version_ttl:
+            async with self._version_lock:
+                if time.monotonic() - self._checked_at > self.version_ttl:
+                    try:
+                        res = await supabase.rpc("catalogue_versions").execute()
+                        self._versions = res.data or {}
+                        self._versioned = True
+                    except APIError as e:
+                        if self._versioned:
+                            logger.warning(f"catalogue_versions unavailable, falling back to a {self.max_age:.0f}s TTL: {e.message}")
+                        self._versioned = False
+                        self._versions = {}
+                    self._checked_at = time.monotonic()
+        return self._versions
+
+    def _current(self, name: str, versions: dict) -> Optional[CatalogueSection]:
+        section = self._sections.get(name)
+        if section is None or time.monotonic() - section.loaded_at > self.max_age:
+            return None
+        if self._versioned and section.version != versions.get(SECTIONS[name]["table"]):
+            return None
+        return section
+
+    # -- sections ---------------------------------------------------------
+
+    async def section(self, supabase, name: str) -> CatalogueSection:
+        versions = await self.versions(supabase)
+        section = self._current(name, versions)
+        if section is not None:
+            self.hits += 1
+            return section
+
+        async with self._locks[name]:
+            # Another request may have reloaded it while we waited
+            section = self._current(name, versions)
+            if section is None:
+                # Version read before the rows: a write landing mid-load only causes one extra reload
+                version = versions.get(SECTIONS[name]["table"])
+                rows = []
+                async for page in iter_table_pages(supabase, SECTIONS[name]["table"], CATALOGUE_PAGE_SIZE):
+                    rows.extend(page)
+                section = CatalogueSection(name, version, rows)
+                self._sections[name] = section
+                self.reloads += 1
+                logger.info(f"Catalogue section {name} loaded ({len(rows)} rows, version {version})")
+            return section
+
+    async def etag(self, supabase, names: tuple) -> Optional[str]:
+        """ETag of the current response for `names` when it can be known without loading anything."""
+        versions = await self.versions(supabase)
+        sections = [self._current(name, versions) for name in names]
+        if any(s is None for s in sections):
+            return None
+        rendered = self._rendered.get(names)
+        if rendered is None or rendered.section_etags != [s.etag for s in sections]:
+            return None
+        return rendered.etag
+
+    async def render(self, supabase, names: tuple) -> RenderedCatalogue:
+        sections = [await self.section(supabase, name) for name in names]
+        rendered = self._rendered.get(names)
+        if rendered is None or [s.etag for s in sections] != rendered.section_etags:
+            rendered = RenderedCatalogue(sections)
+            self._rendered[names] = rendered
+        return rendered
+
+    # -- products (order pipeline) ---------------------------------------
+
+    async def products(self, supabase) -> dict:
+        """All products by id, inactive ones and private columns included."""
+        return (await self.section(supabase, "products")).rows
+
+    async def lookup(self, supabase, product_ids: list) -> dict:
+        """
+        Products for `product_ids`; ids missing from the cache trigger one
+        version check so products created since the last load are found.
+        """
+        products = await self.products(supabase)
+        if any(pid not in products for pid in product_ids) and time.monotonic() - self._checked_at > 1:
+            self.invalidate()
+            products = await self.products(supabase)
+        return {pid: products[pid] for pid in product_ids if pid in products}
+
+    def stats(self) -> dict:
+        return {
+            "versioned": self._versioned,
+            "versions": self._versions,
+            "sections": {
+                name: {"rows": len(s.rows), "bytes": len(s.body), "version": s.version,
+                       "age_seconds": round(time.monotonic() - s.loaded_at, 1)}
+                for name, s in self._sections.items()
+            },
+            "hits": self.hits,
+            "reloads": self.reloads,
+            "not_modified": self.not_modified,
+        }
+
+
+# Singleton instance
+catalogue = CatalogueCache()
@@ -0,0 +1,92 @@
+"""
+Sales Checkout
+
+Sells a whole basket through the `checkout_sale` database function: stock
+check, stock decrement, one `sales` row per product and the points spent /
+earned all commit in a single transaction, with the product rows locked so
+concurrent baskets cannot oversell.
+
+Every checkout carries an idempotency key. Retrying with the same key and
+the same basket returns the original result (marked "replayed") instead of
+selling twice; reusing a key for a different basket is rejected.
+"""
+
+import os
+import json
+import hashlib
+import logging
+
+from postgrest.exceptions import APIError
+
+from services.catalogue import catalogue
+
+logger = logging.getLogger(__name__)
+
+CHECKOUT_POINTS_PER_DT = int(os.getenv("CHECKOUT_POINTS_PER_DT", "1000"))  # points worth 1 DT
+
+# checkout_sale exception messages (prefix before ':') -> (HTTP status, detail)
+CHECKOUT_ERRORS = {
+    "empty_basket": (400, "Basket is empty"),
+    "invalid_quantity": (400, "Quantities must be positive"),
+    "product_not_found": (404, "Product not found or inactive"),
+    "insufficient_stock": (409, "Insufficient stock"),
+    "client_required": (400, "A client is required to pay with points"),
+    "client_not_found": (404, "Client not found"),
+    "insufficient_points": (409, "Insufficient points balance"),
+    "idempotency_key_reused": (422, "Idempotency key was already used for a different basket"),
+}
+
+
+class CheckoutError(Exception):
+    def __init__(self, status_code: int, detail: str, product_id: str = None):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.product_id = product_id
+
+
+def request_hash(items: list, client_id, payment_method: str, points_used: int, notes) -> str:
+    """Stable fingerprint of a basket, so a reused key with other contents is detected."""
+    lines = {}
+    for item in items:
+        lines[item["product_id"]] = lines.get(item["product_id"], 0) + item["quantity"]
+    canonical = json.dumps({
+        "items": sorted(lines.items()),
+        "client_id": client_id,
+        "payment_method": payment_method,
+        "points_used": points_used,
+        "notes": notes,
+    }, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+async def checkout(supabase, idempotency_key: str, staff_id: str, items: list, client_id=None,
+                   payment_method: str = "cash", points_used: int = 0, notes=None) -> dict:
+    params = {
+        "p_idempotency_key": idempotency_key,
+        "p_request_hash": request_hash(items, client_id, payment_method, points_used, notes),
+        "p_staff_id": staff_id,
+        "p_items": items,
+        "p_client_id": client_id,
+        "p_payment_method": payment_method,
+        "p_points_used": points_used,
+        "p_points_per_dt": CHECKOUT_POINTS_PER_DT,
+        "p_notes": notes,
+    }
+    try:
+        res = await supabase.rpc("checkout_sale", params).execute()
+    except APIError as e:
+        code, _, product_id = (e.message or "").partition(":")
+        if code in CHECKOUT_ERRORS:
+            status_code, detail = CHECKOUT_ERRORS[code]
+            raise CheckoutError(status_code, detail, product_id or None)
+        logger.error(f"Checkout {idempotency_key} failed: {e.message}")
+        raise CheckoutError(500, "Checkout failed")
+
+    result = res.data
+    if result.get("replayed"):
+        logger.info(f"Checkout {idempotency_key} replayed")
+    else:
+        # Stock changed: have the public catalogue pick up the new version right away
+        catalogue.invalidate()
+    return result
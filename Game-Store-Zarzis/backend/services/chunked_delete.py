@@ -0,0 +1,84 @@
+"""
+Chunked Deletion Engine
+
+Deletes rows older than a cutoff in bounded batches with a pause between
+batches, so large tables never see one long-running DELETE holding locks.
+A batch is deleted by its (created_at, id) range rather than by listing its
+ids, so the request stays a few hundred bytes whatever the batch size.
+Each call works within a time budget; when the budget runs out it returns a
+resume token (cutoff, remaining tables, counts so far) that continues the
+same cleanup on the next call, even after a restart.
+"""
+
+import os
+import json
+import time
+import base64
+import asyncio
+import logging
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+CLEANUP_BATCH_SIZE = int(os.getenv("CLEANUP_BATCH_SIZE", "200"))
+CLEANUP_PAUSE_MS = int(os.getenv("CLEANUP_PAUSE_MS", "100"))
+CLEANUP_MAX_SECONDS = float(os.getenv("CLEANUP_MAX_SECONDS", "25"))
+CLEANUP_CONCURRENCY = int(os.getenv("CLEANUP_CONCURRENCY", "3"))  # tables cleaned at the same time
+CLEANUP_TABLE_TIMEOUT = float(os.getenv("CLEANUP_TABLE_TIMEOUT", "40"))  # seconds, hard limit for one table (a hung request)
+RESUME_TOKEN_VERSION = 1
+
+
+def encode_resume_token(cutoff: str, pending: list, deleted: dict) -> str:
+    payload = json.dumps({"v": RESUME_TOKEN_VERSION, "cutoff": cutoff, "pending": pending, "deleted": deleted}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_resume_token(token: str) -> dict:
+    """Returns {"cutoff", "pending", "deleted"}; raises ValueError on a malformed token."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except Exception as e:
+        raise ValueError(f"malformed resume token: {e}")
+    if payload.get("v") != RESUME_TOKEN_VERSION or not payload.get("cutoff"):
+        raise ValueError("unsupported resume token")
+    return payload
+
+
+async def count_older_than(supabase, table: str, cutoff: str) -> int:
+    res = await supabase.table(table).select("id", count="exact", head=True).lt("created_at", cutoff).execute()
+    return res.count or 0
+
+
+async def delete_older_than(supabase, table: str, cutoff: str, batch_size: int = CLEANUP_BATCH_SIZE,
+                            pause_ms: int = CLEANUP_PAUSE_MS, deadline: Optional[float] = None,
+                            progress: Optional[dict] = None) -> tuple:
+    """
+    Deletes rows with created_at < cutoff, oldest first, batch_size rows at a time.
+    Returns (deleted, finished); finished is False when the deadline stopped it early.
+    progress["deleted"] is kept current after every batch, so a caller that
+    cancels the call still knows how many rows its committed batches removed.
+    """
+    deleted = 0
+    progress = progress if progress is not None else {}
+    progress["deleted"] = 0
+    while True:
+        if deadline is not None and time.monotonic() >= deadline:
+            return deleted, False
+
+        res = await supabase.table(table).select("created_at, id").lt("created_at", cutoff)\
+            .order("created_at").order("id").limit(batch_size).execute()
+        rows = res.data or []
+        if not rows:
+            return deleted, True
+
+        # Everything up to the last selected row, in the same (created_at, id) order
+        last_created, last_id = rows[-1]["created_at"], rows[-1]["id"]
+        res = await supabase.table(table).delete(count="exact", returning="minimal").lt("created_at", cutoff)\
+            .or_(f'created_at.lt."{last_created}",and(created_at.eq."{last_created}",id.lte.{last_id})').execute()
+        deleted += res.count if res.count is not None else len(rows)
+        progress["deleted"] = deleted
+
+        if len(rows) < batch_size:
+            return deleted, True
+        await asyncio.sleep(pause_ms / 1000)
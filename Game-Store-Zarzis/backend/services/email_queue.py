@@ -0,0 +1,267 @@
+"""
+Background Email Delivery Queue
+
+Routes enqueue messages and return immediately; a bounded pool of worker
+threads delivers them through `email_service.send_email_core`. Failed
+deliveries are retried with exponential backoff, and messages that exhaust
+their attempts land in a dead-letter store. Every message gets an id whose
+delivery status can be looked up afterwards.
+"""
+
+import os
+import json
+import time
+import heapq
+import queue
+import random
+import uuid
+import logging
+import threading
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Callable, Optional
+
+from dotenv import load_dotenv
+
+# The singleton below is built at import time, possibly before the app loads .env
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+EMAIL_QUEUE_WORKERS = int(os.getenv("EMAIL_QUEUE_WORKERS", "4"))
+EMAIL_QUEUE_MAXSIZE = int(os.getenv("EMAIL_QUEUE_MAXSIZE", "1000"))
+EMAIL_MAX_ATTEMPTS = int(os.getenv("EMAIL_MAX_ATTEMPTS", "4"))
+EMAIL_RETRY_BASE_DELAY = float(os.getenv("EMAIL_RETRY_BASE_DELAY", "2"))  # seconds
+EMAIL_RETRY_MAX_DELAY = float(os.getenv("EMAIL_RETRY_MAX_DELAY", "60"))  # seconds
+EMAIL_STATUS_RETENTION = int(os.getenv("EMAIL_STATUS_RETENTION", "5000"))  # messages kept for status lookup
+EMAIL_DEAD_LETTER_PATH = os.getenv("EMAIL_DEAD_LETTER_PATH", "")  # optional JSONL file
+
+
+class EmailQueueFull(Exception):
+    """The queue is at capacity; the caller should retry later or send inline."""
+
+
+class EmailJob:
+    def __init__(self, subject: str, recipient_email: str, recipient_name: str, html_content: str, text_content: str):
+        self.id = str(uuid.uuid4())
+        self.subject = subject
+        self.recipient_email = recipient_email
+        self.recipient_name = recipient_name
+        self.html_content = html_content
+        self.text_content = text_content
+        self.status = "queued"  # queued, sending, retrying, sent, dead
+        self.attempts = 0
+        self.last_error: Optional[str] = None
+        self.created_at = datetime.utcnow().isoformat()
+        self.updated_at = self.created_at
+
+    def touch(self, status: str, error: Optional[str] = None):
+        self.status = status
+        if error is not None:
+            self.last_error = error
+        self.updated_at = datetime.utcnow().isoformat()
+
+    def to_status(self) -> dict:
+        # Message bodies and recipients stay private (OTP codes, passwords)
+        return {
+            "message_id": self.id,
+            "status": self.status,
+            "attempts": self.attempts,
+            "last_error": self.last_error,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+        }
+
+
+class EmailQueue:
+    def __init__(
+        self,
+        sender: Optional[Callable[..., bool]] = None,
+        workers: int = EMAIL_QUEUE_WORKERS,
+        maxsize: int = EMAIL_QUEUE_MAXSIZE,
+        max_attempts: int = EMAIL_MAX_ATTEMPTS,
+        base_delay: float = EMAIL_RETRY_BASE_DELAY,
+        max_delay: float = EMAIL_RETRY_MAX_DELAY,
+        dead_letter_path: str = EMAIL_DEAD_LETTER_PATH,
+    ):
+        self._sender = sender
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.dead_letter_path = dead_letter_path
+
+        self._queue: "queue.Queue[Optional[EmailJob]]" = queue.Queue(maxsize=maxsize)
+        self._jobs: "OrderedDict[str, EmailJob]" = OrderedDict()
+        self._jobs_lock = threading.Lock()
+        self.dead_letters: deque = deque(maxlen=EMAIL_STATUS_RETENTION)
+
+        # Retries wait in a heap until their backoff expires
+        self._delayed: list = []
+        self._delayed_cond = threading.Condition()
+
+        self._threads: list = []
+        self._started = False
+        self._stopping = False
+        self._start_lock = threading.Lock()
+
+    @property
+    def sender(self) -> Callable[..., bool]:
+        if self._sender is None:
+            # Imported lazily: email_service imports this module
+            from email_service import send_email_core
+            self._sender = send_email_core
+        return self._sender
+
+    def start(self):
+        with self._start_lock:
+            if self._started:
+                return
+            self._stopping = False
+            for i in range(self.workers):
+                t = threading.Thread(target=self._worker, name=f"email-worker-{i}", daemon=True)
+                t.start()
+                self._threads.append(t)
+            t = threading.Thread(target=self._scheduler, name="email-retry-scheduler", daemon=True)
+            t.start()
+            self._threads.append(t)
+            self._started = True
+            logger.info(f"Email queue started with {self.workers} worker(s)")
+
+    def shutdown(self, timeout: float = 10.0):
+        """Stops the workers after the messages already queued are handled."""
+        if not self._started:
+            return
+        self._stopping = True
+        with self._delayed_cond:
+            self._delayed_cond.notify_all()
+        for _ in range(self.workers):
+            self._queue.put(None)
+        deadline = time.monotonic() + timeout
+        for t in self._threads:
+            t.join(max(0.0, deadline - time.monotonic()))
+        self._threads = []
+        self._started = False
+
+    def enqueue(self, subject: str, recipient_email: str, recipient_name: str, html_content: str, text_content: str) -> str:
+        """Queues a message for background delivery and returns its message id."""
+        self.start()
+        job = EmailJob(subject, recipient_email, recipient_name, html_content, text_content)
+        self._remember(job)
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            job.touch("dead", "Queue full")
+            raise EmailQueueFull("Email queue is full")
+        logger.info(f"Queued email {job.id} to {recipient_email}: {subject}")
+        return job.id
+
+    def get_status(self, message_id: str) -> Optional[dict]:
+        with self._jobs_lock:
+            job = self._jobs.get(message_id)
+            return job.to_status() if job else None
+
+    def stats(self) -> dict:
+        with self._jobs_lock:
+            counts: dict = {}
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+        with self._delayed_cond:
+            scheduled_retries = len(self._delayed)
+        return {
+            "workers": self.workers,
+            "queued": self._queue.qsize(),
+            "scheduled_retries": scheduled_retries,
+            "dead_letters": len(self.dead_letters),
+            "by_status": counts,
+        }
+
+    def _remember(self, job: EmailJob):
+        with self._jobs_lock:
+            self._jobs[job.id] = job
+            while len(self._jobs) > EMAIL_STATUS_RETENTION:
+                self._jobs.popitem(last=False)
+
+    def _backoff(self, attempts: int) -> float:
+        delay = min(self.max_delay, self.base_delay * (2 ** (attempts - 1)))
+        return delay * random.uniform(0.8, 1.2)
+
+    def _worker(self):
+        while True:
+            job = self._queue.get()
+            try:
+                if job is None:
+                    return
+                self._deliver(job)
+            finally:
+                self._queue.task_done()
+
+    def _deliver(self, job: EmailJob):
+        job.attempts += 1
+        job.touch("sending")
+        try:
+            sent = self.sender(
+                subject=job.subject,
+                recipient_email=job.recipient_email,
+                recipient_name=job.recipient_name,
+                html_content=job.html_content,
+                text_content=job.text_content,
+            )
+            error = None if sent else "All delivery methods failed"
+        except Exception as e:
+            sent, error = False, f"{type(e).__name__}: {e}"
+
+        if sent:
+            job.touch("sent")
+            return
+
+        if job.attempts >= self.max_attempts or self._stopping:
+            job.touch("dead", error)
+            self._dead_letter(job)
+            return
+
+        delay = self._backoff(job.attempts)
+        job.touch("retrying", error)
+        logger.warning(f"Email {job.id} attempt {job.attempts} failed, retrying in {delay:.1f}s: {error}")
+        with self._delayed_cond:
+            heapq.heappush(self._delayed, (time.monotonic() + delay, job.id, job))
+            self._delayed_cond.notify()
+
+    def _scheduler(self):
+        while True:
+            with self._delayed_cond:
+                while not self._stopping and (not self._delayed or self._delayed[0][0] > time.monotonic()):
+                    timeout = self._delayed[0][0] - time.monotonic() if self._delayed else None
+                    self._delayed_cond.wait(timeout)
+                if self._stopping:
+                    # Pending retries won't run anymore: park them in the dead-letter store
+                    while self._delayed:
+                        _, _, job = heapq.heappop(self._delayed)
+                        job.touch("dead", "Shutdown before retry")
+                        self._dead_letter(job)
+                    return
+                _, _, job = heapq.heappop(self._delayed)
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                job.touch("dead", "Queue full on retry")
+                self._dead_letter(job)
+
+    def _dead_letter(self, job: EmailJob):
+        logger.error(f"Email {job.id} to {job.recipient_email} moved to dead-letter store after {job.attempts} attempt(s): {job.last_error}")
+        record = {
+            **job.to_status(),
+            "recipient_email": job.recipient_email,
+            "subject": job.subject,
+        }
+        self.dead_letters.append(record)
+        if self.dead_letter_path:
+            try:
+                with open(self.dead_letter_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            except OSError as e:
+                logger.error(f"Failed to persist dead letter {job.id}: {e}")
+
+
+# Singleton instance
+email_queue = EmailQueue()
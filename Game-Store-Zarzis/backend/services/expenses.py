@@ -0,0 +1,109 @@
+"""
+Expenses Listing
+
+Pages through expenses newest first with keyset pagination on (date, id),
+so every page costs one indexed query (idx_expenses_date) however far back
+the dashboard scrolls, and rows added meanwhile never shift a page. The
+cursor handed to the client is opaque: a versioned, base64-encoded
+(date, id) of the last row of the page.
+
+Filters (date range, categories) are applied by PostgREST, and `fields`
+limits the columns sent back. The optional summary (totals per category and
+month over every filtered expense, not just the page) is computed by the
+expense_summary() function in the database.
+"""
+
+import os
+import json
+import uuid
+import base64
+import asyncio
+from datetime import date
+from typing import Optional, Sequence
+
+from services.table_export import keyset_filter
+
+EXPENSES_PAGE_SIZE = int(os.getenv("EXPENSES_PAGE_SIZE", "50"))
+EXPENSES_MAX_PAGE_SIZE = int(os.getenv("EXPENSES_MAX_PAGE_SIZE", "500"))
+EXPENSE_COLUMNS = ("id", "name", "amount", "category", "date", "notes", "created_at", "updated_at")
+CURSOR_COLUMNS = ("date", "id")
+CURSOR_VERSION = 1
+
+
+def encode_cursor(row: dict) -> str:
+    payload = json.dumps({"v": CURSOR_VERSION, "date": row["date"], "id": row["id"]}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str) -> tuple:
+    """Returns (date, id); raises ValueError on a malformed cursor."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if payload.get("v") != CURSOR_VERSION:
+            raise ValueError("unsupported cursor version")
+        # Both values end up in a PostgREST filter, so only accept what they should be
+        return date.fromisoformat(payload["date"]).isoformat(), str(uuid.UUID(payload["id"]))
+    except Exception as e:
+        raise ValueError(f"invalid cursor: {e}")
+
+
+def parse_fields(fields: Optional[str]) -> list:
+    """Columns to select: the requested ones plus the cursor columns; raises ValueError on unknown names."""
+    if not fields:
+        return list(EXPENSE_COLUMNS)
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in EXPENSE_COLUMNS]
+    if unknown:
+        raise ValueError(f"unknown fields: {', '.join(unknown)}")
+    return list(dict.fromkeys([*CURSOR_COLUMNS, *requested]))
+
+
+async def fetch_page(supabase, columns: Sequence[str], limit: int, after: Optional[tuple] = None,
+                     start: Optional[date] = None, end: Optional[date] = None,
+                     categories: Optional[Sequence[str]] = None) -> tuple:
+    """(rows, next cursor or None) of one page, newest first."""
+    query = supabase.table("expenses").select(", ".join(columns))
+    if start:
+        query = query.gte("date", start.isoformat())
+    if end:
+        query = query.lte("date", end.isoformat())
+    if categories:
+        query = query.in_("category", list(categories))
+    if after:
+        query = query.or_(keyset_filter("date", *after, descending=True))
+    # One extra row tells whether another page follows without a second request
+    res = await query.order("date", desc=True).order("id", desc=True).limit(limit + 1).execute()
+
+    rows = res.data or []
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1])
+
+
+async def fetch_summary(supabase, start: Optional[date] = None, end: Optional[date] = None,
+                        categories: Optional[Sequence[str]] = None) -> dict:
+    res = await supabase.rpc("expense_summary", {
+        "p_start": start.isoformat() if start else None,
+        "p_end": end.isoformat() if end else None,
+        "p_categories": list(categories) if categories else None,
+    }).execute()
+    return res.data
+
+
+async def list_expenses(supabase, limit: int = EXPENSES_PAGE_SIZE, cursor: Optional[str] = None,
+                        start: Optional[date] = None, end: Optional[date] = None,
+                        categories: Optional[Sequence[str]] = None, fields: Optional[str] = None,
+                        summary: bool = False) -> dict:
+    """One page of expenses; raises ValueError on a bad cursor or field list."""
+    columns = parse_fields(fields)
+    after = decode_cursor(cursor) if cursor else None
+
+    page = fetch_page(supabase, columns, limit, after, start, end, categories)
+    if not summary:
+        rows, next_cursor = await page
+        return {"items": rows, "next_cursor": next_cursor}
+
+    (rows, next_cursor), totals = await asyncio.gather(page, fetch_summary(supabase, start, end, categories))
+    return {"items": rows, "next_cursor": next_cursor, "summary": totals}
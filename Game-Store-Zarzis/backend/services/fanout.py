@@ -0,0 +1,66 @@
+"""
+Bounded Fan-out
+
+Runs one coroutine per item (typically per table) concurrently, at most
+`concurrency` at a time, each with its own timeout. A failing or slow item
+only affects its own outcome: the others keep running and every item gets
+a result. Timed-out work is cancelled; cancelling the caller (for example a
+client disconnect) cancels every item still running.
+"""
+
+import time
+import asyncio
+import logging
+from typing import Awaitable, Callable, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENCY = 4
+
+
+class Outcome:
+    """Result of one item: status is "ok", "timeout" or "error"."""
+
+    __slots__ = ("status", "value", "error", "seconds")
+
+    def __init__(self, status: str, value=None, error: Optional[str] = None, seconds: float = 0.0):
+        self.status = status
+        self.value = value
+        self.error = error
+        self.seconds = seconds
+
+    @property
+    def ok(self) -> bool:
+        return self.status == "ok"
+
+
+async def fan_out(items: Iterable, work: Callable[..., Awaitable], concurrency: int = DEFAULT_CONCURRENCY,
+                  timeout: Optional[float] = None,
+                  on_done: Optional[Callable[..., Awaitable]] = None) -> dict:
+    """
+    Awaits work(item) for every item and returns {item: Outcome} in item
+    order. The timeout (seconds) starts when the item gets a slot, so time
+    spent queued behind other items does not count. `on_done(item, outcome)`
+    is awaited as soon as each item finishes.
+    """
+    items = list(items)
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run(item) -> Outcome:
+        async with semaphore:
+            started = time.monotonic()
+            try:
+                value = await asyncio.wait_for(work(item), timeout)
+                outcome = Outcome("ok", value)
+            except asyncio.TimeoutError:
+                outcome = Outcome("timeout", error=f"timed out after {timeout:g}s")
+            except Exception as e:
+                logger.debug(f"Fan-out work for {item} failed: {e}")
+                outcome = Outcome("error", error=str(e))
+            outcome.seconds = round(time.monotonic() - started, 3)
+        if on_done is not None:
+            await on_done(item, outcome)
+        return outcome
+
+    outcomes = await asyncio.gather(*(run(item) for item in items))
+    return dict(zip(items, outcomes))
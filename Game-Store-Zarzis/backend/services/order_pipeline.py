@@ -0,0 +1,339 @@
+"""
+Order Pipeline
+
+Online orders are accepted quickly and processed in the background:
+
+1. `create_order` prices the lines from the cached product catalogue,
+   computes the delivery cost from the store settings and inserts the order
+   as 'pending'. The client-supplied idempotency key is unique on the
+   table, so a retried submission returns the order created the first time.
+   The order stores a fingerprint of the submission: a key sent again with
+   a different order is rejected rather than answered with the stored one.
+2. The order id is queued for a bounded pool of workers. A worker checks
+   the lines against the catalogue and calls `process_order`
+   (docs/database_schema.sql), which locks the products, reserves the stock
+   and moves the order to 'processing', or cancels it with a
+   status_reason when a product is unavailable or short.
+3. Staff move orders on in batches through `transition_orders`
+   (processing -> completed, cancel with stock given back, payment paid or
+   failed).
+
+The queue is only a shortcut: pending orders are also swept from the table
+every ORDER_SWEEP_INTERVAL seconds, so orders that did not fit in the queue
+or were queued when the process stopped still get processed. Processing an
+order twice is a no-op.
+"""
+
+import os
+import json
+import asyncio
+import hashlib
+import logging
+from datetime import datetime, timezone
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Optional
+
+from postgrest.exceptions import APIError
+
+from services.catalogue import catalogue
+from services.store_settings import store_settings
+
+logger = logging.getLogger(__name__)
+
+ORDER_PIPELINE_ENABLED = os.getenv("ORDER_PIPELINE_ENABLED", "true").lower() == "true"
+ORDER_WORKERS = int(os.getenv("ORDER_WORKERS", "4"))
+ORDER_QUEUE_SIZE = int(os.getenv("ORDER_QUEUE_SIZE", "1000"))  # queued order ids before falling back to the sweep
+ORDER_SWEEP_INTERVAL = float(os.getenv("ORDER_SWEEP_INTERVAL", "30"))  # seconds
+
+DELIVERY_METHODS = ("pickup", "rapid_post", "local_delivery")
+PAYMENT_METHODS = ("cash", "bank_transfer", "d17", "card")
+# Used when store_settings has no delivery_settings (same defaults as the checkout page)
+DEFAULT_DELIVERY_SETTINGS = {"rapid_post_cost": 8.0, "local_delivery_cost": 7.0}
+
+# process_order / transition_orders exception messages -> (HTTP status, detail)
+ORDER_ERRORS = {
+    "order_not_found": (404, "Order not found"),
+    "nothing_to_change": (400, "Nothing to change: give a status and/or a payment_status"),
+    "invalid_status": (400, "Status must be processing, completed or cancelled"),
+    "invalid_payment_status": (400, "Payment status must be paid or failed"),
+}
+KEY_REUSED = (422, "Idempotency key was already used for a different order")
+
+MILLIMES = Decimal("0.001")
+
+
+class OrderError(Exception):
+    def __init__(self, status_code: int, detail: str, product_id: str = None):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.product_id = product_id
+
+
+def _money(value) -> Decimal:
+    return Decimal(str(value or 0)).quantize(MILLIMES, rounding=ROUND_HALF_UP)
+
+
+def delivery_cost(delivery_method: str, settings: dict) -> Decimal:
+    if delivery_method == "pickup":
+        return _money(0)
+    if settings.get(f"{delivery_method}_enabled") is False:
+        raise OrderError(400, f"Delivery method {delivery_method} is not available")
+    return _money(settings.get(f"{delivery_method}_cost", DEFAULT_DELIVERY_SETTINGS[f"{delivery_method}_cost"]))
+
+
+def price_lines(items: list, products: dict) -> tuple:
+    """
+    Order lines priced from the catalogue: returns (lines, subtotal). Client
+    prices are ignored; quantities of repeated products are merged.
+    """
+    quantities = {}
+    for item in items:
+        quantities[item["product_id"]] = quantities.get(item["product_id"], 0) + item["quantity"]
+
+    lines, subtotal = [], _money(0)
+    for product_id, quantity in quantities.items():
+        product = products.get(product_id)
+        if not product or product.get("is_active") is False:
+            raise OrderError(404, "Product not found or inactive", product_id)
+        price = _money(product["price"])
+        lines.append({
+            "product_id": product_id,
+            "name": product["name"],
+            "price": float(price),
+            "quantity": quantity,
+            "product_type": product.get("product_type"),
+            "digital_content": product.get("digital_content"),
+        })
+        subtotal += price * quantity
+    return lines, subtotal
+
+
+def request_hash(order: dict, user_id: Optional[str]) -> str:
+    """Stable fingerprint of an order submission, so a reused key with other contents is detected."""
+    quantities = {}
+    for item in order["items"]:
+        quantities[item["product_id"]] = quantities.get(item["product_id"], 0) + item["quantity"]
+    canonical = json.dumps({
+        **{k: v for k, v in order.items() if k != "items"},
+        "items": sorted(quantities.items()),
+        "user_id": user_id,
+    }, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _replay(existing: dict, fingerprint: str) -> dict:
+    # Only the submission that created the order may read it back through its key
+    if existing.get("request_hash") != fingerprint:
+        raise OrderError(*KEY_REUSED)
+    return {**existing, "replayed": True}
+
+
+async def get_delivery_settings(supabase) -> dict:
+    settings = await store_settings.ensure_fresh(supabase)
+    return settings.get_dict("delivery_settings") or DEFAULT_DELIVERY_SETTINGS
+
+
+async def create_order(supabase, idempotency_key: str, order: dict, user_id: Optional[str] = None) -> dict:
+    """
+    Inserts a pending order (or returns the one already created with this
+    key by the same submission, marked "replayed") and queues it for
+    processing; raises OrderError (422) when the key was used for another order.
+    `order` holds the customer fields plus `items` of {product_id, quantity}.
+    """
+    fingerprint = request_hash(order, user_id)
+    existing = await _find_by_key(supabase, idempotency_key)
+    if existing:
+        return _replay(existing, fingerprint)
+
+    products = await catalogue.lookup(supabase, [item["product_id"] for item in order["items"]])
+    lines, subtotal = price_lines(order["items"], products)
+    delivery = delivery_cost(order["delivery_method"], await get_delivery_settings(supabase))
+
+    row = {
+        "user_id": user_id,
+        "client_name": order["client_name"],
+        "client_phone": order["client_phone"],
+        "client_email": order.get("client_email"),
+        "delivery_address": order.get("delivery_address"),
+        "items": lines,
+        "subtotal": float(subtotal),
+        "delivery_cost": float(delivery),
+        "total_amount": float(subtotal + delivery),
+        "delivery_method": order["delivery_method"],
+        "payment_method": order["payment_method"],
+        "payment_reference": order.get("payment_reference"),
+        "payment_status": "pending",
+        "status": "pending",
+        "notes": order.get("notes"),
+        "idempotency_key": idempotency_key,
+        "request_hash": fingerprint,
+    }
+    res = await supabase.table("orders").upsert(row, on_conflict="idempotency_key", ignore_duplicates=True).execute()
+    if not res.data:
+        # A concurrent retry with the same key inserted first
+        return _replay(await _find_by_key(supabase, idempotency_key), fingerprint)
+
+    created = res.data[0]
+    order_pipeline.submit(created["id"])
+    return {**created, "replayed": False}
+
+
+async def _find_by_key(supabase, idempotency_key: str) -> Optional[dict]:
+    res = await supabase.table("orders").select("*").eq("idempotency_key", idempotency_key).limit(1).execute()
+    return res.data[0] if res.data else None
+
+
+async def _rpc(supabase, fn: str, params: dict):
+    try:
+        res = await supabase.rpc(fn, params).execute()
+    except APIError as e:
+        if e.message in ORDER_ERRORS:
+            raise OrderError(*ORDER_ERRORS[e.message])
+        logger.error(f"{fn} failed: {e.message}")
+        raise OrderError(500, "Order update failed")
+    return res.data
+
+
+async def transition_orders(supabase, order_ids: list, status: Optional[str] = None,
+                            payment_status: Optional[str] = None, reason: Optional[str] = None) -> dict:
+    """Batch status / payment transition; returns {"updated": [...], "skipped": [{id, reason}]}."""
+    result = await _rpc(supabase, "transition_orders", {
+        "p_order_ids": order_ids,
+        "p_status": status,
+        "p_payment_status": payment_status,
+        "p_reason": reason,
+    })
+    if status in ("processing", "cancelled") and result["updated"]:
+        # Stock was reserved or given back
+        catalogue.invalidate()
+    return result
+
+
+class OrderPipeline:
+    """Bounded queue of order ids drained by ORDER_WORKERS workers, plus the pending-order sweep."""
+
+    def __init__(self, workers: int = ORDER_WORKERS, queue_size: int = ORDER_QUEUE_SIZE,
+                 sweep_interval: float = ORDER_SWEEP_INTERVAL):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.sweep_interval = sweep_interval
+        self._queue: Optional[asyncio.Queue] = None
+        self._queued: set = set()
+        self._tasks: list = []
+        self.counts = {"processed": 0, "reserved": 0, "rejected": 0, "skipped": 0, "failed": 0, "overflow": 0}
+        self.last_sweep: Optional[str] = None
+
+    @property
+    def running(self) -> bool:
+        return any(not t.done() for t in self._tasks)
+
+    def submit(self, order_id: str) -> bool:
+        """Queues an order; returns False when it is left for the sweep instead."""
+        if self._queue is None or not self.running:
+            return False
+        if order_id in self._queued:
+            return True
+        try:
+            self._queue.put_nowait(order_id)
+        except asyncio.QueueFull:
+            self.counts["overflow"] += 1
+            return False
+        self._queued.add(order_id)
+        return True
+
+    async def process(self, supabase, order_id: str) -> str:
+        """Validates and reserves one order; returns what happened to it."""
+        res = await supabase.table("orders").select("id, status, stock_reserved, items").eq("id", order_id).limit(1).execute()
+        order = res.data[0] if res.data else None
+        if not order or order["status"] != "pending" or order["stock_reserved"]:
+            return "skipped"
+
+        # Unknown or inactive products are rejected without locking anything
+        product_ids = list({item.get("product_id") for item in order["items"] or [] if item.get("product_id")})
+        products = await catalogue.lookup(supabase, product_ids)
+        missing = [pid for pid in product_ids if pid not in products or products[pid].get("is_active") is False]
+        if missing:
+            await transition_orders(supabase, [order_id], status="cancelled", reason=f"product_not_found:{missing[0]}")
+            return "rejected"
+
+        result = await _rpc(supabase, "process_order", {"p_order_id": order_id})
+        if not result.get("changed"):
+            return "skipped"
+        if result["status"] != "processing":
+            logger.info(f"Order {order_id} cancelled: {result.get('status_reason')}")
+            return "rejected"
+        catalogue.invalidate()
+        return "reserved"
+
+    async def _worker(self, get_client):
+        while True:
+            order_id = await self._queue.get()
+            try:
+                outcome = await self.process(await get_client(), order_id)
+                self.counts[outcome] += 1
+                self.counts["processed"] += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Left pending; the next sweep retries it
+                self.counts["failed"] += 1
+                logger.error(f"Processing order {order_id} failed: {e}")
+            finally:
+                self._queued.discard(order_id)
+                self._queue.task_done()
+
+    async def sweep(self, supabase) -> int:
+        """Queues pending orders that are not reserved yet, oldest first; returns how many were queued."""
+        room = self.queue_size - self._queue.qsize()
+        if room <= 0:
+            return 0
+        res = await supabase.table("orders").select("id").eq("status", "pending").eq("stock_reserved", False) \
+            .order("created_at").limit(room).execute()
+        self.last_sweep = datetime.now(timezone.utc).isoformat()
+        return sum(self.submit(row["id"]) for row in res.data or [] if row["id"] not in self._queued)
+
+    async def _sweep_loop(self, get_client):
+        while True:
+            try:
+                queued = await self.sweep(await get_client())
+                if queued:
+                    logger.info(f"Order sweep queued {queued} pending orders")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Order sweep failed: {e}")
+            await asyncio.sleep(self.sweep_interval)
+
+    def start(self, get_client):
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._queued.clear()
+        self._tasks = [asyncio.create_task(self._worker(get_client)) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._sweep_loop(get_client)))
+
+    async def drain(self):
+        """Waits until every queued order has been processed."""
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "workers": self.workers,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "queue_size": self.queue_size,
+            **self.counts,
+            "last_sweep": self.last_sweep,
+        }
+
+
+# Singleton instance
+order_pipeline = OrderPipeline()
@@ -0,0 +1,272 @@
+"""
+OTP Store
+
+Where /verify keeps one-time codes between /verify/send and /verify/check.
+Three backends share one interface, selected with OTP_STORE:
+
+- memory: a dict in this process. Codes expire on their own and nothing
+  touches the database. Only for a single worker process, because a code
+  sent by one worker is unknown to the others: with WEB_CONCURRENCY > 1
+  it is refused and the supabase store is used instead.
+- redis: any Redis-protocol server (Redis, Valkey, KeyDB, or fakeredis in
+  tests) at OTP_REDIS_URL. Keys carry their TTL, so expiry is handled by
+  the server, and the store is shared by every worker.
+- supabase (default): the `verification_codes` table, for a durable record
+  of codes shared by every worker. Expired rows are still removed by
+  /cleanup.
+
+Every backend keeps one live code per identifier (a new send replaces the
+previous code) and verifies with a single compare-and-delete, so a code can
+never be accepted twice, even by concurrent checks. Each check also bumps a
+per-identifier attempt counter that lives as long as a code; past
+OTP_MAX_ATTEMPTS the current code is discarded and the user must ask for a
+new one.
+"""
+
+import os
+import hmac
+import time
+import logging
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+OTP_STORE = os.getenv("OTP_STORE", "supabase").lower()  # supabase | redis | memory
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))  # server worker processes
+OTP_REDIS_URL = os.getenv("OTP_REDIS_URL", "redis://localhost:6379/0")
+OTP_TTL = int(os.getenv("OTP_TTL", "600"))  # seconds a code stays valid
+OTP_MAX_ATTEMPTS = int(os.getenv("OTP_MAX_ATTEMPTS", "5"))  # checks per identifier while a code is live
+OTP_KEY_PREFIX = "otp"
+
+
+class OTPStore:
+    """Interface shared by the backends."""
+
+    name = "base"
+
+    async def save(self, identifier: str, code: str, ttl: int = OTP_TTL):
+        """Stores `code` for `identifier`, replacing any previous code."""
+        raise NotImplementedError
+
+    async def consume(self, identifier: str, code: str) -> bool:
+        """True and deletes the code if it matches and has not expired; one atomic step."""
+        raise NotImplementedError
+
+    async def register_attempt(self, identifier: str, ttl: int = OTP_TTL) -> int:
+        """Counts one check for `identifier` and returns the count inside the current window."""
+        raise NotImplementedError
+
+    async def reset_attempts(self, identifier: str):
+        raise NotImplementedError
+
+    async def discard(self, identifier: str):
+        """Drops the live code of `identifier` (after too many attempts)."""
+        raise NotImplementedError
+
+    async def purge_expired(self) -> int:
+        """Removes expired entries the backend does not expire by itself; returns how many."""
+        return 0
+
+    async def close(self):
+        pass
+
+
+class MemoryOTPStore(OTPStore):
+    """
+    In-process store. Methods never await between reading and writing an
+    entry, so each one is atomic on the event loop without a lock.
+    """
+
+    name = "memory"
+    PURGE_EVERY = 256  # saves between sweeps of expired entries
+
+    def __init__(self):
+        self._codes: dict = {}  # identifier -> (code, expires_at)
+        self._attempts: dict = {}  # identifier -> (count, expires_at)
+        self._saves = 0
+
+    async def save(self, identifier: str, code: str, ttl: int = OTP_TTL):
+        self._codes[identifier] = (code, time.monotonic() + ttl)
+        self._saves += 1
+        if self._saves % self.PURGE_EVERY == 0:
+            await self.purge_expired()
+
+    async def consume(self, identifier: str, code: str) -> bool:
+        entry = self._codes.get(identifier)
+        if entry is None:
+            return False
+        if entry[1] <= time.monotonic():
+            del self._codes[identifier]
+            return False
+        if not hmac.compare_digest(entry[0], code):
+            return False
+        del self._codes[identifier]
+        return True
+
+    async def register_attempt(self, identifier: str, ttl: int = OTP_TTL) -> int:
+        now = time.monotonic()
+        count, expires_at = self._attempts.get(identifier, (0, 0.0))
+        if expires_at <= now:
+            count, expires_at = 0, now + ttl
+        self._attempts[identifier] = (count + 1, expires_at)
+        return count + 1
+
+    async def reset_attempts(self, identifier: str):
+        self._attempts.pop(identifier, None)
+
+    async def discard(self, identifier: str):
+        self._codes.pop(identifier, None)
+
+    async def purge_expired(self) -> int:
+        now = time.monotonic()
+        removed = 0
+        for entries in (self._codes, self._attempts):
+            expired = [key for key, (_, expires_at) in entries.items() if expires_at <= now]
+            for key in expired:
+                del entries[key]
+            removed += len(expired)
+        return removed
+
+
+# KEYS[1] = code key, ARGV[1] = submitted code
+_CONSUME_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    redis.call('DEL', KEYS[1])
+    return 1
+end
+return 0
+"""
+
+# KEYS[1] = attempts key, ARGV[1] = window in seconds; the window starts at the first attempt
+_ATTEMPT_SCRIPT = """
+local count = redis.call('INCR', KEYS[1])
+if count == 1 then
+    redis.call('EXPIRE', KEYS[1], ARGV[1])
+end
+return count
+"""
+
+
+class RedisOTPStore(OTPStore):
+    """Shared store on a Redis-protocol server; expiry is done by key TTLs."""
+
+    name = "redis"
+
+    def __init__(self, client, prefix: str = OTP_KEY_PREFIX):
+        self.client = client
+        self.prefix = prefix
+        self._consume = client.register_script(_CONSUME_SCRIPT)
+        self._attempt = client.register_script(_ATTEMPT_SCRIPT)
+
+    @classmethod
+    def from_url(cls, url: str = OTP_REDIS_URL, **kwargs) -> "RedisOTPStore":
+        # Optional dependency: only needed when OTP_STORE=redis
+        import redis.asyncio as aioredis
+        return cls(aioredis.from_url(url, decode_responses=True), **kwargs)
+
+    def _code_key(self, identifier: str) -> str:
+        return f"{self.prefix}:code:{identifier}"
+
+    def _attempts_key(self, identifier: str) -> str:
+        return f"{self.prefix}:attempts:{identifier}"
+
+    async def save(self, identifier: str, code: str, ttl: int = OTP_TTL):
+        await self.client.set(self._code_key(identifier), code, ex=ttl)
+
+    async def consume(self, identifier: str, code: str) -> bool:
+        return bool(await self._consume(keys=[self._code_key(identifier)], args=[code]))
+
+    async def register_attempt(self, identifier: str, ttl: int = OTP_TTL) -> int:
+        return int(await self._attempt(keys=[self._attempts_key(identifier)], args=[ttl]))
+
+    async def reset_attempts(self, identifier: str):
+        await self.client.delete(self._attempts_key(identifier))
+
+    async def discard(self, identifier: str):
+        await self.client.delete(self._code_key(identifier))
+
+    async def close(self):
+        await self.client.aclose()
+
+
+class SupabaseOTPStore(OTPStore):
+    """
+    Durable store on the `verification_codes` table. Codes are consumed
+    with one conditional UPDATE (matching, unverified, unexpired), which
+    Postgres applies atomically. The attempt counters are kept in process.
+    """
+
+    name = "supabase"
+
+    def __init__(self, get_client):
+        self.get_client = get_client
+        self._attempts = MemoryOTPStore()
+
+    async def save(self, identifier: str, code: str, ttl: int = OTP_TTL):
+        supabase = await self.get_client()
+        # Older codes of this identifier stop being valid
+        await supabase.table("verification_codes")\
+            .update({"is_verified": True})\
+            .eq("identifier", identifier)\
+            .eq("is_verified", False)\
+            .execute()
+        await supabase.table("verification_codes").insert({
+            "identifier": identifier,
+            "code": code,
+            "expires_at": (datetime.utcnow() + timedelta(seconds=ttl)).isoformat(),
+            "is_verified": False
+        }).execute()
+
+    async def consume(self, identifier: str, code: str) -> bool:
+        supabase = await self.get_client()
+        res = await supabase.table("verification_codes")\
+            .update({"is_verified": True})\
+            .eq("identifier", identifier)\
+            .eq("code", code)\
+            .eq("is_verified", False)\
+            .gt("expires_at", datetime.utcnow().isoformat())\
+            .execute()
+        return bool(res.data)
+
+    async def register_attempt(self, identifier: str, ttl: int = OTP_TTL) -> int:
+        return await self._attempts.register_attempt(identifier, ttl)
+
+    async def reset_attempts(self, identifier: str):
+        await self._attempts.reset_attempts(identifier)
+
+    async def discard(self, identifier: str):
+        supabase = await self.get_client()
+        await supabase.table("verification_codes")\
+            .update({"is_verified": True})\
+            .eq("identifier", identifier)\
+            .eq("is_verified", False)\
+            .execute()
+
+    async def purge_expired(self) -> int:
+        supabase = await self.get_client()
+        res = await supabase.table("verification_codes")\
+            .delete()\
+            .lt("expires_at", datetime.utcnow().isoformat())\
+            .execute()
+        return len(res.data or []) + await self._attempts.purge_expired()
+
+
+def build_otp_store(kind: str = OTP_STORE, workers: int = WEB_CONCURRENCY) -> OTPStore:
+    if kind == "memory" and workers > 1:
+        logger.warning(f"OTP_STORE=memory cannot share codes between {workers} workers, using the supabase store")
+        kind = "supabase"
+    if kind == "redis":
+        store = RedisOTPStore.from_url(OTP_REDIS_URL)
+    elif kind == "memory":
+        store = MemoryOTPStore()
+    else:
+        if kind != "supabase":
+            logger.warning(f"Unknown OTP_STORE '{kind}', using the supabase store")
+        from services.supabase_client import get_async_supabase
+        store = SupabaseOTPStore(get_async_supabase)
+    logger.info(f"OTP store: {store.name}")
+    return store
+
+
+# Singleton instance
+otp_store = build_otp_store()
@@ -0,0 +1,116 @@
+"""
+Profile Sync
+
+Copies account data from Supabase Auth (auth.users) into public.profiles.
+Every page of auth users is read, compared against all existing profiles
+(loaded up front with keyset pages), and only new or changed rows are
+written, with bulk upserts of PROFILE_SYNC_BATCH_SIZE rows. A sync of N
+users costs about N / PROFILE_SYNC_PAGE_SIZE + N / PROFILE_SYNC_BATCH_SIZE
+round trips instead of one per user.
+
+Auth is the source for email, and for full name and phone when it has them;
+otherwise the profile keeps its own values. `is_active` is only set on new
+profiles, so a sync never re-activates a disabled staff member.
+"""
+
+import os
+import logging
+from datetime import datetime, timezone
+
+from services.table_export import iter_table_pages
+
+logger = logging.getLogger(__name__)
+
+PROFILE_SYNC_PAGE_SIZE = int(os.getenv("PROFILE_SYNC_PAGE_SIZE", "1000"))  # auth users per admin API page
+PROFILE_SYNC_BATCH_SIZE = int(os.getenv("PROFILE_SYNC_BATCH_SIZE", "500"))  # profiles per upsert
+PROFILE_COLUMNS = ("email", "full_name", "phone", "is_active")
+DEFAULT_FULL_NAME = "Staff Member"
+
+
+async def iter_auth_users(supabase, per_page: int = PROFILE_SYNC_PAGE_SIZE):
+    """Yields pages of auth users until a short page."""
+    page = 1
+    while True:
+        users = await supabase.auth.admin.list_users(page=page, per_page=per_page)
+        if users:
+            yield users
+        if len(users) < per_page:
+            return
+        page += 1
+
+
+async def load_profiles(supabase) -> dict:
+    profiles = {}
+    async for rows in iter_table_pages(supabase, "profiles", columns="id, created_at, " + ", ".join(PROFILE_COLUMNS)):
+        profiles.update((row["id"], row) for row in rows)
+    return profiles
+
+
+def desired_profile(user, existing: dict = None) -> dict:
+    """Profile columns for an auth user, keeping the profile's values where auth has none."""
+    existing = existing or {}
+    meta = user.user_metadata or {}
+    return {
+        "id": user.id,
+        "email": user.email or existing.get("email"),
+        "full_name": meta.get("full_name") or existing.get("full_name") or DEFAULT_FULL_NAME,
+        "phone": user.phone or meta.get("phone") or existing.get("phone"),
+        "is_active": existing.get("is_active", True),
+    }
+
+
+class ProfileSync:
+    """One sync run: diffs, batches the writes and keeps the counters."""
+
+    def __init__(self, supabase, batch_size: int = PROFILE_SYNC_BATCH_SIZE):
+        self.supabase = supabase
+        self.batch_size = batch_size
+        self.now = datetime.now(timezone.utc).isoformat()
+        self.pending = []  # (row, is_new)
+        self.counts = {"total_found": 0, "inserted": 0, "updated": 0, "unchanged": 0, "failed": 0}
+        self.errors = []
+
+    async def flush(self):
+        batch, self.pending = self.pending, []
+        if not batch:
+            return
+        try:
+            await self.supabase.table("profiles").upsert(
+                [{**row, "updated_at": self.now} for row, _ in batch], on_conflict="id"
+            ).execute()
+            inserted = sum(1 for _, is_new in batch if is_new)
+            self.counts["inserted"] += inserted
+            self.counts["updated"] += len(batch) - inserted
+        except Exception as e:
+            logger.error(f"Profile sync batch of {len(batch)} failed: {e}")
+            self.counts["failed"] += len(batch)
+            self.errors.append(f"Batch of {len(batch)} profiles starting at {batch[0][0]['id']}: {e}")
+
+    async def run(self) -> dict:
+        profiles = await load_profiles(self.supabase)
+        seen = set()
+        async for users in iter_auth_users(self.supabase):
+            for user in users:
+                self.counts["total_found"] += 1
+                seen.add(user.id)
+                existing = profiles.get(user.id)
+                row = desired_profile(user, existing)
+                if existing and all(existing.get(col) == row[col] for col in PROFILE_COLUMNS):
+                    self.counts["unchanged"] += 1
+                    continue
+                self.pending.append((row, existing is None))
+                if len(self.pending) >= self.batch_size:
+                    await self.flush()
+        await self.flush()
+
+        return {
+            **self.counts,
+            "synced_count": self.counts["inserted"] + self.counts["updated"],
+            # Profiles without an auth account are reported, not deleted
+            "orphaned": len(profiles.keys() - seen),
+            "errors": self.errors,
+        }
+
+
+async def sync_profiles(supabase, batch_size: int = PROFILE_SYNC_BATCH_SIZE) -> dict:
+    return await ProfileSync(supabase, batch_size).run()
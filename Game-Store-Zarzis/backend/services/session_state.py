@@ -0,0 +1,235 @@
+"""
+Live Session State
+
+Keeps an in-memory index of active gaming sessions by console and pushes
+occupancy changes to subscribers (Server-Sent Events) instead of having
+every dashboard poll the database.
+
+Writes go through transactional RPCs (start_gaming_session,
+end_gaming_session, add_games_to_session in docs/database_schema.sql), so
+the session, console and client updates of one action commit together.
+The index is updated from each RPC result and re-synchronised from the
+database every SESSION_RESYNC_INTERVAL seconds to pick up changes made
+elsewhere (e.g. cleanup or direct table edits); differences found by a
+resync are published like any other change.
+
+The index lives in the process: a session started through one server
+worker is pushed at once to the SSE clients of that worker only. The
+others see it at their next resync, so with WEB_CONCURRENCY > 1 the
+interval is capped at SESSION_MULTI_WORKER_RESYNC seconds. Run a single
+worker where dashboards need changes the moment they happen.
+"""
+
+import os
+import json
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Optional
+
+from postgrest.exceptions import APIError
+
+logger = logging.getLogger(__name__)
+
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))  # server worker processes, each with its own index
+SESSION_RESYNC_INTERVAL = float(os.getenv("SESSION_RESYNC_INTERVAL", "30"))  # seconds
+SESSION_MULTI_WORKER_RESYNC = float(os.getenv("SESSION_MULTI_WORKER_RESYNC", "3"))  # seconds, max interval when WEB_CONCURRENCY > 1
+SESSION_SUBSCRIBER_QUEUE = int(os.getenv("SESSION_SUBSCRIBER_QUEUE", "100"))  # events buffered per SSE client
+
+SESSION_SELECT = "*, console:consoles(*), client:clients(*), pricing:pricing(*)"
+
+# RPC exception messages -> (HTTP status, detail)
+RPC_ERRORS = {
+    "console_not_found": (404, "Console not found"),
+    "console_busy": (409, "Console already has an active session"),
+    "session_not_found": (404, "Session not found"),
+    "session_not_active": (409, "Session is not active"),
+}
+
+
+class SessionStateError(Exception):
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def _rpc_error(e: APIError) -> SessionStateError:
+    status_code, detail = RPC_ERRORS.get(e.message, (500, f"Session update failed: {e.message}"))
+    return SessionStateError(status_code, detail)
+
+
+class SessionIndex:
+    """Active sessions keyed by console_id, plus the SSE subscriber fan-out."""
+
+    def __init__(self, resync_interval: float = SESSION_RESYNC_INTERVAL, workers: int = WEB_CONCURRENCY):
+        if workers > 1:
+            # Other workers' changes only arrive through the resync
+            resync_interval = min(resync_interval, SESSION_MULTI_WORKER_RESYNC)
+        self.resync_interval = resync_interval
+        self._by_console: dict = {}
+        self._subscribers: set = set()
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.loaded = False
+        self.last_sync: Optional[str] = None
+        self.version = 0
+
+    # -- reads ------------------------------------------------------------
+
+    def active_sessions(self) -> list:
+        return sorted(self._by_console.values(), key=lambda s: s.get("start_time") or "")
+
+    def occupancy(self) -> dict:
+        return {
+            "version": self.version,
+            "consoles": {
+                console_id: {"session_id": s["id"], "start_time": s.get("start_time"), "client_id": s.get("client_id")}
+                for console_id, s in self._by_console.items()
+            },
+        }
+
+    async def ensure_loaded(self, supabase):
+        if not self.loaded:
+            await self.resync(supabase)
+
+    # -- sync -------------------------------------------------------------
+
+    async def _fetch_session(self, supabase, session_id: str) -> Optional[dict]:
+        res = await supabase.table("gaming_sessions").select(SESSION_SELECT).eq("id", session_id).limit(1).execute()
+        return res.data[0] if res.data else None
+
+    async def resync(self, supabase) -> int:
+        """Reloads active sessions from the database; returns the number of changes published."""
+        seen_version = self.version
+        res = await supabase.table("gaming_sessions").select(SESSION_SELECT).eq("status", "active").execute()
+        fresh = {row["console_id"]: row for row in res.data or []}
+
+        async with self._lock:
+            changes = 0
+            if self.loaded and self.version != seen_version:
+                # A write landed while we were reading; this snapshot may predate it
+                return changes
+            if self.loaded:
+                for console_id in set(self._by_console) | set(fresh):
+                    old, new = self._by_console.get(console_id), fresh.get(console_id)
+                    if old != new:
+                        changes += 1
+                        self._publish_locked("session_updated" if new else "session_ended", console_id, new or old)
+            self._by_console = fresh
+            self.loaded = True
+            self.last_sync = datetime.now(timezone.utc).isoformat()
+            return changes
+
+    def _apply_locked(self, session: dict, event: str):
+        console_id = session["console_id"]
+        if session.get("status") == "active":
+            self._by_console[console_id] = session
+        elif self._by_console.get(console_id, {}).get("id") == session["id"]:
+            del self._by_console[console_id]
+        self._publish_locked(event, console_id, session)
+
+    async def apply(self, session: dict, event: str):
+        async with self._lock:
+            self._apply_locked(session, event)
+
+    # -- writes (transactional RPCs) ----------------------------------------
+
+    async def _rpc(self, supabase, fn: str, params: dict) -> dict:
+        try:
+            res = await supabase.rpc(fn, params).execute()
+        except APIError as e:
+            raise _rpc_error(e)
+        return res.data
+
+    async def start(self, supabase, **params) -> dict:
+        row = await self._rpc(supabase, "start_gaming_session", {f"p_{k}": v for k, v in params.items()})
+        session = await self._fetch_session(supabase, row["id"]) or row
+        await self.apply(session, "session_started")
+        return session
+
+    async def end(self, supabase, session_id: str, **params) -> dict:
+        row = await self._rpc(supabase, "end_gaming_session", {"p_session_id": session_id, **{f"p_{k}": v for k, v in params.items()}})
+        await self.apply(row, "session_ended")
+        return row
+
+    async def add_games(self, supabase, session_id: str, **params) -> dict:
+        row = await self._rpc(supabase, "add_games_to_session", {"p_session_id": session_id, **{f"p_{k}": v for k, v in params.items()}})
+        async with self._lock:
+            # Keep the joined console/client/pricing of the indexed copy
+            indexed = self._by_console.get(row["console_id"], {})
+            self._apply_locked({**indexed, **row}, "session_updated")
+        return row
+
+    # -- subscribers ----------------------------------------------------------
+
+    def _publish_locked(self, event: str, console_id: str, session: Optional[dict]):
+        self.version += 1
+        message = {
+            "type": event,
+            "version": self.version,
+            "console_id": console_id,
+            "session_id": (session or {}).get("id"),
+            "session": session,
+        }
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # Slow client: drop its backlog and make it reload the snapshot
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait({"type": "resync", "version": self.version})
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=SESSION_SUBSCRIBER_QUEUE)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+
+    # -- background resync ------------------------------------------------
+
+    async def _loop(self, get_client):
+        while True:
+            try:
+                changes = await self.resync(await get_client())
+                if changes:
+                    logger.info(f"Session index resync applied {changes} external changes")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Session index resync failed: {e}")
+            await asyncio.sleep(self.resync_interval)
+
+    def start_sync(self, get_client):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop(get_client))
+
+    async def stop_sync(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "loaded": self.loaded,
+            "active_sessions": len(self._by_console),
+            "subscribers": len(self._subscribers),
+            "version": self.version,
+            "last_sync": self.last_sync,
+            "resync_interval": self.resync_interval,
+        }
+
+
+def sse_event(message: dict) -> str:
+    return f"event: {message['type']}\ndata: {json.dumps(message, default=str)}\n\n"
+
+
+# Singleton instance
+session_index = SessionIndex()
@@ -0,0 +1,158 @@
+"""
+SMTP Connection Pool
+
+Keeps authenticated SMTP sessions alive between messages so bursts of OTPs
+and notifications don't pay for TCP connect + STARTTLS + AUTH each time.
+Idle sessions are health-checked with NOOP before reuse, dropped sessions
+are replaced transparently, and the number of open connections is capped.
+"""
+
+import os
+import time
+import smtplib
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+SMTP_POOL_SIZE = int(os.getenv("SMTP_POOL_SIZE", "4"))
+SMTP_POOL_MAX_IDLE = float(os.getenv("SMTP_POOL_MAX_IDLE", "120"))  # seconds before an idle session is closed
+SMTP_POOL_NOOP_AFTER = float(os.getenv("SMTP_POOL_NOOP_AFTER", "10"))  # seconds idle before a NOOP health check
+SMTP_POOL_ACQUIRE_TIMEOUT = float(os.getenv("SMTP_POOL_ACQUIRE_TIMEOUT", "30"))  # seconds
+
+# Errors after which the session is still usable once reset with RSET
+RECOVERABLE_ERRORS = (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError)
+
+
+class SMTPPoolTimeout(Exception):
+    """No connection slot became free in time."""
+
+
+class SMTPConnectionPool:
+    def __init__(
+        self,
+        connect: Callable[[], smtplib.SMTP],
+        max_connections: int = SMTP_POOL_SIZE,
+        max_idle: float = SMTP_POOL_MAX_IDLE,
+        noop_after: float = SMTP_POOL_NOOP_AFTER,
+        acquire_timeout: float = SMTP_POOL_ACQUIRE_TIMEOUT,
+    ):
+        self._connect = connect
+        self.max_connections = max_connections
+        self.max_idle = max_idle
+        self.noop_after = noop_after
+        self.acquire_timeout = acquire_timeout
+
+        self._slots = threading.BoundedSemaphore(max_connections)
+        self._idle: deque = deque()  # (connection, last_used)
+        self._lock = threading.Lock()  # guards _idle and the counters below
+
+        self.created = 0
+        self.reused = 0
+        self.discarded = 0
+
+    def _count(self, counter: str):
+        # Sender threads update the counters concurrently; += is not atomic
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    @staticmethod
+    def _close(conn: smtplib.SMTP):
+        try:
+            conn.quit()
+        except Exception:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def _is_healthy(self, conn: smtplib.SMTP) -> bool:
+        try:
+            return conn.noop()[0] == 250
+        except Exception:
+            return False
+
+    def _checkout(self) -> smtplib.SMTP:
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                # Most recently used first: it's the most likely to still be alive
+                conn, last_used = self._idle.pop()
+
+            idle_for = time.monotonic() - last_used
+            if idle_for > self.max_idle or (idle_for > self.noop_after and not self._is_healthy(conn)):
+                self._close(conn)
+                self._count("discarded")
+                continue
+
+            self._count("reused")
+            return conn
+
+        conn = self._connect()
+        self._count("created")
+        return conn
+
+    def _checkin(self, conn: smtplib.SMTP):
+        with self._lock:
+            self._idle.append((conn, time.monotonic()))
+
+    @contextmanager
+    def connection(self):
+        """Yields an authenticated SMTP session; returns it to the pool afterwards."""
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            raise SMTPPoolTimeout(f"No SMTP connection available after {self.acquire_timeout}s")
+
+        conn = None
+        try:
+            conn = self._checkout()
+            yield conn
+        except RECOVERABLE_ERRORS:
+            try:
+                # The session itself is fine: reset the transaction and keep it
+                conn.rset()
+                self._checkin(conn)
+            except Exception:
+                self._close(conn)
+                self._count("discarded")
+            conn = None
+            raise
+        except Exception:
+            if conn is not None:
+                self._close(conn)
+                self._count("discarded")
+            conn = None
+            raise
+        else:
+            self._checkin(conn)
+        finally:
+            self._slots.release()
+
+    def sendmail(self, from_addr: str, to_addrs, msg: str):
+        """Sends through a pooled session, retrying once if the server dropped it."""
+        try:
+            with self.connection() as conn:
+                return conn.sendmail(from_addr, to_addrs, msg)
+        except smtplib.SMTPServerDisconnected:
+            logger.info("Pooled SMTP session was dropped by the server, reconnecting")
+            with self.connection() as conn:
+                return conn.sendmail(from_addr, to_addrs, msg)
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for conn, _ in idle:
+            self._close(conn)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "max_connections": self.max_connections,
+                "idle": len(self._idle),
+                "created": self.created,
+                "reused": self.reused,
+                "discarded": self.discarded,
+            }
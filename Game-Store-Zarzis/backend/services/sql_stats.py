@@ -0,0 +1,77 @@
+"""
+Dashboard aggregates over the direct SQL connection (database.py).
+
+The PostgREST path in services/stats.py pages every row of the period to
+sum it in Python. Here Postgres does the sums and counts in one statement,
+so the figures come from one snapshot and cost one round trip whatever the
+volume. A rollup computes and upserts its daily_stats row in the same
+transaction.
+
+Functions take a Session as first argument and are called through
+`database.run_db`.
+"""
+
+from datetime import date, datetime, timezone
+
+from sqlalchemy import select, func
+from sqlalchemy.dialects import postgresql, sqlite
+
+from models import GamingSession, Sale, ServiceRequest, DailyStats
+
+
+def _in_range(model, start: datetime, end: datetime) -> tuple:
+    return model.created_at >= start, model.created_at < end
+
+
+def _sum(column, *where):
+    return select(func.coalesce(func.sum(column), 0)).where(*where).scalar_subquery()
+
+
+def _count(model, *where):
+    return select(func.count()).select_from(model).where(*where).scalar_subquery()
+
+
+def range_query(start: datetime, end: datetime):
+    """The single statement behind compute_range (also planned by test_query_indexes.py)."""
+    gaming = _in_range(GamingSession, start, end)
+    sales = _in_range(Sale, start, end)
+    services = (*_in_range(ServiceRequest, start, end), ServiceRequest.status == "completed")
+
+    return select(
+        _sum(GamingSession.total_amount, *gaming, GamingSession.status == "completed"),
+        _count(GamingSession, *gaming),
+        _sum(Sale.total_amount, *sales),
+        _count(Sale, *sales),
+        _sum(ServiceRequest.final_cost, *services),
+        _count(ServiceRequest, *services),
+    )
+
+
+def compute_range(db, start: datetime, end: datetime) -> dict:
+    """Stats of [start, end) in the layout of services/stats.py, revenue rounded like daily_stats."""
+    row = db.execute(range_query(start, end)).one()
+
+    gaming_revenue, sessions, sales_revenue, sale_count, service_revenue, service_count = row
+    return {
+        "total_revenue": round(float(gaming_revenue) + float(sales_revenue) + float(service_revenue), 3),
+        "gaming_revenue": round(float(gaming_revenue), 3),
+        "sales_revenue": round(float(sales_revenue), 3),
+        "service_revenue": round(float(service_revenue), 3),
+        "total_sessions": int(sessions),
+        "total_sales": int(sale_count),
+        "total_services": int(service_count),
+    }
+
+
+def upsert_daily_stats(db, day: date, stats: dict):
+    dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+    values = {**stats, "date": day, "updated_at": datetime.now(timezone.utc)}
+    stmt = dialect.insert(DailyStats).values(**values)
+    db.execute(stmt.on_conflict_do_update(index_elements=[DailyStats.date], set_={k: v for k, v in values.items() if k != "date"}))
+
+
+def rollup_day(db, day: date, start: datetime, end: datetime) -> dict:
+    """Computes one business day and writes its daily_stats row in the same transaction."""
+    stats = compute_range(db, start, end)
+    upsert_daily_stats(db, day, stats)
+    return stats
@@ -0,0 +1,223 @@
+"""
+Dashboard Statistics
+
+Aggregates revenue and activity per business day. A business day runs from
+STATS_DAY_START_HOUR (store local time) to the same hour the next day, so
+late-night sessions count towards the day they started in.
+
+With DATABASE_URL set, the sums are computed by Postgres over the direct
+SQL connection (services/sql_stats.py); otherwise, or if that connection
+fails, rows are paged through PostgREST and summed here.
+
+Closed days are read from the `daily_stats` rollup table; a closed day that
+has no rollup yet is computed once from the raw tables and written back.
+Only the current business day is computed live, behind a short TTL cache, so
+reporting cost does not grow with history.
+
+Definitions (same as the dashboard):
+    gaming_revenue   sum(total_amount) of completed gaming_sessions
+    sales_revenue    sum(total_amount) of sales
+    service_revenue  sum(final_cost) of completed service_requests
+    total_sessions   count of all gaming_sessions
+    total_sales      count of sales
+    total_services   count of completed service_requests
+"""
+
+import os
+import time
+import asyncio
+import logging
+from datetime import date, datetime, time as dt_time, timedelta, timezone
+from typing import Optional
+from zoneinfo import ZoneInfo
+
+from database import DIRECT_DB_ENABLED, run_db
+from services import sql_stats
+from services.table_export import keyset_filter
+
+logger = logging.getLogger(__name__)
+
+STATS_TIMEZONE = ZoneInfo(os.getenv("STATS_TIMEZONE", "Africa/Tunis"))
+STATS_DAY_START_HOUR = int(os.getenv("STATS_DAY_START_HOUR", "8"))  # business day rollover, local time
+STATS_PAGE_SIZE = int(os.getenv("STATS_PAGE_SIZE", "1000"))
+STATS_TODAY_TTL = float(os.getenv("STATS_TODAY_TTL", "15"))  # seconds
+STATS_ROLLUP_CONCURRENCY = int(os.getenv("STATS_ROLLUP_CONCURRENCY", "4"))  # days computed in parallel
+
+STAT_FIELDS = (
+    "total_revenue", "gaming_revenue", "sales_revenue", "service_revenue",
+    "total_sessions", "total_sales", "total_services",
+)
+REVENUE_FIELDS = ("total_revenue", "gaming_revenue", "sales_revenue", "service_revenue")
+
+
+def empty_stats() -> dict:
+    return {field: 0.0 if field in REVENUE_FIELDS else 0 for field in STAT_FIELDS}
+
+
+def add_stats(total: dict, day: dict) -> dict:
+    for field in STAT_FIELDS:
+        total[field] += float(day.get(field) or 0) if field in REVENUE_FIELDS else int(day.get(field) or 0)
+    return total
+
+
+def round_stats(stats: dict) -> dict:
+    # daily_stats stores DECIMAL(12,3)
+    return {field: round(value, 3) if field in REVENUE_FIELDS else value for field, value in stats.items()}
+
+
+def business_day(now: Optional[datetime] = None) -> date:
+    """Business day a moment belongs to (defaults to now)."""
+    local = (now or datetime.now(timezone.utc)).astimezone(STATS_TIMEZONE)
+    if local.hour < STATS_DAY_START_HOUR:
+        return local.date() - timedelta(days=1)
+    return local.date()
+
+
+def day_bounds(day: date) -> tuple:
+    """[start, end) of a business day as UTC ISO timestamps."""
+    start = datetime.combine(day, dt_time(STATS_DAY_START_HOUR), tzinfo=STATS_TIMEZONE)
+    end = datetime.combine(day + timedelta(days=1), dt_time(STATS_DAY_START_HOUR), tzinfo=STATS_TIMEZONE)
+    return start.astimezone(timezone.utc).isoformat(), end.astimezone(timezone.utc).isoformat()
+
+
+async def _sum_column(supabase, table: str, column: str, start: str, end: str,
+                      status: Optional[str] = None, page_size: int = STATS_PAGE_SIZE) -> tuple:
+    """(sum, rows) of `column` over rows created in [start, end), keyset-paginated."""
+    total, rows_seen, cursor = 0.0, 0, None
+    while True:
+        query = supabase.table(table).select(f"id, created_at, {column}").gte("created_at", start).lt("created_at", end)
+        if status:
+            query = query.eq("status", status)
+        if cursor:
+            query = query.or_(keyset_filter("created_at", *cursor))
+        res = await query.order("created_at").order("id").limit(page_size).execute()
+
+        rows = res.data or []
+        total += sum(float(row.get(column) or 0) for row in rows)
+        rows_seen += len(rows)
+        if len(rows) < page_size:
+            return total, rows_seen
+        cursor = (rows[-1]["created_at"], rows[-1]["id"])
+
+
+async def _count(supabase, table: str, start: str, end: str) -> int:
+    res = await supabase.table(table).select("id", count="exact", head=True)\
+        .gte("created_at", start).lt("created_at", end).execute()
+    return res.count or 0
+
+
+async def compute_range(supabase, start: str, end: str) -> dict:
+    """Aggregates the raw tables over [start, end)."""
+    if DIRECT_DB_ENABLED:
+        try:
+            return await run_db(sql_stats.compute_range, datetime.fromisoformat(start), datetime.fromisoformat(end))
+        except Exception as e:
+            logger.warning(f"Direct stats query failed, using PostgREST: {e}")
+
+    (gaming, _), (sales, sale_count), (services, service_count), session_count = await asyncio.gather(
+        _sum_column(supabase, "gaming_sessions", "total_amount", start, end, status="completed"),
+        _sum_column(supabase, "sales", "total_amount", start, end),
+        _sum_column(supabase, "service_requests", "final_cost", start, end, status="completed"),
+        _count(supabase, "gaming_sessions", start, end),
+    )
+    return round_stats({
+        "total_revenue": gaming + sales + services,
+        "gaming_revenue": gaming,
+        "sales_revenue": sales,
+        "service_revenue": services,
+        "total_sessions": session_count,
+        "total_sales": sale_count,
+        "total_services": service_count,
+    })
+
+
+async def compute_day(supabase, day: date) -> dict:
+    return await compute_range(supabase, *day_bounds(day))
+
+
+async def rollup_day(supabase, day: date) -> dict:
+    """Recomputes one business day from the raw tables and upserts its daily_stats row."""
+    if DIRECT_DB_ENABLED:
+        start, end = day_bounds(day)
+        try:
+            return await run_db(sql_stats.rollup_day, day, datetime.fromisoformat(start), datetime.fromisoformat(end))
+        except Exception as e:
+            logger.warning(f"Direct rollup of {day} failed, using PostgREST: {e}")
+
+    stats = await compute_day(supabase, day)
+    row = {"date": day.isoformat(), **stats, "updated_at": datetime.now(timezone.utc).isoformat()}
+    await supabase.table("daily_stats").upsert(row, on_conflict="date", returning="minimal").execute()
+    return stats
+
+
+async def fetch_rollups(supabase, start_day: date, end_day: date) -> dict:
+    """{date: stats} of existing daily_stats rows in [start_day, end_day]."""
+    res = await supabase.table("daily_stats").select("date, " + ", ".join(STAT_FIELDS))\
+        .gte("date", start_day.isoformat()).lte("date", end_day.isoformat()).order("date").execute()
+    return {date.fromisoformat(row["date"]): {f: row.get(f) for f in STAT_FIELDS} for row in res.data or []}
+
+
+class TodayStatsCache:
+    """Live stats of the current business day, recomputed at most every `ttl` seconds."""
+
+    def __init__(self, ttl: float = STATS_TODAY_TTL):
+        self.ttl = ttl
+        self._day: Optional[date] = None
+        self._stats: Optional[dict] = None
+        self._computed_at = 0.0
+        self._lock = asyncio.Lock()
+
+    def invalidate(self):
+        self._stats = None
+
+    async def get(self, supabase) -> tuple:
+        """Returns (day, stats, age in seconds)."""
+        day = business_day()
+        if self._stats is None or self._day != day or time.monotonic() - self._computed_at > self.ttl:
+            async with self._lock:
+                # Another request may have refreshed it while we waited
+                if self._stats is None or self._day != day or time.monotonic() - self._computed_at > self.ttl:
+                    self._stats = await compute_day(supabase, day)
+                    self._day = day
+                    self._computed_at = time.monotonic()
+        return self._day, dict(self._stats), round(time.monotonic() - self._computed_at, 1)
+
+
+async def get_range_stats(supabase, start_day: date, end_day: date, include_days: bool = False) -> dict:
+    """
+    Totals over business days [start_day, end_day]. Closed days come from
+    daily_stats (missing rollups are filled in), the current day is live.
+    """
+    today = business_day()
+    last_closed = min(end_day, today - timedelta(days=1))
+
+    days = {}
+    if start_day <= last_closed:
+        days = await fetch_rollups(supabase, start_day, last_closed)
+        missing = [start_day + timedelta(days=i) for i in range((last_closed - start_day).days + 1)]
+        missing = [d for d in missing if d not in days]
+        if missing:
+            logger.info(f"Filling {len(missing)} missing daily_stats rollups between {missing[0]} and {missing[-1]}")
+            semaphore = asyncio.Semaphore(STATS_ROLLUP_CONCURRENCY)
+
+            async def fill(day: date):
+                async with semaphore:
+                    days[day] = await rollup_day(supabase, day)
+
+            await asyncio.gather(*(fill(d) for d in missing))
+
+    if start_day <= today <= end_day:
+        _, days[today], _ = await today_stats.get(supabase)
+
+    totals = empty_stats()
+    for stats in days.values():
+        add_stats(totals, stats)
+
+    result = {"start": start_day.isoformat(), "end": end_day.isoformat(), **round_stats(totals)}
+    if include_days:
+        result["days"] = [{"date": d.isoformat(), **round_stats(add_stats(empty_stats(), days[d]))} for d in sorted(days)]
+    return result
+
+
+# Singleton instance
+today_stats = TodayStatsCache()
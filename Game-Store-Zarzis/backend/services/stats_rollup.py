@@ -0,0 +1,253 @@
+"""
+Incremental daily_stats Rollups
+
+A background poller follows a change feed per source table with a persisted
+high-water mark (column value + id, keyset order). Each pass collects the
+business days touched by new or changed rows and recomputes only those
+days, so daily_stats stays current without re-scanning history:
+
+    gaming_sessions.updated_at   new, completed or edited sessions
+    sales.updated_at             new or edited sales
+    service_requests.updated_at  new or updated service jobs
+
+updated_at is stamped by the set_updated_at trigger on every write, so a
+sale corrected or a session ended long after it was created still moves
+its feed; the day rolled up again is the business day of its created_at.
+
+A day is always recomputed as a whole and upserted on `date`, so passes,
+backfills and re-runs are idempotent and late-arriving rows are picked up
+by simply rolling the day up again.
+
+Marks are stored in store_settings under `stats_rollup_state`, written only
+when a pass moves them: every store_settings write bumps the settings
+version and drops the settings cache of every reader. Rows deleted by
+/api/admin/cleanup are not tracked: their days keep the rolled-up totals.
+A feed missing from the saved marks (added since they were written) starts
+from the oldest saved mark rather than from the beginning of the table.
+"""
+
+import os
+import asyncio
+import logging
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+
+from services.stats import business_day, day_bounds, rollup_day, today_stats, STATS_ROLLUP_CONCURRENCY
+from services.table_export import keyset_filter
+
+logger = logging.getLogger(__name__)
+
+STATS_ROLLUP_ENABLED = os.getenv("STATS_ROLLUP_ENABLED", "true").lower() == "true"
+STATS_ROLLUP_INTERVAL = float(os.getenv("STATS_ROLLUP_INTERVAL", "60"))  # seconds between passes
+STATS_ROLLUP_PAGE_SIZE = int(os.getenv("STATS_ROLLUP_PAGE_SIZE", "1000"))
+STATS_BACKFILL_CHUNK_DAYS = int(os.getenv("STATS_BACKFILL_CHUNK_DAYS", "7"))
+STATE_KEY = "stats_rollup_state"
+
+# (table, column that moves forward when the row affects the stats)
+CHANGE_FEEDS = (
+    ("gaming_sessions", "updated_at"),
+    ("sales", "updated_at"),
+    ("service_requests", "updated_at"),
+)
+
+
+def _feed_key(table: str, column: str) -> str:
+    return f"{table}.{column}"
+
+
+async def load_marks(supabase) -> dict:
+    res = await supabase.table("store_settings").select("value").eq("key", STATE_KEY).limit(1).execute()
+    if not res.data:
+        return {}
+    return (res.data[0]["value"] or {}).get("marks", {})
+
+
+async def save_marks(supabase, marks: dict):
+    value = {"marks": marks, "updated_at": datetime.now(timezone.utc).isoformat()}
+    await supabase.table("store_settings").upsert(
+        {"key": STATE_KEY, "value": value}, on_conflict="key", returning="minimal"
+    ).execute()
+
+
+async def collect_dirty_days(supabase, table: str, column: str, mark: Optional[list],
+                             page_size: int = STATS_ROLLUP_PAGE_SIZE) -> tuple:
+    """
+    Reads the feed past `mark` and returns (business days touched, new mark).
+    Days are derived from created_at, which is what the rollups group by.
+    """
+    days, cursor = set(), mark
+    while True:
+        query = supabase.table(table).select(f"id, created_at, {column}").not_.is_(column, "null")
+        if cursor:
+            query = query.or_(keyset_filter(column, *cursor))
+        res = await query.order(column).order("id").limit(page_size).execute()
+
+        rows = res.data or []
+        for row in rows:
+            days.add(business_day(datetime.fromisoformat(row["created_at"])))
+        if rows:
+            cursor = [rows[-1][column], rows[-1]["id"]]
+        if len(rows) < page_size:
+            return days, cursor
+
+
+async def rollup_days(supabase, days, concurrency: int = STATS_ROLLUP_CONCURRENCY) -> list:
+    """Recomputes the given days in parallel; returns the days that failed."""
+    semaphore = asyncio.Semaphore(concurrency)
+    failed = []
+
+    async def run(day: date):
+        async with semaphore:
+            try:
+                await rollup_day(supabase, day)
+            except Exception as e:
+                logger.error(f"Rollup of {day} failed: {e}")
+                failed.append(day)
+
+    await asyncio.gather(*(run(d) for d in sorted(days)))
+    return failed
+
+
+async def backfill(supabase, start_day: date, end_day: date, chunk_days: int = STATS_BACKFILL_CHUNK_DAYS,
+                   concurrency: int = STATS_ROLLUP_CONCURRENCY, progress: Optional[dict] = None) -> dict:
+    """
+    Rebuilds daily_stats for [start_day, end_day]. The range is split into
+    chunks of `chunk_days` that run in parallel (days within a chunk run in
+    order). Safe to re-run: every day is recomputed from scratch.
+    """
+    total_days = (end_day - start_day).days + 1
+    chunks = [
+        [start_day + timedelta(days=d) for d in range(i, min(i + chunk_days, total_days))]
+        for i in range(0, total_days, chunk_days)
+    ]
+    progress = progress if progress is not None else {}
+    progress.update({"days": total_days, "chunks": len(chunks), "done": 0, "failed": []})
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_chunk(chunk: list):
+        async with semaphore:
+            for day in chunk:
+                try:
+                    await rollup_day(supabase, day)
+                except Exception as e:
+                    logger.error(f"Backfill of {day} failed: {e}")
+                    progress["failed"].append(day.isoformat())
+                progress["done"] += 1
+
+    await asyncio.gather(*(run_chunk(c) for c in chunks))
+    if start_day <= business_day() <= end_day:
+        today_stats.invalidate()
+    logger.info(f"Backfill {start_day}..{end_day}: {progress['done']} days, {len(progress['failed'])} failed")
+    return progress
+
+
+class StatsRollupWorker:
+    """Polls the change feeds and keeps daily_stats current."""
+
+    def __init__(self, interval: float = STATS_ROLLUP_INTERVAL):
+        self.interval = interval
+        self.marks: dict = {}
+        self._saved_marks: Optional[dict] = None  # as last read from or written to store_settings
+        self.last_run: Optional[str] = None
+        self.last_days: list = []
+        self.last_error: Optional[str] = None
+        self.passes = 0
+        self.backfill_progress: Optional[dict] = None
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    async def run_once(self, supabase) -> list:
+        """One pass over every feed; returns the days that were rolled up."""
+        async with self._lock:
+            if not self.marks:
+                self.marks = await load_marks(supabase)
+                self._saved_marks = dict(self.marks)
+            if not self.marks:
+                # First run: follow changes from the start of the current day;
+                # older days come from a backfill (or are filled on first read)
+                logger.info("No stats rollup state found; run a backfill to build past daily_stats rows")
+            start = min((m for m in self.marks.values() if m), default=None)
+            if start is None:
+                start = [day_bounds(business_day())[0], "00000000-0000-0000-0000-000000000000"]
+
+            # Marks of feeds no longer followed are dropped
+            dirty, marks = set(), {}
+            for table, column in CHANGE_FEEDS:
+                key = _feed_key(table, column)
+                days, marks[key] = await collect_dirty_days(supabase, table, column, self.marks.get(key) or start)
+                dirty |= days
+
+            failed = await rollup_days(supabase, dirty)
+            if failed:
+                # Keep the old marks so the failed days are picked up again next pass
+                raise RuntimeError(f"Rollup failed for {', '.join(map(str, sorted(failed)))}")
+
+            if marks != self._saved_marks:
+                await save_marks(supabase, marks)
+                self._saved_marks = marks
+            self.marks = marks
+            if business_day() in dirty:
+                today_stats.invalidate()
+
+            self.passes += 1
+            self.last_run = datetime.now(timezone.utc).isoformat()
+            self.last_days = [d.isoformat() for d in sorted(dirty)]
+            return sorted(dirty)
+
+    async def _loop(self, get_client):
+        while True:
+            try:
+                await self.run_once(await get_client())
+                self.last_error = None
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.last_error = str(e)
+                logger.error(f"Stats rollup pass failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self, get_client):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop(get_client))
+            logger.info(f"Stats rollup worker started (every {self.interval:.0f}s)")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def start_backfill(self, supabase, start_day: date, end_day: date, chunk_days: int = STATS_BACKFILL_CHUNK_DAYS) -> dict:
+        if self.backfill_progress and self.backfill_progress.get("status") == "running":
+            raise RuntimeError("A backfill is already running")
+        self.backfill_progress = {"status": "running", "start": start_day.isoformat(), "end": end_day.isoformat()}
+
+        async def run():
+            try:
+                await backfill(supabase, start_day, end_day, chunk_days, progress=self.backfill_progress)
+                self.backfill_progress["status"] = "completed"
+            except Exception as e:
+                logger.error(f"Backfill failed: {e}")
+                self.backfill_progress.update({"status": "failed", "error": str(e)})
+
+        asyncio.create_task(run())
+        return self.backfill_progress
+
+    def stats(self) -> dict:
+        return {
+            "running": bool(self._task and not self._task.done()),
+            "interval": self.interval,
+            "passes": self.passes,
+            "last_run": self.last_run,
+            "last_days": self.last_days,
+            "last_error": self.last_error,
+            "marks": self.marks,
+            "backfill": self.backfill_progress,
+        }
+
+
+# Singleton instance
+stats_rollup = StatsRollupWorker()
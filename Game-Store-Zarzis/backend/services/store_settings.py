@@ -0,0 +1,203 @@
+"""
+Store Settings Snapshot
+
+All `store_settings` rows are loaded with one query into an immutable
+snapshot. Readers get values with plain dictionary lookups on the current
+snapshot, with no lock and no database round trip. A refresh builds a new
+snapshot and swaps the reference in one assignment, so a reader sees
+either the old or the new settings, never a mix.
+
+A background task refreshes the snapshot when:
+- the `store_settings_version()` counter moves (bumped by a trigger at
+  commit), checked every SETTINGS_POLL_INTERVAL seconds;
+- `notify()` is called after the backend writes a setting itself;
+- SETTINGS_TTL seconds have passed since the last load (safety net, and
+  the only trigger when the version function is missing).
+
+Without the background task (scripts), `ensure_fresh()` reloads a snapshot
+older than SETTINGS_TTL on the next read.
+"""
+
+import os
+import time
+import asyncio
+import logging
+from datetime import datetime, timezone
+from types import MappingProxyType
+from typing import Optional
+
+from postgrest.exceptions import APIError
+
+logger = logging.getLogger(__name__)
+
+SETTINGS_TTL = float(os.getenv("SETTINGS_TTL", "300"))  # seconds, max age of the snapshot
+SETTINGS_POLL_INTERVAL = float(os.getenv("SETTINGS_POLL_INTERVAL", "5"))  # seconds between version checks
+
+_MISSING = object()
+
+
+def _as_bool(value, default: bool) -> bool:
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        return value.strip().lower() in ("true", "1", "yes", "on")
+    if isinstance(value, (int, float)):
+        return value != 0
+    if isinstance(value, dict) and "enabled" in value:
+        return _as_bool(value["enabled"], default)
+    return default
+
+
+class SettingsSnapshot:
+    """Immutable view of store_settings at one point in time."""
+
+    __slots__ = ("values", "version", "loaded_at", "loaded_at_utc")
+
+    def __init__(self, rows: list, version: Optional[int] = None):
+        self.values = MappingProxyType({row["key"]: row["value"] for row in rows})
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.loaded_at_utc = datetime.now(timezone.utc).isoformat()
+
+    def get(self, key: str, default=None):
+        return self.values.get(key, default)
+
+    def get_bool(self, key: str, default: bool = False) -> bool:
+        value = self.values.get(key, _MISSING)
+        return default if value is _MISSING or value is None else _as_bool(value, default)
+
+    def get_float(self, key: str, default: float = 0.0) -> float:
+        try:
+            return float(self.values[key])
+        except (KeyError, TypeError, ValueError):
+            return default
+
+    def get_dict(self, key: str, default: Optional[dict] = None) -> dict:
+        value = self.values.get(key)
+        return dict(value) if isinstance(value, dict) else dict(default or {})
+
+
+EMPTY_SNAPSHOT = SettingsSnapshot([])
+
+
+class StoreSettingsCache:
+    """Holds the current snapshot and keeps it fresh."""
+
+    def __init__(self, ttl: float = SETTINGS_TTL, poll_interval: float = SETTINGS_POLL_INTERVAL):
+        self.ttl = ttl
+        self.poll_interval = poll_interval
+        self._snapshot = EMPTY_SNAPSHOT
+        self.loaded = False
+        self._refresh_lock = asyncio.Lock()
+        self._changed = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.refreshes = 0
+        self.failures = 0
+
+    # -- reads (lock-free) ----------------------------------------------------
+
+    @property
+    def snapshot(self) -> SettingsSnapshot:
+        return self._snapshot
+
+    def get(self, key: str, default=None):
+        return self._snapshot.get(key, default)
+
+    def get_bool(self, key: str, default: bool = False) -> bool:
+        return self._snapshot.get_bool(key, default)
+
+    def get_float(self, key: str, default: float = 0.0) -> float:
+        return self._snapshot.get_float(key, default)
+
+    def get_dict(self, key: str, default: Optional[dict] = None) -> dict:
+        return self._snapshot.get_dict(key, default)
+
+    def age_seconds(self) -> Optional[float]:
+        return round(time.monotonic() - self._snapshot.loaded_at, 1) if self.loaded else None
+
+    # -- refresh ------------------------------------------------------------
+
+    async def _version(self, supabase) -> Optional[int]:
+        try:
+            res = await supabase.rpc("store_settings_version").execute()
+            return res.data
+        except APIError as e:
+            logger.debug(f"store_settings_version unavailable: {e.message}")
+            return None
+
+    async def refresh(self, supabase, version: Optional[int] = None) -> SettingsSnapshot:
+        """Loads every setting and swaps in the new snapshot."""
+        async with self._refresh_lock:
+            if version is None:
+                version = await self._version(supabase)
+            res = await supabase.table("store_settings").select("key, value").execute()
+            self._snapshot = SettingsSnapshot(res.data or [], version)
+            self.loaded = True
+            self.refreshes += 1
+            return self._snapshot
+
+    async def ensure_fresh(self, supabase) -> SettingsSnapshot:
+        """Current snapshot; loads it on first use, or when stale and no background task is running."""
+        running = self._task is not None and not self._task.done()
+        if not self.loaded or (not running and time.monotonic() - self._snapshot.loaded_at > self.ttl):
+            try:
+                await self.refresh(supabase)
+            except Exception as e:
+                # Keep serving the previous snapshot (or the defaults) rather than failing the caller
+                self.failures += 1
+                logger.error(f"Store settings refresh failed: {e}")
+        return self._snapshot
+
+    def notify(self):
+        """Schedules a refresh right away (call after writing store_settings)."""
+        self._changed.set()
+
+    # -- background task ----------------------------------------------------
+
+    async def _loop(self, get_client):
+        while True:
+            try:
+                supabase = await get_client()
+                version = await self._version(supabase)
+                stale = time.monotonic() - self._snapshot.loaded_at > self.ttl
+                changed = self._changed.is_set() or (version is not None and version != self._snapshot.version)
+                if not self.loaded or stale or changed:
+                    self._changed.clear()
+                    await self.refresh(supabase, version)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failures += 1
+                logger.error(f"Store settings refresh failed: {e}")
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self, get_client):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop(get_client))
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "loaded": self.loaded,
+            "keys": len(self._snapshot.values),
+            "version": self._snapshot.version,
+            "loaded_at": self._snapshot.loaded_at_utc if self.loaded else None,
+            "age_seconds": self.age_seconds(),
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+        }
+
+
+# Singleton instance
+store_settings = StoreSettingsCache()
@@ -1,5 +1,8 @@
 import os
-from supabase import create_client, Client
+import asyncio
+import httpx
+from supabase import create_client, Client, acreate_client, AsyncClient
+from supabase.lib.client_options import AsyncClientOptions
 from functools import lru_cache
 import logging
 
@@ -7,6 +10,20 @@ import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+def http_settings() -> dict:
+    """
+    Pool settings of the async client. Read when the client is created, like
+    the credentials, so values loaded from .env after this module was imported
+    still apply.
+    """
+    return {
+        "timeout": int(os.environ.get("SUPABASE_HTTP_TIMEOUT", "30")),  # seconds
+        "max_connections": int(os.environ.get("SUPABASE_MAX_CONNECTIONS", "200")),
+        "max_keepalive": int(os.environ.get("SUPABASE_MAX_KEEPALIVE", "50")),
+    }
+
+
 class SupabaseSingleton:
     _instance: Client = None
 
@@ -34,3 +51,80 @@ class SupabaseSingleton:
 @lru_cache()
 def get_supabase() -> Client:
     return SupabaseSingleton.get_client()
+
+
+class AsyncSupabaseSingleton:
+    """
+    Async counterpart of SupabaseSingleton for `async def` route handlers.
+
+    PostgREST, Auth and Storage share one pooled httpx.AsyncClient with
+    HTTP keep-alive, so requests reuse connections instead of occupying a
+    threadpool slot while waiting on HTTP.
+    """
+    _instance: AsyncClient = None
+    _http: httpx.AsyncClient = None
+    _lock: asyncio.Lock = None
+
+    @classmethod
+    async def get_client(cls) -> AsyncClient:
+        if cls._instance is not None:
+            return cls._instance
+
+        if cls._lock is None:
+            cls._lock = asyncio.Lock()
+
+        async with cls._lock:
+            if cls._instance is None:
+                url = os.environ.get("SUPABASE_URL")
+                key = os.environ.get("SUPABASE_SERVICE_KEY")
+
+                if not url or not key:
+                    logger.error("Supabase credentials missing!")
+                    raise ValueError("SUPABASE_URL and SUPABASE_SERVICE_KEY must be set")
+
+                try:
+                    logger.info("Initializing new async Supabase Client connection...")
+                    settings = http_settings()
+                    cls._http = httpx.AsyncClient(
+                        timeout=settings["timeout"],
+                        limits=httpx.Limits(
+                            max_connections=settings["max_connections"],
+                            max_keepalive_connections=settings["max_keepalive"],
+                        ),
+                    )
+                    cls._instance = await acreate_client(
+                        url,
+                        key,
+                        options=AsyncClientOptions(
+                            postgrest_client_timeout=settings["timeout"],
+                            httpx_client=cls._http,
+                        ),
+                    )
+                    logger.info("Async Supabase Client initialized successfully.")
+                except Exception as e:
+                    logger.error(f"Failed to initialize async Supabase Client: {e}")
+                    raise e
+
+        return cls._instance
+
+    @classmethod
+    async def get_http(cls) -> httpx.AsyncClient:
+        """The pooled httpx client of the async Supabase client, for other HTTP calls to the project."""
+        await cls.get_client()
+        return cls._http
+
+    @classmethod
+    async def close(cls):
+        if cls._http is None:
+            return
+        try:
+            await cls._http.aclose()
+        except Exception as e:
+            logger.warning(f"Error closing async Supabase Client: {e}")
+        cls._instance = None
+        cls._http = None
+
+
+# Async retrieval function (usable as a FastAPI dependency)
+async def get_async_supabase() -> AsyncClient:
+    return await AsyncSupabaseSingleton.get_client()
@@ -0,0 +1,194 @@
+"""
+Streaming Table Export
+
+Pages through tables with keyset pagination on (updated_at, id) and emits
+NDJSON records as each page arrives, optionally gzip-compressed on the fly.
+Memory use is bounded by one page, whatever the table size.
+
+Every export ends with a checkpoint token holding a per-table high-water
+mark (updated_at + id). Passing it back returns only the rows created or
+updated since, so backups can be restored as a full snapshot plus deltas
+(deleted rows are not tracked). Full exports page in the same order: a row
+updated while the export runs moves ahead of the cursor and is read again,
+so no edit falls between a full export and the next delta.
+
+Up to EXPORT_CONCURRENCY tables are read at the same time, so the export
+takes about as long as its slowest table rather than the sum of all of
+them. A bounded queue of pages keeps memory flat when the download is
+slower than the database. Only the database is timed: each page read gets
+EXPORT_PAGE_TIMEOUT seconds, while time spent waiting on a slow download
+is not limited. A table that fails or times out part way ends with an
+error line marked truncated instead of a table_end line.
+
+Stream layout, one JSON object per line (row lines of different tables may
+interleave; every table ends with its own table_end or error line):
+    {"type": "header", ...}
+    {"type": "row", "table": "...", "row": {...}}      (repeated)
+    {"type": "table_end", "table": "...", "rows": N}  or  {"type": "error", "truncated": true, ...}
+    {"type": "footer", "checkpoint": "...", ...}
+"""
+
+import os
+import json
+import zlib
+import base64
+import asyncio
+import logging
+from datetime import datetime
+from typing import AsyncIterator, Iterable, Optional, Tuple
+
+from services.fanout import fan_out
+
+logger = logging.getLogger(__name__)
+
+EXPORT_TABLES = ["gaming_sessions", "sales", "expenses", "clients", "products", "services_catalog"]
+EXPORT_PAGE_SIZE = int(os.getenv("EXPORT_PAGE_SIZE", "1000"))
+EXPORT_CONCURRENCY = int(os.getenv("EXPORT_CONCURRENCY", "3"))
+EXPORT_PAGE_TIMEOUT = float(os.getenv("EXPORT_PAGE_TIMEOUT", "60"))  # seconds, one page read from the database
+EXPORT_QUEUE_PAGES = 8  # pages buffered between the table readers and the response
+
+# Column that moves forward whenever a row changes: every exported table has one, stamped on
+# each UPDATE by the set_updated_at trigger (docs/database_schema.sql), whoever writes the row
+CHANGE_COLUMN = "updated_at"
+CHECKPOINT_VERSION = 1
+
+
+class PageReadTimeout(Exception):
+    """A page read took longer than its timeout."""
+
+
+def _line(record: dict) -> bytes:
+    return (json.dumps(record, default=str, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def keyset_filter(column: str, value: str, row_id: str, descending: bool = False) -> str:
+    """PostgREST `or` filter for rows strictly after (value, row_id) in (column, id) order, or (column desc, id desc)."""
+    op = "lt" if descending else "gt"
+    return f'{column}.{op}."{value}",and({column}.eq."{value}",id.{op}.{row_id})'
+
+
+async def iter_table_pages(supabase, table: str, page_size: int = EXPORT_PAGE_SIZE, columns: str = "*",
+                           order_column: str = "created_at", after: Optional[Tuple[str, str]] = None,
+                           timeout: Optional[float] = None) -> AsyncIterator[list]:
+    """
+    Yields pages of rows ordered by (order_column, id).
+    `after` resumes strictly after a (order_column value, id) cursor; `timeout`
+    (seconds) limits each page read and raises PageReadTimeout.
+    """
+    cursor = after
+    while True:
+        query = supabase.table(table).select(columns)
+        if cursor:
+            query = query.or_(keyset_filter(order_column, *cursor))
+        try:
+            res = await asyncio.wait_for(query.order(order_column).order("id").limit(page_size).execute(), timeout)
+        except asyncio.TimeoutError:
+            raise PageReadTimeout(f"reading a page of {table} timed out after {timeout:g}s")
+
+        rows = res.data or []
+        if rows:
+            yield rows
+        if len(rows) < page_size:
+            return
+        cursor = (rows[-1][order_column], rows[-1]["id"])
+
+
+def encode_checkpoint(marks: dict) -> str:
+    payload = json.dumps({"v": CHECKPOINT_VERSION, "tables": marks}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_checkpoint(token: str) -> dict:
+    """Returns {table: [change value, id]}; raises ValueError on a malformed token."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if payload.get("v") != CHECKPOINT_VERSION or not isinstance(payload.get("tables"), dict):
+            raise ValueError("unsupported checkpoint version")
+        return {table: (mark[0], mark[1]) for table, mark in payload["tables"].items()}
+    except ValueError:
+        raise
+    except Exception as e:
+        raise ValueError(f"malformed checkpoint: {e}")
+
+
+async def export_ndjson(supabase, tables: Iterable[str] = EXPORT_TABLES, page_size: int = EXPORT_PAGE_SIZE,
+                        checkpoint: Optional[dict] = None, concurrency: int = EXPORT_CONCURRENCY,
+                        page_timeout: float = EXPORT_PAGE_TIMEOUT) -> AsyncIterator[bytes]:
+    """
+    Full export when `checkpoint` is None, otherwise only rows whose change
+    column moved past the table's high-water mark.
+    """
+    tables = list(dict.fromkeys(tables))
+    mode = "full" if checkpoint is None else "delta"
+    started_at = datetime.now().isoformat()
+    yield _line({"type": "header", "timestamp": started_at, "tables": tables, "format": "ndjson", "mode": mode})
+
+    totals = {table: 0 for table in tables}
+    marks = dict(checkpoint or {})
+    queue: asyncio.Queue = asyncio.Queue(maxsize=EXPORT_QUEUE_PAGES)
+    finished = object()
+
+    async def export_table(table: str):
+        """Queues the row lines of one table; returns its new high-water mark."""
+        # A full export has no marks yet, so it starts from the beginning of the change order
+        mark = None
+        pages = iter_table_pages(supabase, table, page_size, order_column=CHANGE_COLUMN, after=marks.get(table),
+                                 timeout=page_timeout)
+        async for rows in pages:
+            totals[table] += len(rows)
+            mark = [rows[-1][CHANGE_COLUMN], rows[-1]["id"]]
+            await queue.put(b"".join(_line({"type": "row", "table": table, "row": row}) for row in rows))
+        return mark
+
+    async def table_done(table: str, outcome):
+        if outcome.ok:
+            if outcome.value:
+                marks[table] = outcome.value
+            await queue.put(_line({"type": "table_end", "table": table, "rows": totals[table],
+                                   "change_column": CHANGE_COLUMN}))
+        else:
+            # The table keeps its previous mark, so the next delta retries it
+            logger.error(f"Export of {table} failed after {totals[table]} rows: {outcome.error}")
+            await queue.put(_line({"type": "error", "table": table, "rows": totals[table], "truncated": True,
+                                   "error": outcome.error}))
+
+    async def produce():
+        try:
+            # No timeout per table: it would also count time blocked on a slow download
+            await fan_out(tables, export_table, concurrency=concurrency, on_done=table_done)
+        except Exception as e:
+            logger.error(f"Export failed: {e}")
+        await queue.put(finished)
+
+    producer = asyncio.create_task(produce())
+    try:
+        while True:
+            chunk = await queue.get()
+            if chunk is finished:
+                break
+            yield chunk
+        await producer
+    finally:
+        # Client went away: stop reading tables
+        if not producer.done():
+            producer.cancel()
+
+    yield _line({
+        "type": "footer",
+        "mode": mode,
+        "timestamp": datetime.now().isoformat(),
+        "started_at": started_at,
+        "rows": totals,
+        "checkpoint": encode_checkpoint({t: list(m) for t, m in marks.items()}),
+    })
+
+
+async def gzip_stream(chunks: AsyncIterator[bytes], level: int = 6) -> AsyncIterator[bytes]:
+    """Compresses a byte stream incrementally into a single gzip member."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits=31 -> gzip container
+    async for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
@@ -0,0 +1,107 @@
+"""
+Checkout oversell check against the configured Supabase project.
+
+    python test_checkout_concurrency.py --stock 10 --buyers 50
+
+Creates a temporary product with a small stock, fires many concurrent
+single-item checkouts at it, and verifies that exactly `stock` of them
+succeed, the stock ends at zero and one sale row exists per success. Then
+replays one idempotency key concurrently to check it only sells once, and
+pays a basket with more points than it is worth to check that the client
+is only debited the points the discount used. Everything created by the
+check is deleted afterwards.
+"""
+
+import argparse
+import asyncio
+import uuid
+from dotenv import load_dotenv
+
+# Load env vars
+load_dotenv()
+
+from services.supabase_client import AsyncSupabaseSingleton
+from services.checkout import checkout, CheckoutError, CHECKOUT_POINTS_PER_DT
+
+
+async def attempt(supabase, staff_id: str, product_id: str, key: str):
+    try:
+        return await checkout(supabase, key, staff_id, items=[{"product_id": product_id, "quantity": 1}])
+    except CheckoutError as e:
+        return e
+
+
+async def run_check(stock: int, buyers: int):
+    supabase = await AsyncSupabaseSingleton.get_client()
+    staff = await supabase.table("user_roles").select("user_id").eq("role", "owner").limit(1).execute()
+    if not staff.data:
+        print("❌ No owner account found to attribute the test sales to")
+        return
+    staff_id = staff.data[0]["user_id"]
+
+    product = await supabase.table("products").insert({
+        "name": f"checkout-check-{uuid.uuid4().hex[:8]}",
+        "category": "test",
+        "price": 1,
+        "stock_quantity": stock,
+        "is_active": True,
+    }).execute()
+    product_id = product.data[0]["id"]
+    run = uuid.uuid4().hex
+    client_id = None
+
+    try:
+        print(f"Firing {buyers} concurrent checkouts at a product with stock {stock}...")
+        results = await asyncio.gather(*(attempt(supabase, staff_id, product_id, f"{run}-{i}") for i in range(buyers)))
+        sold = sum(isinstance(r, dict) for r in results)
+        rejected = [r for r in results if isinstance(r, CheckoutError)]
+        print(f"Succeeded: {sold}, rejected: {len(rejected)} ({', '.join(sorted({r.detail for r in rejected}))})")
+
+        left = await supabase.table("products").select("stock_quantity").eq("id", product_id).single().execute()
+        rows = await supabase.table("sales").select("id", count="exact", head=True).eq("product_id", product_id).execute()
+        print(f"Stock left: {left.data['stock_quantity']}, sale rows: {rows.count}")
+        oversell_ok = sold == min(stock, buyers) and left.data["stock_quantity"] == max(stock - buyers, 0) and rows.count == sold
+
+        # Restock one unit and hit it with the same key from many callers
+        await supabase.table("products").update({"stock_quantity": 1}).eq("id", product_id).execute()
+        replays = await asyncio.gather(*(attempt(supabase, staff_id, product_id, f"{run}-replay") for _ in range(10)))
+        fresh = sum(isinstance(r, dict) and not r["replayed"] for r in replays)
+        replayed = sum(isinstance(r, dict) and r["replayed"] for r in replays)
+        print(f"Same idempotency key x10: {fresh} sold, {replayed} replayed")
+        idempotency_ok = fresh == 1 and replayed == 9
+
+        # A 20 DT basket paid with twice its value in points: only 20 DT worth may be spent
+        balance, basket = 50 * CHECKOUT_POINTS_PER_DT, 20
+        client = await supabase.table("clients").insert({
+            "name": "checkout-check", "phone": f"checkout-check-{run[:12]}", "points": balance,
+        }).execute()
+        client_id = client.data[0]["id"]
+        await supabase.table("products").update({"stock_quantity": basket}).eq("id", product_id).execute()
+        result = await checkout(supabase, f"{run}-points", staff_id, items=[{"product_id": product_id, "quantity": basket}],
+                                client_id=client_id, payment_method="points", points_used=2 * basket * CHECKOUT_POINTS_PER_DT)
+        ledger = await supabase.table("points_transactions").select("amount").eq("client_id", client_id)\
+            .eq("transaction_type", "spent").execute()
+        left = await supabase.table("clients").select("points").eq("id", client_id).single().execute()
+        spent = basket * CHECKOUT_POINTS_PER_DT
+        print(f"Points over the basket value: {result['points_used']} used, "
+              f"ledger {sum(t['amount'] for t in ledger.data)}, balance {balance} -> {left.data['points']}")
+        points_ok = (result["points_used"] == spent and float(result["total_amount"]) == 0
+                     and sum(t["amount"] for t in ledger.data) == -spent and left.data["points"] == balance - spent)
+    finally:
+        await supabase.table("sales").delete().eq("product_id", product_id).execute()
+        if client_id:
+            await supabase.table("points_transactions").delete().eq("client_id", client_id).execute()
+            await supabase.table("clients").delete().eq("id", client_id).execute()
+        await supabase.table("checkout_requests").delete().like("idempotency_key", f"{run}-%").execute()
+        await supabase.table("products").delete().eq("id", product_id).execute()
+        await AsyncSupabaseSingleton.close()
+
+    print("\n✅ Checkout concurrency OK" if oversell_ok and idempotency_ok and points_ok else "\n❌ Checkout concurrency check FAILED")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stock", type=int, default=10)
+    parser.add_argument("--buyers", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(run_check(args.stock, args.buyers))
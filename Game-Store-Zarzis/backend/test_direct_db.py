@@ -0,0 +1,139 @@
+"""
+Direct SQL data path check (database.py, models.py, services/sql_stats.py).
+
+    python test_direct_db.py                                          # SQLite stand-in, tables from the models
+    DATABASE_URL=postgresql://postgres@localhost/scratch python test_direct_db.py
+
+The Postgres database needs docs/database_schema.sql applied and at least
+one auth.users row (used as staff_id); the rows the check creates are
+deleted afterwards. Compares the server-side aggregates with sums computed
+in Python, checks that a rollup upsert is idempotent and rolls back with its
+transaction, and that concurrent run_db calls share the pool.
+"""
+
+import os
+import sys
+import asyncio
+import tempfile
+import random
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+
+if not os.getenv("DATABASE_URL"):
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/direct_db_check.db"
+
+from sqlalchemy import delete, select, text
+
+from database import Base, engine, run_db, session_scope, pool_status
+from models import Console, Pricing, Product, GamingSession, Sale, ServiceCatalogItem, ServiceRequest, DailyStats
+from services import sql_stats
+
+MARK = "direct-db-check"
+DAY = date(2001, 2, 3)  # far from real data
+START = datetime(2001, 2, 3, 7, 0, tzinfo=timezone.utc)
+END = START + timedelta(days=1)
+
+
+def staff_id(db) -> str:
+    if db.get_bind().dialect.name == "sqlite":
+        return "00000000-0000-0000-0000-00000000beef"
+    row = db.execute(text("SELECT id FROM auth.users LIMIT 1")).first()
+    if row is None:
+        sys.exit("The check needs one auth.users row to use as staff_id")
+    return str(row[0])
+
+
+def seed(db, rng) -> dict:
+    staff = staff_id(db)
+    console = Console(name=MARK, station_number=999, console_type="ps5")
+    pricing = Pricing(name=MARK, console_type="ps5", price_type="fixed", price=Decimal("5"))
+    product = Product(name=MARK, category="check", price=Decimal("2.5"))
+    service = ServiceCatalogItem(name=MARK, category="check")
+    db.add_all([console, pricing, product, service])
+    db.flush()
+
+    expected = {"gaming_revenue": Decimal(0), "sales_revenue": Decimal(0), "service_revenue": Decimal(0),
+                "total_sessions": 0, "total_sales": 0, "total_services": 0}
+    for i in range(300):
+        # A third of the rows fall outside the day and must not be counted
+        inside = i % 3 != 0
+        created = START + timedelta(minutes=rng.randrange(24 * 60)) if inside else END + timedelta(minutes=i)
+        amount = Decimal(rng.randrange(1000, 20000)) / 1000
+        status = rng.choice(["completed", "active", "cancelled"])
+        db.add(GamingSession(console_id=console.id, pricing_id=pricing.id, staff_id=staff, session_type="fixed",
+                             total_amount=amount, status=status, notes=MARK, created_at=created))
+        db.add(Sale(product_id=product.id, staff_id=staff, unit_price=amount, total_amount=amount, notes=MARK, created_at=created))
+        db.add(ServiceRequest(service_id=service.id, client_name=MARK, client_phone="0", staff_id=staff,
+                              issue_description="check", final_cost=amount, status=status, notes=MARK, created_at=created))
+        if inside:
+            expected["total_sessions"] += 1
+            expected["total_sales"] += 1
+            expected["sales_revenue"] += amount
+            if status == "completed":
+                expected["gaming_revenue"] += amount
+                expected["service_revenue"] += amount
+                expected["total_services"] += 1
+    return {k: float(v) if isinstance(v, Decimal) else v for k, v in expected.items()}
+
+
+def cleanup(db):
+    db.execute(delete(DailyStats).where(DailyStats.date == DAY))
+    for model in (GamingSession, Sale, ServiceRequest):
+        db.execute(delete(model).where(model.notes == MARK))
+    for model in (Console, Pricing, Product, ServiceCatalogItem):
+        db.execute(delete(model).where(model.name == MARK))
+
+
+async def main():
+    ok = True
+
+    def expect(label, actual, expected):
+        nonlocal ok
+        passed = actual == expected
+        ok = ok and passed
+        print(f"  {'✅' if passed else '❌'} {label}: {actual!r}" + ("" if passed else f" (expected {expected!r})"))
+
+    print(f"database: {engine.dialect.name}")
+    if engine.dialect.name == "sqlite":
+        Base.metadata.create_all(engine)
+
+    with session_scope() as db:
+        cleanup(db)
+        expected = seed(db, random.Random(7))
+    expected["total_revenue"] = round(expected["gaming_revenue"] + expected["sales_revenue"] + expected["service_revenue"], 3)
+
+    try:
+        stats = await run_db(sql_stats.compute_range, START, END)
+        for field, value in expected.items():
+            expect(field, stats[field], round(value, 3) if isinstance(value, float) else value)
+
+        first = await run_db(sql_stats.rollup_day, DAY, START, END)
+        await run_db(sql_stats.rollup_day, DAY, START, END)
+        rows = await run_db(lambda db: db.execute(select(DailyStats).where(DailyStats.date == DAY)).scalars().all())
+        expect("rollup rows after two upserts", len(rows), 1)
+        expect("rollup total_revenue", float(rows[0].total_revenue), first["total_revenue"])
+
+        # A failing statement rolls the whole transaction back
+        def failing(db):
+            sql_stats.upsert_daily_stats(db, DAY, {**first, "total_sales": -1})
+            raise RuntimeError("abort")
+        try:
+            await run_db(failing)
+        except RuntimeError:
+            pass
+        rows = await run_db(lambda db: db.execute(select(DailyStats.total_sales).where(DailyStats.date == DAY)).scalars().all())
+        expect("rolled back upsert", rows, [first["total_sales"]])
+
+        results = await asyncio.gather(*(run_db(sql_stats.compute_range, START, END) for _ in range(20)))
+        expect("20 concurrent aggregates agree", all(r == stats for r in results), True)
+        print(f"  pool: {pool_status()}")
+    finally:
+        with session_scope() as db:
+            cleanup(db)
+
+    print("\n✅ All checks passed" if ok else "\n❌ Some checks failed")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,97 @@
+"""
+Email queue check against a local SMTP stand-in (aiosmtpd).
+
+    pip install aiosmtpd
+    python test_email_queue.py
+
+Delivers a burst of messages through the background queue, then points the
+transport at a closed port to exercise retries and the dead-letter store.
+"""
+
+import os
+import time
+import socket
+
+os.environ["RESEND_API_KEY"] = ""  # keep the Resend fallback out of the way
+
+from aiosmtpd.controller import Controller
+from aiosmtpd.smtp import AuthResult
+
+import email_service
+from services.email_queue import EmailQueue
+
+
+class CollectingHandler:
+    def __init__(self):
+        self.messages = []
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append(envelope)
+        return "250 Message accepted for delivery"
+
+
+def accept_any_login(server, session, envelope, mechanism, auth_data):
+    return AuthResult(success=True)
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for(q: EmailQueue, ids: list, timeout: float = 30.0) -> list:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        statuses = [q.get_status(i) for i in ids]
+        if all(s["status"] in ("sent", "dead") for s in statuses):
+            return statuses
+        time.sleep(0.1)
+    return [q.get_status(i) for i in ids]
+
+
+def run_queue_check(burst: int = 20):
+    handler = CollectingHandler()
+    controller = Controller(
+        handler,
+        hostname="127.0.0.1",
+        port=free_port(),
+        authenticator=accept_any_login,
+        auth_require_tls=False,
+    )
+    controller.start()
+
+    email_service.SMTP_HOST = "127.0.0.1"
+    email_service.SMTP_PORT = controller.port
+    email_service.SMTP_USER = "queue-check"
+    email_service.SMTP_PASS = "queue-check"
+    email_service.SMTP_STARTTLS = False
+    email_service.RESEND_API_KEY = ""
+
+    print(f"--- Delivering {burst} OTP emails through the queue ---")
+    q = EmailQueue(workers=4, base_delay=0.2, max_delay=1.0, max_attempts=3)
+    start = time.perf_counter()
+    ids = [q.enqueue(**email_service.compose_otp_email(f"user{i}@example.com", f"{i:06d}", "fr")) for i in range(burst)]
+    enqueue_ms = (time.perf_counter() - start) * 1000
+    statuses = wait_for(q, ids)
+    sent = sum(1 for s in statuses if s["status"] == "sent")
+    print(f"Enqueued in {enqueue_ms:.1f} ms, delivered {sent}/{burst}, server received {len(handler.messages)}")
+    print(f"SMTP pool: {email_service.smtp_pool.stats()}")
+
+    print("\n--- Retry + dead-letter with the SMTP server unreachable ---")
+    email_service.SMTP_PORT = free_port()
+    email_service.smtp_pool.close_all()
+    failing_id = q.enqueue(**email_service.compose_otp_email("nobody@example.com", "000000", "en"))
+    status = wait_for(q, [failing_id])[0]
+    print(f"Status: {status['status']} after {status['attempts']} attempt(s), last error: {status['last_error']}")
+    print(f"Dead letters: {len(q.dead_letters)}")
+
+    q.shutdown()
+    controller.stop()
+
+    ok = sent == burst and status["status"] == "dead" and status["attempts"] == 3
+    print("\n✅ Email queue OK" if ok else "\n❌ Email queue check FAILED")
+
+
+if __name__ == "__main__":
+    run_queue_check()
@@ -0,0 +1,103 @@
+"""
+Expenses listing check against the configured Supabase project.
+
+    python test_expenses_pagination.py --rows 230 --limit 25
+
+Inserts temporary expenses under unique categories (spread over a few
+months, several per day so pages split inside a date), then walks the
+listing page by page and verifies that every row comes exactly once in
+(date desc, id desc) order, that the date, category and field filters
+apply, and that the summary matches totals computed here. Requires
+expense_summary() from docs/database_schema.sql. Everything created by
+the check is deleted afterwards.
+"""
+
+import argparse
+import asyncio
+import random
+import uuid
+from collections import defaultdict
+from datetime import date, timedelta
+from dotenv import load_dotenv
+
+# Load env vars
+load_dotenv()
+
+from services.supabase_client import AsyncSupabaseSingleton
+from services.expenses import list_expenses
+
+FIRST_DAY = date(2001, 1, 10)  # far from real data
+
+
+async def walk(supabase, **filters) -> tuple:
+    rows, cursor, pages = [], None, 0
+    while True:
+        page = await list_expenses(supabase, cursor=cursor, **filters)
+        rows.extend(page["items"])
+        pages += 1
+        cursor = page["next_cursor"]
+        if not cursor:
+            return rows, pages
+
+
+async def run_check(count: int, limit: int):
+    supabase = await AsyncSupabaseSingleton.get_client()
+    run = uuid.uuid4().hex[:8]
+    categories = [f"check-{run}-a", f"check-{run}-b", f"check-{run}-c"]
+    rng = random.Random(run)
+    rows = [{
+        "name": f"expenses-check-{i}",
+        "amount": rng.randrange(100, 100000) / 1000,
+        "category": rng.choice(categories),
+        "date": (FIRST_DAY + timedelta(days=rng.randrange(75))).isoformat(),
+    } for i in range(count)]
+    inserted = (await supabase.table("expenses").insert(rows).execute()).data
+    ok = True
+
+    def expect(label, passed, detail=""):
+        nonlocal ok
+        ok = ok and passed
+        print(f"  {'✅' if passed else '❌'} {label}" + (f" ({detail})" if detail and not passed else ""))
+
+    try:
+        start, end = FIRST_DAY, FIRST_DAY + timedelta(days=80)
+        expected = sorted(inserted, key=lambda r: (r["date"], r["id"]), reverse=True)
+
+        listed, pages = await walk(supabase, limit=limit, start=start, end=end, categories=categories)
+        expect(f"{count} rows over {pages} pages of {limit}", [r["id"] for r in listed] == [r["id"] for r in expected],
+               f"got {len(listed)} rows, {len({r['id'] for r in listed})} distinct")
+
+        window = (FIRST_DAY + timedelta(days=20), FIRST_DAY + timedelta(days=40))
+        listed, _ = await walk(supabase, limit=limit, start=window[0], end=window[1], categories=categories[:1])
+        wanted = [r["id"] for r in expected if r["category"] == categories[0]
+                  and window[0].isoformat() <= r["date"] <= window[1].isoformat()]
+        expect("date range + category filter", [r["id"] for r in listed] == wanted, f"{len(listed)} vs {len(wanted)}")
+
+        page = await list_expenses(supabase, limit=limit, start=start, end=end, categories=categories, fields="amount")
+        expect("fields projection", all(set(r) == {"id", "date", "amount"} for r in page["items"]),
+               f"{sorted(page['items'][0]) if page['items'] else []}")
+
+        page = await list_expenses(supabase, limit=limit, start=start, end=end, categories=categories, summary=True)
+        summary = page["summary"]
+        by_category, by_month = defaultdict(float), defaultdict(float)
+        for r in inserted:
+            by_category[r["category"]] += float(r["amount"])
+            by_month[r["date"][:7]] += float(r["amount"])
+        expect("summary total and count", round(float(summary["total"]), 3) == round(sum(by_category.values()), 3)
+               and summary["count"] == count, f"{summary['total']} / {summary['count']}")
+        expect("summary per category", {k: round(float(v), 3) for k, v in summary["by_category"].items()}
+               == {k: round(v, 3) for k, v in by_category.items()})
+        expect("summary per month, newest first", [(m["month"], round(float(m["total"]), 3)) for m in summary["by_month"]]
+               == sorted(((k, round(v, 3)) for k, v in by_month.items()), reverse=True))
+    finally:
+        await supabase.table("expenses").delete().in_("category", categories).execute()
+
+    print("\n✅ All checks passed" if ok else "\n❌ Some checks failed")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=230)
+    parser.add_argument("--limit", type=int, default=25)
+    args = parser.parse_args()
+    asyncio.run(run_check(args.rows, args.limit))
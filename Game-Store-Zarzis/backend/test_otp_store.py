@@ -0,0 +1,75 @@
+"""
+OTP store check for the in-memory and Redis backends.
+
+    pip install redis "fakeredis[lua]"
+    python test_otp_store.py                                  # fakeredis stand-in
+    python test_otp_store.py redis://localhost:6379/15        # a real redis-server (uses the otp-check: prefix)
+
+Runs the same scenario on both backends: expiry, replacement by a new code,
+single use under concurrent checks, and the attempt counter window.
+"""
+
+import sys
+import asyncio
+
+from services.otp_store import MemoryOTPStore, RedisOTPStore
+
+
+async def check(store):
+    ok = True
+
+    def expect(label, actual, expected):
+        nonlocal ok
+        passed = actual == expected
+        ok = ok and passed
+        print(f"  {'✅' if passed else '❌'} {label}: {actual!r}")
+
+    await store.save("+21600000001", "123456", ttl=60)
+    expect("wrong code rejected", await store.consume("+21600000001", "000000"), False)
+    expect("right code accepted", await store.consume("+21600000001", "123456"), True)
+    expect("code is single use", await store.consume("+21600000001", "123456"), False)
+
+    await store.save("a@example.com", "111111", ttl=60)
+    await store.save("a@example.com", "222222", ttl=60)
+    expect("older code replaced", await store.consume("a@example.com", "111111"), False)
+
+    await store.save("race@example.com", "424242", ttl=60)
+    results = await asyncio.gather(*(store.consume("race@example.com", "424242") for _ in range(20)))
+    expect("20 concurrent checks, accepted", results.count(True), 1)
+
+    await store.save("short@example.com", "999999", ttl=1)
+    await asyncio.sleep(1.2)
+    expect("expired code rejected", await store.consume("short@example.com", "999999"), False)
+
+    counts = [await store.register_attempt("b@example.com", ttl=1) for _ in range(3)]
+    expect("attempts counted", counts, [1, 2, 3])
+    await asyncio.sleep(1.2)
+    expect("attempt window restarts", await store.register_attempt("b@example.com", ttl=1), 1)
+    await store.reset_attempts("b@example.com")
+    expect("attempts reset", await store.register_attempt("b@example.com", ttl=60), 1)
+
+    await store.save("c@example.com", "555555", ttl=60)
+    await store.discard("c@example.com")
+    expect("discarded code rejected", await store.consume("c@example.com", "555555"), False)
+    return ok
+
+
+async def main():
+    print("memory")
+    ok = await check(MemoryOTPStore())
+
+    if len(sys.argv) > 1:
+        store = RedisOTPStore.from_url(sys.argv[1], prefix="otp-check")
+    else:
+        import fakeredis
+        store = RedisOTPStore(fakeredis.FakeAsyncRedis(decode_responses=True))
+    print(f"redis ({sys.argv[1] if len(sys.argv) > 1 else 'fakeredis'})")
+    ok = await check(store) and ok
+    await store.close()
+
+    print("\n✅ All checks passed" if ok else "\n❌ Some checks failed")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
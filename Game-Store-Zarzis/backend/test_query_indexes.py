@@ -0,0 +1,173 @@
+"""
+Index usage check of the dashboard queries (EXPLAIN on Postgres).
+
+    DATABASE_URL=postgresql://postgres@localhost/scratch python test_query_indexes.py
+    DATABASE_URL=... python test_query_indexes.py --no-seed    # plan against the data already there
+
+The database needs docs/database_schema.sql (or docs/migrations/) applied and
+at least one auth.users row. By default a year of synthetic rows is inserted
+and ANALYZEd first, so the planner sees realistic table sizes; everything
+runs in one transaction that is rolled back, so nothing is left behind.
+
+Each query is planned with EXPLAIN (FORMAT JSON) and every scan of the
+listed tables must go through the expected index (Index Scan, Index Only
+Scan or Bitmap Index Scan), not a sequential scan.
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select, update, and_, or_, text
+
+from database import engine
+from models import GamingSession, Sale, ServiceRequest, PointsTransaction, VerificationCode, Expense
+from services import sql_stats
+
+SEED_DAYS = 365
+SEED_ROWS_PER_DAY = 200
+INDEX_SCANS = {"Index Scan", "Index Only Scan", "Bitmap Index Scan"}
+
+NOW = datetime(2026, 6, 15, 7, 0, tzinfo=timezone.utc)
+DAY_START, DAY_END = NOW, NOW + timedelta(days=1)
+SEED_END = NOW + timedelta(days=SEED_DAYS // 2)  # the checked day sits in the middle of the seeded year
+CLIENT_ID = "00000000-0000-0000-0000-0000000c11e7"
+
+# (label, statement, {table: expected index})
+QUERIES = [
+    ("stats of one business day (sql_stats.range_query)", sql_stats.range_query(DAY_START, DAY_END), {
+        "gaming_sessions": {"idx_gaming_sessions_status_created", "idx_gaming_sessions_created"},
+        "sales": {"idx_sales_created"},
+        "service_requests": {"idx_service_requests_status_created"},
+    }),
+    ("active sessions (session_state resync)",
+     select(GamingSession.id, GamingSession.console_id).where(GamingSession.status == "active"),
+     {"gaming_sessions": {"idx_gaming_sessions_status_created"}}),
+    ("sales page of a period (stats / analytics / export)",
+     select(Sale.id, Sale.created_at, Sale.total_amount)
+     .where(Sale.created_at >= DAY_START, Sale.created_at < DAY_END)
+     .order_by(Sale.created_at, Sale.id).limit(1000),
+     {"sales": {"idx_sales_created"}}),
+    ("rollup feed sales.updated_at",
+     select(Sale.id, Sale.created_at, Sale.updated_at)
+     .where(or_(Sale.updated_at > DAY_START, and_(Sale.updated_at == DAY_START, Sale.id > CLIENT_ID)))
+     .order_by(Sale.updated_at, Sale.id).limit(1000),
+     {"sales": {"idx_sales_updated"}}),
+    ("rollup feed service_requests.updated_at",
+     select(ServiceRequest.id, ServiceRequest.created_at, ServiceRequest.updated_at)
+     .where(or_(ServiceRequest.updated_at > DAY_START,
+                and_(ServiceRequest.updated_at == DAY_START, ServiceRequest.id > CLIENT_ID)))
+     .order_by(ServiceRequest.updated_at, ServiceRequest.id).limit(1000),
+     {"service_requests": {"idx_service_requests_updated"}}),
+    ("delta export page of gaming_sessions (table_export since=...)",
+     select(GamingSession).where(or_(GamingSession.updated_at > DAY_START,
+                                     and_(GamingSession.updated_at == DAY_START, GamingSession.id > CLIENT_ID)))
+     .order_by(GamingSession.updated_at, GamingSession.id).limit(1000),
+     {"gaming_sessions": {"idx_gaming_sessions_updated"}}),
+    ("points history of a client",
+     select(PointsTransaction).where(PointsTransaction.client_id == CLIENT_ID)
+     .order_by(PointsTransaction.created_at.desc()).limit(50),
+     {"points_transactions": {"idx_points_transactions_client_created"}}),
+    ("expenses page after a cursor (GET /expenses/)",
+     select(Expense).where(or_(Expense.date < DAY_START.date(), and_(Expense.date == DAY_START.date(), Expense.id < CLIENT_ID)))
+     .order_by(Expense.date.desc(), Expense.id.desc()).limit(51),
+     {"expenses": {"idx_expenses_date"}}),
+    ("OTP check (otp_store consume)",
+     update(VerificationCode).where(VerificationCode.identifier == "user@example.com", VerificationCode.code == "123456",
+                                    VerificationCode.is_verified.is_(False), VerificationCode.expires_at > NOW)
+     .values(is_verified=True),
+     {"verification_codes": {"idx_verification_codes_lookup"}}),
+]
+
+SEED_SQL = f"""
+INSERT INTO public.consoles (name, station_number, console_type) VALUES ('index-check', 998, 'ps5');
+INSERT INTO public.pricing (name, console_type, price_type, price) VALUES ('index-check', 'ps5', 'fixed', 5);
+INSERT INTO public.products (name, category, price) VALUES ('index-check', 'check', 2.5);
+INSERT INTO public.services_catalog (name, category) VALUES ('index-check', 'check');
+INSERT INTO public.clients (id, name, phone) VALUES ('{CLIENT_ID}', 'index-check', 'index-check');
+INSERT INTO public.clients (name, phone) SELECT 'index-check', 'index-check-' || i FROM generate_series(1, 500) i;
+
+CREATE TEMP TABLE seed_times ON COMMIT DROP AS
+  SELECT '{SEED_END.isoformat()}'::timestamptz - make_interval(secs => i * 86400.0 * {SEED_DAYS} / {SEED_DAYS * SEED_ROWS_PER_DAY}) AS t,
+         (ARRAY['completed', 'completed', 'completed', 'completed', 'cancelled'])[1 + i % 5] AS status
+  FROM generate_series(1, {SEED_DAYS * SEED_ROWS_PER_DAY}) i;
+
+INSERT INTO public.gaming_sessions (console_id, pricing_id, staff_id, session_type, total_amount, status, end_time, created_at, updated_at)
+  SELECT c.id, p.id, u.id, 'fixed', 5, s.status, s.t + interval '1 hour', s.t, s.t + interval '1 hour'
+  FROM seed_times s, (SELECT id FROM public.consoles WHERE name = 'index-check') c,
+       (SELECT id FROM public.pricing WHERE name = 'index-check') p, (SELECT id FROM auth.users LIMIT 1) u;
+INSERT INTO public.sales (product_id, staff_id, unit_price, total_amount, created_at, updated_at)
+  SELECT p.id, u.id, 2.5, 2.5, s.t, s.t
+  FROM seed_times s, (SELECT id FROM public.products WHERE name = 'index-check') p, (SELECT id FROM auth.users LIMIT 1) u;
+INSERT INTO public.service_requests (service_id, client_name, client_phone, staff_id, issue_description, final_cost, status, created_at, updated_at)
+  SELECT sc.id, 'index-check', '0', u.id, 'check', 10, s.status, s.t, s.t
+  FROM seed_times s, (SELECT id FROM public.services_catalog WHERE name = 'index-check') sc, (SELECT id FROM auth.users LIMIT 1) u;
+INSERT INTO public.points_transactions (client_id, transaction_type, amount, balance_after, created_at)
+  SELECT c.id, 'earned', 1, 1, s.t
+  FROM (SELECT t, row_number() OVER () AS n FROM seed_times) s
+  JOIN (SELECT id, row_number() OVER () AS n FROM public.clients WHERE name = 'index-check') c ON c.n = 1 + s.n % 501;
+INSERT INTO public.verification_codes (identifier, code, expires_at, is_verified, created_at)
+  SELECT 'user' || (i % 5000) || '@example.com', lpad((i % 1000000)::text, 6, '0'),
+         t + interval '10 minutes', true, t
+  FROM (SELECT t, row_number() OVER () AS i FROM seed_times) s;
+INSERT INTO public.expenses (name, amount, category, date)
+  SELECT 'index-check', 12.5, (ARRAY['daily', 'monthly', 'other'])[1 + i % 3], t::date
+  FROM (SELECT t, row_number() OVER () AS i FROM seed_times) s;
+
+ANALYZE public.gaming_sessions, public.sales, public.service_requests, public.points_transactions, public.verification_codes,
+        public.expenses;
+"""
+
+
+def scans(plan: dict):
+    """Yields (node type, table, index) of every scan node of a JSON plan."""
+    if plan["Node Type"].endswith("Scan") and ("Relation Name" in plan or "Index Name" in plan):
+        yield plan["Node Type"], plan.get("Relation Name"), plan.get("Index Name")
+    for child in plan.get("Plans", []):
+        yield from scans(child)
+
+
+def index_tables(conn) -> dict:
+    rows = conn.execute(text("SELECT indexname, tablename FROM pg_indexes WHERE schemaname = 'public'"))
+    return dict(rows.all())
+
+
+def main():
+    seed = "--no-seed" not in sys.argv
+    if not os.getenv("DATABASE_URL") or engine.dialect.name != "postgresql":
+        sys.exit("Set DATABASE_URL to a Postgres database with docs/database_schema.sql applied")
+
+    ok = True
+    with engine.connect() as conn:
+        trans = conn.begin()
+        try:
+            if seed:
+                print(f"seeding {SEED_DAYS * SEED_ROWS_PER_DAY} rows per table (rolled back afterwards)...")
+                conn.execute(text(SEED_SQL))
+            index_table = index_tables(conn)
+
+            for label, statement, expected in QUERIES:
+                compiled = statement.compile(dialect=conn.dialect)
+                plan = conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + compiled.string, compiled.params).scalar()[0]["Plan"]
+
+                used = {}
+                for node, table, index in scans(plan):
+                    table = table or index_table.get(index)
+                    used.setdefault(table, []).append((node, index))
+
+                print(f"\n{label}")
+                for table, indexes in expected.items():
+                    nodes = used.get(table, [])
+                    passed = bool(nodes) and all(node in INDEX_SCANS and index in indexes for node, index in nodes)
+                    ok = ok and passed
+                    shown = ", ".join(f"{node} {index or ''}".strip() for node, index in nodes) or "not scanned"
+                    print(f"  {'✅' if passed else '❌'} {table}: {shown}")
+        finally:
+            trans.rollback()
+
+    print("\n✅ All queries use their indexes" if ok else "\n❌ Some queries do not use their indexes")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
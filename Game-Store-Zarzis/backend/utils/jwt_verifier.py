@@ -0,0 +1,183 @@
+"""
+Local Supabase JWT verification
+
+Checks the signature and expiry of Supabase access tokens in-process, so
+authenticated routes don't need a round-trip to Supabase Auth per request.
+Supports the legacy shared JWT secret (HS256) and asymmetric signing keys
+published on the project's JWKS endpoint (RS256 / ES256), with key rotation.
+"""
+
+import os
+import time
+import asyncio
+import logging
+from typing import Optional
+
+from jose import jwt, JWTError, ExpiredSignatureError
+
+from services.supabase_client import AsyncSupabaseSingleton
+
+logger = logging.getLogger(__name__)
+
+SUPABASE_URL = os.environ.get("SUPABASE_URL", "")
+SUPABASE_JWT_SECRET = os.environ.get("SUPABASE_JWT_SECRET", "")
+JWT_AUDIENCE = os.environ.get("SUPABASE_JWT_AUDIENCE", "authenticated")
+JWKS_CACHE_TTL = int(os.environ.get("JWKS_CACHE_TTL", "600"))  # seconds
+JWKS_MIN_REFRESH_INTERVAL = int(os.environ.get("JWKS_MIN_REFRESH_INTERVAL", "30"))  # seconds
+JWT_LEEWAY = int(os.environ.get("JWT_LEEWAY", "10"))  # seconds of clock skew tolerated
+
+ALLOWED_ALGORITHMS = ("HS256", "RS256", "ES256")
+
+
+class TokenVerificationError(Exception):
+    """Token is malformed, expired or has an invalid signature."""
+
+
+class UnknownKeyError(Exception):
+    """No local key can verify the token; the caller should ask Supabase Auth."""
+
+
+class JWKSCache:
+    """
+    Caches the signing keys published on the Supabase JWKS endpoint.
+
+    Keys are refreshed when the TTL expires, or early when a token carries an
+    unknown `kid` (key rotation). Early refreshes are throttled so random kids
+    can't be used to hammer the endpoint.
+
+    Refreshes go through the pooled httpx client shared with Supabase and are
+    awaited, so they never block the event loop; an asyncio.Lock makes
+    concurrent requests wait for one refresh instead of each starting their
+    own, while requests whose key is cached don't take the lock at all.
+    """
+
+    def __init__(self, jwks_url: str, ttl: int = JWKS_CACHE_TTL, min_refresh_interval: int = JWKS_MIN_REFRESH_INTERVAL,
+                 get_http=AsyncSupabaseSingleton.get_http):
+        self.jwks_url = jwks_url
+        self.ttl = ttl
+        self.min_refresh_interval = min_refresh_interval
+        self.get_http = get_http
+        self._keys: dict = {}
+        self._fetched_at = 0.0
+        self._lock = asyncio.Lock()
+
+    def _is_stale(self) -> bool:
+        return time.monotonic() - self._fetched_at > self.ttl
+
+    async def _refresh(self) -> None:
+        try:
+            http = await self.get_http()
+            response = await http.get(self.jwks_url, timeout=5)
+            response.raise_for_status()
+            keys = {k["kid"]: k for k in response.json().get("keys", []) if k.get("kid")}
+            self._keys = keys
+            logger.info(f"JWKS refreshed: {len(keys)} signing key(s) cached")
+        except Exception as e:
+            # Keep serving the previous keys; a stale key set beats none
+            logger.error(f"JWKS refresh failed: {e}")
+        finally:
+            self._fetched_at = time.monotonic()
+
+    async def get_key(self, kid: Optional[str]) -> Optional[dict]:
+        if not kid:
+            return None
+
+        key = self._keys.get(kid)
+        if key is not None and not self._is_stale():
+            return key
+
+        async with self._lock:
+            # Another request may have refreshed while this one waited
+            if self._is_stale():
+                await self._refresh()
+
+            key = self._keys.get(kid)
+            if key is None and time.monotonic() - self._fetched_at > self.min_refresh_interval:
+                # Unknown kid: the project may have rotated its signing key
+                await self._refresh()
+                key = self._keys.get(kid)
+
+            return key
+
+
+class JWTVerifier:
+    """Verifies Supabase access tokens against locally cached keys."""
+
+    def __init__(self, secret: str = "", jwks: Optional[JWKSCache] = None, audience: str = JWT_AUDIENCE, issuer: Optional[str] = None, leeway: int = JWT_LEEWAY):
+        self.secret = secret
+        self.jwks = jwks
+        self.audience = audience
+        self.issuer = issuer
+        self.leeway = leeway
+
+    async def _resolve_key(self, header: dict):
+        alg = header.get("alg")
+        if alg not in ALLOWED_ALGORITHMS:
+            raise TokenVerificationError(f"Unsupported signing algorithm: {alg}")
+
+        if alg == "HS256":
+            if not self.secret:
+                raise UnknownKeyError("No JWT secret configured")
+            return self.secret
+
+        key = await self.jwks.get_key(header.get("kid")) if self.jwks else None
+        if key is None:
+            raise UnknownKeyError(f"Unknown signing key id: {header.get('kid')}")
+        return key
+
+    async def verify(self, token: str) -> dict:
+        """
+        Returns the token claims if the signature, audience and expiry are valid.
+        Raises UnknownKeyError when the token must be checked remotely instead.
+        """
+        try:
+            header = jwt.get_unverified_header(token)
+        except JWTError as e:
+            raise TokenVerificationError(f"Malformed token: {e}")
+
+        key = await self._resolve_key(header)
+
+        try:
+            return jwt.decode(
+                token,
+                key,
+                algorithms=[header["alg"]],
+                audience=self.audience,
+                issuer=self.issuer,
+                options={"leeway": self.leeway},
+            )
+        except ExpiredSignatureError:
+            raise TokenVerificationError("Token expired")
+        except JWTError as e:
+            raise TokenVerificationError(str(e))
+
+
+class LocalUser:
+    """Subset of the supabase-py `User` built from verified token claims."""
+
+    def __init__(self, claims: dict):
+        self.id = claims.get("sub")
+        self.email = claims.get("email")
+        self.phone = claims.get("phone")
+        self.role = claims.get("role")
+        self.app_metadata = claims.get("app_metadata") or {}
+        self.user_metadata = claims.get("user_metadata") or {}
+        self.claims = claims
+
+
+class LocalUserResponse:
+    """Mirrors supabase-py `UserResponse` so callers can keep using `.user`."""
+
+    def __init__(self, claims: dict):
+        self.user = LocalUser(claims)
+
+
+def build_default_verifier() -> JWTVerifier:
+    base_url = SUPABASE_URL.rstrip("/")
+    jwks = JWKSCache(f"{base_url}/auth/v1/.well-known/jwks.json") if base_url else None
+    issuer = f"{base_url}/auth/v1" if base_url else None
+    return JWTVerifier(secret=SUPABASE_JWT_SECRET, jwks=jwks, issuer=issuer)
+
+
+# Singleton instance
+jwt_verifier = build_default_verifier()
@@ -1,4 +1,80 @@
+"""
+Rate limiter shared by all routers.
+
+Counters live in RATE_LIMIT_STORAGE_URI. The default memory:// counts in each
+process, so with N workers or instances a "3/minute" limit really allows
+3×N. Point it at a Redis (redis://, rediss://, redis+sentinel://) or
+memcached (memcached://) server to share the counters between processes.
+
+The default moving-window strategy on Redis is a single Lua script call per
+check. Memcached cannot do a moving window, so it uses the
+sliding-window-counter approximation instead.
+
+If the shared store stops answering, requests are counted in process memory
+with the same limits, and the store is pinged again with exponential backoff
+(slowapi's in-memory fallback). RATE_LIMIT_TIMEOUT caps how long a request
+waits for the store before that happens.
+"""
+
+import os
+import logging
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 
-limiter = Limiter(key_func=get_remote_address, default_limits=["60/minute"])
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_STORAGE_URI = os.getenv("RATE_LIMIT_STORAGE_URI", "memory://")
+RATE_LIMIT_STRATEGY = os.getenv("RATE_LIMIT_STRATEGY", "moving-window")  # moving-window | sliding-window-counter | fixed-window
+RATE_LIMIT_TIMEOUT = float(os.getenv("RATE_LIMIT_TIMEOUT", "0.25"))  # seconds, connect/read timeout of the shared store
+RATE_LIMIT_KEY_PREFIX = os.getenv("RATE_LIMIT_KEY_PREFIX", "gsz")
+DEFAULT_LIMITS = ["60/minute"]
+
+
+def _scheme(uri: str) -> str:
+    return uri.split("://", 1)[0].lower()
+
+
+def _storage_options(uri: str, timeout: float) -> dict:
+    scheme = _scheme(uri)
+    if scheme.startswith("redis"):
+        return {"socket_connect_timeout": timeout, "socket_timeout": timeout}
+    if scheme == "memcached":
+        return {"connect_timeout": timeout, "timeout": timeout}
+    return {}
+
+
+def _strategy(uri: str, strategy: str) -> str:
+    if _scheme(uri) == "memcached" and strategy == "moving-window":
+        return "sliding-window-counter"
+    return strategy
+
+
+def build_limiter(storage_uri: str = RATE_LIMIT_STORAGE_URI, strategy: str = RATE_LIMIT_STRATEGY,
+                  timeout: float = RATE_LIMIT_TIMEOUT, key_prefix: str = RATE_LIMIT_KEY_PREFIX) -> Limiter:
+    shared = _scheme(storage_uri) != "memory"
+    try:
+        return Limiter(
+            key_func=get_remote_address,
+            default_limits=DEFAULT_LIMITS,
+            strategy=_strategy(storage_uri, strategy),
+            storage_uri=storage_uri,
+            storage_options=_storage_options(storage_uri, timeout),
+            in_memory_fallback_enabled=shared,
+            key_prefix=key_prefix if shared else "",
+        )
+    except Exception as e:
+        # Unknown scheme or missing client library: still limit, per process
+        logger.error(f"Rate limit storage {_scheme(storage_uri)}:// unusable, counting in memory: {e}")
+        return Limiter(key_func=get_remote_address, default_limits=DEFAULT_LIMITS, strategy=strategy)
+
+
+def limiter_status(limiter: Limiter) -> dict:
+    return {
+        "storage": _scheme(limiter._storage_uri or "memory://"),
+        "strategy": limiter._strategy,
+        # slowapi flags the shared store as dead while it counts in memory
+        "fallback": bool(getattr(limiter, "_storage_dead", False)),
+    }
+
+
+limiter = build_limiter()
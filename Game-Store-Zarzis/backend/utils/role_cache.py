@@ -0,0 +1,81 @@
+"""
+In-process cache for `user_roles` lookups
+
+Bounded LRU with per-entry TTL, used by `require_admin` so admin requests
+don't query `user_roles` every time. Users without a role are cached too
+(negative caching) with a shorter TTL.
+"""
+
+import os
+import time
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+ROLE_CACHE_MAXSIZE = int(os.environ.get("ROLE_CACHE_MAXSIZE", "1024"))
+ROLE_CACHE_TTL = int(os.environ.get("ROLE_CACHE_TTL", "60"))  # seconds
+ROLE_CACHE_NEGATIVE_TTL = int(os.environ.get("ROLE_CACHE_NEGATIVE_TTL", "15"))  # seconds
+
+
+class RoleCache:
+    # Returned by get() when the user isn't cached (None means "cached: no role")
+    MISS = object()
+
+    def __init__(self, maxsize: int = ROLE_CACHE_MAXSIZE, ttl: int = ROLE_CACHE_TTL, negative_ttl: int = ROLE_CACHE_NEGATIVE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, user_id: str):
+        """Returns the cached role (or None for "no role"), or RoleCache.MISS."""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[1] < time.monotonic():
+                if entry is not None:
+                    del self._entries[user_id]
+                self.misses += 1
+                return self.MISS
+
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, user_id: str, role: Optional[str]) -> None:
+        ttl = self.ttl if role else self.negative_ttl
+        with self._lock:
+            self._entries[user_id] = (role, time.monotonic() + ttl)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, user_id: str) -> None:
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "negative_ttl_seconds": self.negative_ttl,
+            }
+
+
+# Singleton instance
+role_cache = RoleCache()
@@ -1,31 +1,57 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from supabase import Client, create_client
 import os
 from typing import Optional
-
-# Initialize Supabase client
-url: str = os.environ.get("SUPABASE_URL")
-key: str = os.environ.get("SUPABASE_SERVICE_KEY")
-supabase: Client = create_client(url, key)
+from services.supabase_client import get_async_supabase
 
 security = HTTPBearer()
 
 import logging
+from utils.jwt_verifier import jwt_verifier, LocalUserResponse, TokenVerificationError, UnknownKeyError
+from utils.role_cache import role_cache, RoleCache
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 'local' checks JWT signature/expiry in-process, 'remote' always asks Supabase Auth
+AUTH_VERIFY_MODE = os.environ.get("AUTH_VERIFY_MODE", "local").lower()
+
+async def verify_token_locally(token: str) -> Optional[LocalUserResponse]:
+    """
+    Verifies the token against the cached JWT secret / JWKS keys.
+    Returns None when no local key matches, so the caller falls back to Supabase Auth.
+    """
+    if AUTH_VERIFY_MODE != "local":
+        return None
+    try:
+        return LocalUserResponse(await jwt_verifier.verify(token))
+    except UnknownKeyError as e:
+        logger.info(f"Local JWT verification unavailable, falling back to Supabase Auth: {e}")
+        return None
+    except TokenVerificationError as e:
+        logger.warning(f"Authentication failed: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authentication credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     """
-    Validates the Bearer token against Supabase Auth.
+    Validates the Bearer token, locally when a signing key is cached,
+    otherwise against Supabase Auth.
     Returns the user object if valid, raises HTTPException otherwise.
     """
     token = credentials.credentials
+    local_user = await verify_token_locally(token)
+    if local_user:
+        return local_user
+
     try:
         # Verify the token by getting the user
-        user = supabase.auth.get_user(token)
+        supabase = await get_async_supabase()
+        user = await supabase.auth.get_user(token)
         if not user:
             logger.warning("Authentication failed: Invalid credentials provided")
             raise HTTPException(
@@ -34,6 +60,8 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
                 headers={"WWW-Authenticate": "Bearer"},
             )
         return user
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Authentication exception: {str(e)}")
         raise HTTPException(
@@ -42,28 +70,40 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+async def get_user_role(supabase, user_id: str) -> Optional[str]:
+    """Role of a user (cache first, then database); None when no role is assigned."""
+    role = role_cache.get(user_id)
+    if role is RoleCache.MISS:
+        response = await supabase.table("user_roles").select("role").eq("user_id", user_id).limit(1).execute()
+        role = response.data[0]["role"] if response.data else None
+        role_cache.set(user_id, role)
+    return role
+
 async def require_admin(credentials: HTTPAuthorizationCredentials = Depends(security)):
     """
     Validates the token and checks if the user has 'owner' role.
+    Roles are served from the in-process role cache when possible.
     """
     try:
-        user_response = supabase.auth.get_user(credentials.credentials)
+        token = credentials.credentials
+        supabase = await get_async_supabase()
+        user_response = await verify_token_locally(token) or await supabase.auth.get_user(token)
         if not user_response or not user_response.user:
              logger.warning("Auth Error: Invalid or missing user response in require_admin")
              raise HTTPException(status_code=401, detail="Invalid token")
         
         user_id = user_response.user.id
         
-        # Check role in database
+        # Check role (cache first, then database)
         try:
-            response = supabase.table("user_roles").select("role").eq("user_id", user_id).single().execute()
+            role = await get_user_role(supabase, user_id)
             
-            if not response.data:
+            if not role:
                 logger.warning(f"Access denied: No role found for user {user_id}")
                 raise HTTPException(status_code=403, detail="No role assigned to user")
             
-            if response.data['role'] != 'owner':
-                logger.warning(f"Access denied: User {user_id} has role '{response.data['role']}', owner required")
+            if role != 'owner':
+                logger.warning(f"Access denied: User {user_id} has role '{role}', owner required")
                 raise HTTPException(status_code=403, detail="Admin privileges required")
                 
             logger.info(f"Admin access granted to user {user_id}")
@@ -81,3 +121,32 @@ async def require_admin(credentials: HTTPAuthorizationCredentials = Depends(secu
         logger.error(f"Auth Error Details in require_admin: {type(e).__name__}: {str(e)}")
         raise HTTPException(status_code=401, detail="Authentication error")
 
+async def require_staff(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    """
+    Validates the token and checks the user is staff ('owner' or 'worker').
+    """
+    try:
+        token = credentials.credentials
+        supabase = await get_async_supabase()
+        user_response = await verify_token_locally(token) or await supabase.auth.get_user(token)
+        if not user_response or not user_response.user:
+             logger.warning("Auth Error: Invalid or missing user response in require_staff")
+             raise HTTPException(status_code=401, detail="Invalid token")
+
+        user_id = user_response.user.id
+        try:
+            role = await get_user_role(supabase, user_id)
+        except Exception as role_error:
+            logger.error(f"Role check error for user {user_id}: {str(role_error)}")
+            raise HTTPException(status_code=500, detail="Role verification failed")
+
+        if role not in ("owner", "worker"):
+            logger.warning(f"Access denied: User {user_id} is not staff")
+            raise HTTPException(status_code=403, detail="Staff privileges required")
+        return user_response.user
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Auth Error Details in require_staff: {type(e).__name__}: {str(e)}")
+        raise HTTPException(status_code=401, detail="Authentication error")
@@ -14,6 +14,7 @@ CREATE TYPE public.app_role AS ENUM ('owner', 'worker');
 CREATE TABLE public.profiles (
     id UUID REFERENCES auth.users ON DELETE CASCADE PRIMARY KEY,
     full_name TEXT NOT NULL,
+    email TEXT,
     avatar_url TEXT,
     phone TEXT,
     is_active BOOLEAN DEFAULT true,
@@ -34,6 +35,7 @@ CREATE TABLE public.clients (
     id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
     name TEXT NOT NULL,
     phone TEXT NOT NULL UNIQUE,
+    email TEXT, -- Optional, recipient of bulk notifications (/api/notifications)
     points INTEGER DEFAULT 0,
     total_spent DECIMAL(12,3) DEFAULT 0,
     total_games_played INTEGER DEFAULT 0,
@@ -114,8 +116,13 @@ CREATE TABLE public.gaming_sessions (
     status TEXT DEFAULT 'active',
     is_free_game BOOLEAN DEFAULT false,
     notes TEXT,
-    created_at TIMESTAMPTZ DEFAULT now() NOT NULL
+    created_at TIMESTAMPTZ DEFAULT now() NOT NULL,
+    updated_at TIMESTAMPTZ DEFAULT now() NOT NULL -- Kept current by the set_updated_at trigger
 );
+-- Dashboard: completed revenue and active sessions by status; counts, exports and rollup feeds by time
+CREATE INDEX idx_gaming_sessions_status_created ON public.gaming_sessions(status, created_at);
+CREATE INDEX idx_gaming_sessions_created ON public.gaming_sessions(created_at, id);
+CREATE INDEX idx_gaming_sessions_updated ON public.gaming_sessions(updated_at, id);
 
 -- sales: Specific product sale transactions
 CREATE TABLE public.sales (
@@ -130,8 +137,11 @@ CREATE TABLE public.sales (
     points_earned INTEGER DEFAULT 0,
     points_used INTEGER DEFAULT 0,
     notes TEXT,
-    created_at TIMESTAMPTZ DEFAULT now() NOT NULL
+    created_at TIMESTAMPTZ DEFAULT now() NOT NULL,
+    updated_at TIMESTAMPTZ DEFAULT now() NOT NULL -- Kept current by the set_updated_at trigger
 );
+CREATE INDEX idx_sales_created ON public.sales(created_at, id);
+CREATE INDEX idx_sales_updated ON public.sales(updated_at, id);
 
 -- expenses: Store costs tracking
 CREATE TABLE public.expenses (
@@ -144,6 +154,7 @@ CREATE TABLE public.expenses (
     created_at TIMESTAMPTZ DEFAULT now() NOT NULL,
     updated_at TIMESTAMPTZ DEFAULT now() NOT NULL
 );
+CREATE INDEX idx_expenses_date ON public.expenses(date, id);
 
 -- services_catalog: Catalog of repair/technical services
 CREATE TABLE public.services_catalog (
@@ -190,6 +201,8 @@ CREATE TABLE public.service_requests (
     created_at TIMESTAMPTZ DEFAULT now() NOT NULL,
     updated_at TIMESTAMPTZ DEFAULT now() NOT NULL
 );
+CREATE INDEX idx_service_requests_status_created ON public.service_requests(status, created_at);
+CREATE INDEX idx_service_requests_updated ON public.service_requests(updated_at, id);
 
 -- points_transactions: Log of point changes
 CREATE TABLE public.points_transactions (
@@ -206,6 +219,7 @@ CREATE TABLE public.points_transactions (
     confirmed_by_client BOOLEAN DEFAULT false,
     created_at TIMESTAMPTZ DEFAULT now() NOT NULL
 );
+CREATE INDEX idx_points_transactions_client_created ON public.points_transactions(client_id, created_at);
 
 -- staff_shifts: Attendance tracking
 CREATE TABLE public.staff_shifts (
@@ -261,10 +275,15 @@ CREATE TABLE public.orders (
     payment_reference TEXT,
     payment_status TEXT DEFAULT 'pending', -- 'pending', 'paid', 'failed'
     status TEXT DEFAULT 'pending' NOT NULL, -- 'pending', 'processing', 'completed', 'cancelled'
+    status_reason TEXT, -- Why the pipeline cancelled the order, e.g. 'insufficient_stock:<product_id>'
+    stock_reserved BOOLEAN DEFAULT false NOT NULL, -- Stock taken by process_order, given back on cancel
+    idempotency_key TEXT UNIQUE, -- Set by POST /api/orders so retried submissions create one order
+    request_hash TEXT, -- Fingerprint of that submission: a retry is only replayed when it matches
     notes TEXT,
     created_at TIMESTAMPTZ DEFAULT now() NOT NULL,
     updated_at TIMESTAMPTZ DEFAULT now() NOT NULL
 );
+CREATE INDEX idx_orders_status_created ON public.orders(status, created_at);
 
 
 -- daily_stats: Cached stats for reporting
@@ -282,6 +301,35 @@ CREATE TABLE public.daily_stats (
     updated_at TIMESTAMPTZ DEFAULT now() NOT NULL
 );
 
+-- checkout_requests: Idempotency records of /api/sales/checkout
+CREATE TABLE public.checkout_requests (
+    idempotency_key TEXT PRIMARY KEY,
+    request_hash TEXT NOT NULL,
+    response JSONB NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT now() NOT NULL
+);
+
+-- verification_codes: Email/SMS one-time codes (OTP_STORE=supabase, services/otp_store.py)
+CREATE TABLE public.verification_codes (
+    id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
+    identifier TEXT NOT NULL, -- Email address or phone number
+    code TEXT NOT NULL,
+    expires_at TIMESTAMPTZ NOT NULL,
+    is_verified BOOLEAN DEFAULT false NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT now() NOT NULL
+);
+CREATE INDEX idx_verification_codes_lookup ON public.verification_codes(identifier, code, expires_at);
+
+-- catalogue_version_*: Change counters of the public catalogue tables, read by /api/catalogue.
+-- Sequences rather than a counter row, so concurrent writers never wait on each other.
+CREATE SEQUENCE public.catalogue_version_products;
+CREATE SEQUENCE public.catalogue_version_services_catalog;
+CREATE SEQUENCE public.catalogue_version_pricing;
+CREATE SEQUENCE public.catalogue_version_consoles;
+
+-- store_settings_version: Change counter of store_settings, polled by the backend settings snapshot
+CREATE SEQUENCE public.store_settings_version;
+
 -- ==========================================
 -- 3. FUNCTIONS
 -- ==========================================
@@ -308,6 +356,16 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql SECURITY DEFINER;
 
+-- fn: set_updated_at - Stamps updated_at on every UPDATE (BEFORE UPDATE trigger), whoever writes the
+-- row: RPCs, the backend or the dashboard. Delta exports and the stats rollup feeds rely on it.
+CREATE OR REPLACE FUNCTION public.set_updated_at()
+RETURNS TRIGGER AS $$
+BEGIN
+  NEW.updated_at := now();
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
 -- fn: decrement_stock - Atomic stock decrease
 CREATE OR REPLACE FUNCTION public.decrement_stock(product_id UUID, qty INTEGER)
 RETURNS VOID AS $$
@@ -318,6 +376,507 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql;
 
+-- fn: increment_client_stats - Atomic client totals increase
+CREATE OR REPLACE FUNCTION public.increment_client_stats(p_client_id UUID, p_spent DECIMAL, p_games INTEGER)
+RETURNS VOID AS $$
+BEGIN
+  UPDATE public.clients
+  SET total_spent = COALESCE(total_spent, 0) + p_spent,
+      total_games_played = COALESCE(total_games_played, 0) + p_games,
+      updated_at = now()
+  WHERE id = p_client_id;
+END;
+$$ LANGUAGE plpgsql;
+
+-- fn: start_gaming_session - Create a session and occupy its console in one transaction
+CREATE OR REPLACE FUNCTION public.start_gaming_session(
+  p_console_id UUID, p_pricing_id UUID, p_staff_id UUID, p_session_type TEXT,
+  p_client_id UUID DEFAULT NULL, p_is_free_game BOOLEAN DEFAULT false, p_notes TEXT DEFAULT NULL
+)
+RETURNS JSONB AS $$
+DECLARE
+  v_console public.consoles%ROWTYPE;
+  v_session public.gaming_sessions%ROWTYPE;
+BEGIN
+  -- Row lock serializes concurrent starts on the same console
+  SELECT * INTO v_console FROM public.consoles WHERE id = p_console_id FOR UPDATE;
+  IF NOT FOUND THEN
+    RAISE EXCEPTION 'console_not_found';
+  END IF;
+  IF EXISTS (SELECT 1 FROM public.gaming_sessions WHERE console_id = p_console_id AND status = 'active') THEN
+    RAISE EXCEPTION 'console_busy';
+  END IF;
+
+  INSERT INTO public.gaming_sessions (console_id, client_id, pricing_id, staff_id, session_type, status, start_time, is_free_game, notes)
+  VALUES (p_console_id, p_client_id, p_pricing_id, p_staff_id, p_session_type, 'active', now(), p_is_free_game, p_notes)
+  RETURNING * INTO v_session;
+
+  UPDATE public.consoles
+  SET status = 'in_use', current_session_id = v_session.id, updated_at = now()
+  WHERE id = p_console_id;
+
+  RETURN to_jsonb(v_session);
+END;
+$$ LANGUAGE plpgsql;
+
+-- fn: end_gaming_session - Complete a session, free its console and update client totals atomically
+CREATE OR REPLACE FUNCTION public.end_gaming_session(
+  p_session_id UUID, p_total_amount DECIMAL, p_games_played INTEGER DEFAULT 0,
+  p_extra_time_minutes INTEGER DEFAULT 0, p_extra_amount DECIMAL DEFAULT 0, p_points_earned INTEGER DEFAULT 0,
+  p_payment_method TEXT DEFAULT 'cash', p_points_used INTEGER DEFAULT 0, p_client_id UUID DEFAULT NULL
+)
+RETURNS JSONB AS $$
+DECLARE
+  v_session public.gaming_sessions%ROWTYPE;
+BEGIN
+  SELECT * INTO v_session FROM public.gaming_sessions WHERE id = p_session_id FOR UPDATE;
+  IF NOT FOUND THEN
+    RAISE EXCEPTION 'session_not_found';
+  END IF;
+  IF v_session.status <> 'active' THEN
+    RAISE EXCEPTION 'session_not_active';
+  END IF;
+
+  UPDATE public.gaming_sessions
+  SET status = 'completed', end_time = now(), total_amount = p_total_amount,
+      games_played = COALESCE(p_games_played, 0), extra_time_minutes = COALESCE(p_extra_time_minutes, 0),
+      extra_amount = COALESCE(p_extra_amount, 0), points_earned = COALESCE(p_points_earned, 0),
+      payment_method = COALESCE(p_payment_method, 'cash'), points_used = COALESCE(p_points_used, 0),
+      client_id = p_client_id
+  WHERE id = p_session_id
+  RETURNING * INTO v_session;
+
+  UPDATE public.consoles
+  SET status = 'available', current_session_id = NULL, updated_at = now()
+  WHERE id = v_session.console_id AND (current_session_id = p_session_id OR current_session_id IS NULL);
+
+  IF p_client_id IS NOT NULL THEN
+    PERFORM public.increment_client_stats(p_client_id, p_total_amount, GREATEST(COALESCE(p_games_played, 0), 1));
+  END IF;
+
+  RETURN to_jsonb(v_session);
+END;
+$$ LANGUAGE plpgsql;
+
+-- fn: add_games_to_session - Update the game count / extra time of an active session
+CREATE OR REPLACE FUNCTION public.add_games_to_session(
+  p_session_id UUID, p_games_played INTEGER, p_extra_time_minutes INTEGER DEFAULT 0, p_extra_amount DECIMAL DEFAULT 0
+)
+RETURNS JSONB AS $$
+DECLARE
+  v_session public.gaming_sessions%ROWTYPE;
+BEGIN
+  UPDATE public.gaming_sessions
+  SET games_played = p_games_played, extra_time_minutes = COALESCE(p_extra_time_minutes, 0),
+      extra_amount = COALESCE(p_extra_amount, 0)
+  WHERE id = p_session_id AND status = 'active'
+  RETURNING * INTO v_session;
+  IF NOT FOUND THEN
+    RAISE EXCEPTION 'session_not_active';
+  END IF;
+
+  RETURN to_jsonb(v_session);
+END;
+$$ LANGUAGE plpgsql;
+
+-- fn: checkout_sale - Sell a whole basket in one transaction
+-- p_items: [{"product_id": uuid, "quantity": int}, ...]
+-- Locks the products (in id order, so concurrent baskets cannot deadlock),
+-- checks and decrements stock, inserts one sales row per product and books
+-- points spent/earned. Points beyond the basket value are not spent: the
+-- client is debited what the discount actually used. A repeated idempotency
+-- key returns the stored result.
+CREATE OR REPLACE FUNCTION public.checkout_sale(
+  p_idempotency_key TEXT, p_request_hash TEXT, p_staff_id UUID, p_items JSONB,
+  p_client_id UUID DEFAULT NULL, p_payment_method TEXT DEFAULT 'cash', p_points_used INTEGER DEFAULT 0,
+  p_points_per_dt INTEGER DEFAULT 1000, p_notes TEXT DEFAULT NULL
+)
+RETURNS JSONB AS $$
+DECLARE
+  v_existing public.checkout_requests%ROWTYPE;
+  v_basket JSONB;
+  v_line RECORD;
+  v_sale public.sales%ROWTYPE;
+  v_sales JSONB := '[]'::jsonb;
+  v_subtotal DECIMAL(12,3) := 0;
+  v_discount DECIMAL(12,3);
+  v_line_discount DECIMAL(12,3);
+  v_points_earned INTEGER := 0;
+  v_points_used INTEGER;
+  v_balance INTEGER;
+  v_first_sale UUID;
+  v_response JSONB;
+BEGIN
+  -- Same key from concurrent retries: the second caller waits, then replays
+  PERFORM pg_advisory_xact_lock(hashtext(p_idempotency_key));
+  SELECT * INTO v_existing FROM public.checkout_requests WHERE idempotency_key = p_idempotency_key;
+  IF FOUND THEN
+    IF v_existing.request_hash <> p_request_hash THEN
+      RAISE EXCEPTION 'idempotency_key_reused';
+    END IF;
+    RETURN v_existing.response || '{"replayed": true}'::jsonb;
+  END IF;
+
+  -- One line per product, in id order
+  SELECT jsonb_agg(jsonb_build_object('product_id', product_id, 'quantity', quantity) ORDER BY product_id)
+  INTO v_basket
+  FROM (
+    SELECT (item->>'product_id')::uuid AS product_id, SUM((item->>'quantity')::int) AS quantity
+    FROM jsonb_array_elements(p_items) AS item
+    GROUP BY 1
+  ) lines;
+  IF v_basket IS NULL THEN
+    RAISE EXCEPTION 'empty_basket';
+  END IF;
+
+  -- Lock every product of the basket before reading stock
+  PERFORM 1 FROM public.products
+  WHERE id IN (SELECT product_id FROM jsonb_to_recordset(v_basket) AS b(product_id UUID, quantity INTEGER))
+  ORDER BY id
+  FOR UPDATE;
+
+  -- Validate and price every line before writing anything
+  FOR v_line IN
+    SELECT b.product_id, b.quantity, p.id AS found, p.is_active, p.stock_quantity, p.price, p.points_earned
+    FROM jsonb_to_recordset(v_basket) AS b(product_id UUID, quantity INTEGER)
+    LEFT JOIN public.products p ON p.id = b.product_id
+    ORDER BY b.product_id
+  LOOP
+    IF v_line.found IS NULL OR v_line.is_active IS FALSE THEN
+      RAISE EXCEPTION 'product_not_found:%', v_line.product_id;
+    END IF;
+    IF v_line.quantity <= 0 THEN
+      RAISE EXCEPTION 'invalid_quantity:%', v_line.product_id;
+    END IF;
+    IF COALESCE(v_line.stock_quantity, 0) < v_line.quantity THEN
+      RAISE EXCEPTION 'insufficient_stock:%', v_line.product_id;
+    END IF;
+    v_subtotal := v_subtotal + v_line.price * v_line.quantity;
+    v_points_earned := v_points_earned + COALESCE(v_line.points_earned, 0) * v_line.quantity;
+  END LOOP;
+
+  -- Never spend more points than the basket is worth
+  v_points_used := LEAST(COALESCE(p_points_used, 0), CEIL(v_subtotal * p_points_per_dt)::int);
+
+  IF p_client_id IS NULL THEN
+    IF v_points_used > 0 THEN
+      RAISE EXCEPTION 'client_required';
+    END IF;
+    v_points_earned := 0;
+  ELSE
+    SELECT COALESCE(points, 0) INTO v_balance FROM public.clients WHERE id = p_client_id FOR UPDATE;
+    IF NOT FOUND THEN
+      RAISE EXCEPTION 'client_not_found';
+    END IF;
+    IF v_balance < v_points_used THEN
+      RAISE EXCEPTION 'insufficient_points';
+    END IF;
+  END IF;
+
+  -- Points discount, spread over the lines in order
+  v_discount := LEAST(v_subtotal, v_points_used::DECIMAL / p_points_per_dt);
+
+  FOR v_line IN
+    SELECT b.product_id, b.quantity, p.price, p.points_earned
+    FROM jsonb_to_recordset(v_basket) AS b(product_id UUID, quantity INTEGER)
+    JOIN public.products p ON p.id = b.product_id
+    ORDER BY b.product_id
+  LOOP
+    v_line_discount := LEAST(v_line.price * v_line.quantity, v_discount);
+    v_discount := v_discount - v_line_discount;
+
+    UPDATE public.products
+    SET stock_quantity = stock_quantity - v_line.quantity, updated_at = now()
+    WHERE id = v_line.product_id;
+
+    INSERT INTO public.sales (product_id, client_id, staff_id, quantity, unit_price, total_amount,
+                              payment_method, points_earned, points_used, notes)
+    VALUES (v_line.product_id, p_client_id, p_staff_id, v_line.quantity, v_line.price,
+            v_line.price * v_line.quantity - v_line_discount, p_payment_method,
+            CASE WHEN p_client_id IS NULL THEN 0 ELSE COALESCE(v_line.points_earned, 0) * v_line.quantity END,
+            ROUND(v_line_discount * p_points_per_dt)::int, p_notes)
+    RETURNING * INTO v_sale;
+
+    v_first_sale := COALESCE(v_first_sale, v_sale.id);
+    v_sales := v_sales || to_jsonb(v_sale);
+  END LOOP;
+
+  IF p_client_id IS NOT NULL AND v_points_used > 0 THEN
+    v_balance := v_balance - v_points_used;
+    INSERT INTO public.points_transactions (client_id, transaction_type, amount, balance_after, description,
+                                            reference_type, reference_id, staff_id)
+    VALUES (p_client_id, 'spent', -v_points_used, v_balance, 'Used for purchase', 'sale', v_first_sale, p_staff_id);
+  END IF;
+  IF p_client_id IS NOT NULL AND v_points_earned > 0 THEN
+    v_balance := v_balance + v_points_earned;
+    INSERT INTO public.points_transactions (client_id, transaction_type, amount, balance_after, description,
+                                            reference_type, reference_id, staff_id)
+    VALUES (p_client_id, 'earned', v_points_earned, v_balance, 'Earned from purchase', 'sale', v_first_sale, p_staff_id);
+  END IF;
+  IF p_client_id IS NOT NULL THEN
+    UPDATE public.clients SET points = v_balance, updated_at = now() WHERE id = p_client_id;
+  END IF;
+
+  v_response := jsonb_build_object(
+    'idempotency_key', p_idempotency_key,
+    'sales', v_sales,
+    'subtotal', v_subtotal,
+    'total_amount', v_subtotal - LEAST(v_subtotal, v_points_used::DECIMAL / p_points_per_dt),
+    'points_used', v_points_used,
+    'points_earned', v_points_earned,
+    'points_balance', v_balance,
+    'replayed', false
+  );
+  INSERT INTO public.checkout_requests (idempotency_key, request_hash, response)
+  VALUES (p_idempotency_key, p_request_hash, v_response);
+
+  RETURN v_response;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Gives the stock of a reserved order back (caller holds the order row lock)
+CREATE OR REPLACE FUNCTION public.release_order_stock(p_order public.orders)
+RETURNS VOID AS $$
+BEGIN
+  UPDATE public.products p
+  SET stock_quantity = p.stock_quantity + lines.quantity, updated_at = now()
+  FROM (
+    SELECT (item->>'product_id')::uuid AS product_id, SUM((item->>'quantity')::int) AS quantity
+    FROM jsonb_array_elements(p_order.items) AS item
+    GROUP BY 1
+  ) lines
+  WHERE p.id = lines.product_id;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Reserves the stock of a pending order and moves it to 'processing', or
+-- cancels it with a status_reason when a product is missing or short.
+-- Orders that are no longer pending are returned unchanged, so the order
+-- pipeline can safely process the same order more than once.
+CREATE OR REPLACE FUNCTION public.process_order(p_order_id UUID)
+RETURNS JSONB AS $$
+DECLARE
+  v_order public.orders%ROWTYPE;
+  v_basket JSONB;
+  v_line RECORD;
+  v_reason TEXT;
+BEGIN
+  SELECT * INTO v_order FROM public.orders WHERE id = p_order_id FOR UPDATE;
+  IF NOT FOUND THEN
+    RAISE EXCEPTION 'order_not_found';
+  END IF;
+  IF v_order.status <> 'pending' OR v_order.stock_reserved THEN
+    RETURN to_jsonb(v_order) || '{"changed": false}'::jsonb;
+  END IF;
+
+  SELECT jsonb_agg(jsonb_build_object('product_id', product_id, 'quantity', quantity) ORDER BY product_id)
+  INTO v_basket
+  FROM (
+    SELECT (item->>'product_id')::uuid AS product_id, SUM((item->>'quantity')::int) AS quantity
+    FROM jsonb_array_elements(v_order.items) AS item
+    GROUP BY 1
+  ) lines;
+
+  IF v_basket IS NULL THEN
+    v_reason := 'empty_order';
+  ELSE
+    -- Same lock order as checkout_sale so the two cannot deadlock
+    PERFORM 1 FROM public.products
+    WHERE id IN (SELECT product_id FROM jsonb_to_recordset(v_basket) AS b(product_id UUID, quantity INTEGER))
+    ORDER BY id
+    FOR UPDATE;
+
+    FOR v_line IN
+      SELECT b.product_id, b.quantity, p.id AS found, p.is_active, p.stock_quantity
+      FROM jsonb_to_recordset(v_basket) AS b(product_id UUID, quantity INTEGER)
+      LEFT JOIN public.products p ON p.id = b.product_id
+      ORDER BY b.product_id
+    LOOP
+      IF v_line.found IS NULL OR v_line.is_active IS FALSE THEN
+        v_reason := 'product_not_found:' || v_line.product_id;
+      ELSIF v_line.quantity IS NULL OR v_line.quantity <= 0 THEN
+        v_reason := 'invalid_quantity:' || v_line.product_id;
+      ELSIF COALESCE(v_line.stock_quantity, 0) < v_line.quantity THEN
+        v_reason := 'insufficient_stock:' || v_line.product_id;
+      END IF;
+      EXIT WHEN v_reason IS NOT NULL;
+    END LOOP;
+  END IF;
+
+  IF v_reason IS NOT NULL THEN
+    UPDATE public.orders
+    SET status = 'cancelled', status_reason = v_reason, updated_at = now()
+    WHERE id = p_order_id
+    RETURNING * INTO v_order;
+    RETURN to_jsonb(v_order) || '{"changed": true}'::jsonb;
+  END IF;
+
+  UPDATE public.products p
+  SET stock_quantity = p.stock_quantity - b.quantity, updated_at = now()
+  FROM jsonb_to_recordset(v_basket) AS b(product_id UUID, quantity INTEGER)
+  WHERE p.id = b.product_id;
+
+  UPDATE public.orders
+  SET status = 'processing', stock_reserved = true, status_reason = NULL, updated_at = now()
+  WHERE id = p_order_id
+  RETURNING * INTO v_order;
+  RETURN to_jsonb(v_order) || '{"changed": true}'::jsonb;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Moves a batch of orders to a new status and/or payment status in one
+-- transaction. Orders whose current state does not allow the move are
+-- skipped and reported, not failed:
+--   status:         pending -> processing (reserves stock) | cancelled
+--                   processing -> completed | cancelled (stock given back)
+--   payment_status: pending -> paid | failed, failed -> paid
+-- Completing a cash order marks it paid.
+CREATE OR REPLACE FUNCTION public.transition_orders(
+  p_order_ids UUID[], p_status TEXT DEFAULT NULL, p_payment_status TEXT DEFAULT NULL, p_reason TEXT DEFAULT NULL
+)
+RETURNS JSONB AS $$
+DECLARE
+  v_order public.orders%ROWTYPE;
+  v_result JSONB;
+  v_updated JSONB := '[]'::jsonb;
+  v_skipped JSONB := '[]'::jsonb;
+  v_found UUID[] := '{}';
+BEGIN
+  IF p_status IS NULL AND p_payment_status IS NULL THEN
+    RAISE EXCEPTION 'nothing_to_change';
+  END IF;
+  IF p_status IS NOT NULL AND p_status NOT IN ('processing', 'completed', 'cancelled') THEN
+    RAISE EXCEPTION 'invalid_status';
+  END IF;
+  IF p_payment_status IS NOT NULL AND p_payment_status NOT IN ('paid', 'failed') THEN
+    RAISE EXCEPTION 'invalid_payment_status';
+  END IF;
+
+  -- Lock in id order so overlapping batches cannot deadlock
+  FOR v_order IN
+    SELECT * FROM public.orders WHERE id = ANY(p_order_ids) ORDER BY id FOR UPDATE
+  LOOP
+    v_found := v_found || v_order.id;
+
+    IF p_status IS NOT NULL AND NOT (
+      (v_order.status = 'pending' AND p_status IN ('processing', 'cancelled'))
+      OR (v_order.status = 'processing' AND p_status IN ('completed', 'cancelled'))
+    ) THEN
+      v_skipped := v_skipped || jsonb_build_object('id', v_order.id, 'reason', 'invalid_transition', 'status', v_order.status);
+      CONTINUE;
+    END IF;
+    IF p_payment_status IS NOT NULL AND NOT (
+      (COALESCE(v_order.payment_status, 'pending') = 'pending' AND p_payment_status IN ('paid', 'failed'))
+      OR (v_order.payment_status = 'failed' AND p_payment_status = 'paid')
+    ) THEN
+      v_skipped := v_skipped || jsonb_build_object('id', v_order.id, 'reason', 'invalid_payment_transition', 'payment_status', v_order.payment_status);
+      CONTINUE;
+    END IF;
+
+    IF p_status = 'processing' THEN
+      v_result := public.process_order(v_order.id);
+      IF v_result->>'status' <> 'processing' THEN
+        v_skipped := v_skipped || jsonb_build_object('id', v_order.id, 'reason', v_result->>'status_reason', 'status', v_result->>'status');
+        CONTINUE;
+      END IF;
+      SELECT * INTO v_order FROM public.orders WHERE id = v_order.id;
+    ELSIF p_status = 'cancelled' AND v_order.stock_reserved THEN
+      PERFORM public.release_order_stock(v_order);
+    END IF;
+
+    UPDATE public.orders
+    SET status = COALESCE(p_status, status),
+        status_reason = CASE WHEN p_status = 'cancelled' THEN p_reason ELSE status_reason END,
+        stock_reserved = CASE WHEN p_status = 'cancelled' THEN false ELSE stock_reserved END,
+        payment_status = CASE
+          WHEN p_payment_status IS NOT NULL THEN p_payment_status
+          WHEN p_status = 'completed' AND payment_method = 'cash' THEN 'paid'
+          ELSE payment_status
+        END,
+        updated_at = now()
+    WHERE id = v_order.id
+    RETURNING * INTO v_order;
+    v_updated := v_updated || to_jsonb(v_order);
+  END LOOP;
+
+  SELECT v_skipped || COALESCE(jsonb_agg(jsonb_build_object('id', missing, 'reason', 'order_not_found')), '[]'::jsonb)
+  INTO v_skipped
+  FROM unnest(p_order_ids) AS missing
+  WHERE missing <> ALL(v_found);
+
+  RETURN jsonb_build_object('updated', v_updated, 'skipped', v_skipped);
+END;
+$$ LANGUAGE plpgsql;
+
+-- Bumps the catalogue version of the table that changed. Runs as a deferred
+-- constraint trigger, i.e. at commit, so a reader that sees the new version
+-- also sees the new rows.
+CREATE OR REPLACE FUNCTION public.bump_catalogue_version()
+RETURNS TRIGGER AS $$
+BEGIN
+  PERFORM nextval(format('public.catalogue_version_%s', TG_TABLE_NAME)::regclass);
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+-- Current catalogue versions, one cheap call for the backend cache
+CREATE OR REPLACE FUNCTION public.catalogue_versions()
+RETURNS JSONB AS $$
+  SELECT jsonb_build_object(
+    'products', (SELECT CASE WHEN is_called THEN last_value ELSE 0 END FROM public.catalogue_version_products),
+    'services_catalog', (SELECT CASE WHEN is_called THEN last_value ELSE 0 END FROM public.catalogue_version_services_catalog),
+    'pricing', (SELECT CASE WHEN is_called THEN last_value ELSE 0 END FROM public.catalogue_version_pricing),
+    'consoles', (SELECT CASE WHEN is_called THEN last_value ELSE 0 END FROM public.catalogue_version_consoles)
+  );
+$$ LANGUAGE sql STABLE SECURITY DEFINER;
+
+-- Bumps store_settings_version at commit (deferred constraint trigger)
+CREATE OR REPLACE FUNCTION public.bump_store_settings_version()
+RETURNS TRIGGER AS $$
+BEGIN
+  PERFORM nextval('public.store_settings_version');
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+CREATE OR REPLACE FUNCTION public.store_settings_version()
+RETURNS BIGINT AS $$
+  SELECT CASE WHEN is_called THEN last_value ELSE 0 END FROM public.store_settings_version;
+$$ LANGUAGE sql STABLE SECURITY DEFINER;
+
+-- Expense totals per category and per month (newest first), for GET /expenses/?summary=true.
+-- NULL arguments mean no filter.
+CREATE OR REPLACE FUNCTION public.expense_summary(
+  p_start DATE DEFAULT NULL,
+  p_end DATE DEFAULT NULL,
+  p_categories TEXT[] DEFAULT NULL
+)
+RETURNS JSONB AS $$
+  WITH cells AS (
+    SELECT date_trunc('month', e.date)::date AS month, e.category, sum(e.amount) AS total, count(*) AS n
+    FROM public.expenses e
+    WHERE (p_start IS NULL OR e.date >= p_start)
+      AND (p_end IS NULL OR e.date <= p_end)
+      AND (p_categories IS NULL OR e.category = ANY(p_categories))
+    GROUP BY 1, 2
+  ), months AS (
+    SELECT month, jsonb_build_object(
+      'month', to_char(month, 'YYYY-MM'),
+      'total', sum(total),
+      'count', sum(n),
+      'categories', jsonb_object_agg(category, total)
+    ) AS entry
+    FROM cells GROUP BY month
+  )
+  SELECT jsonb_build_object(
+    'total', (SELECT COALESCE(sum(total), 0) FROM cells),
+    'count', (SELECT COALESCE(sum(n), 0) FROM cells),
+    'by_category', (SELECT COALESCE(jsonb_object_agg(category, total), '{}'::jsonb)
+                    FROM (SELECT category, sum(total) AS total FROM cells GROUP BY category) c),
+    'by_month', (SELECT COALESCE(jsonb_agg(entry ORDER BY month DESC), '[]'::jsonb) FROM months)
+  );
+$$ LANGUAGE sql STABLE;
+
 -- ==========================================
 -- 4. SEED DATA (CORE CONFIGURATION)
 -- ==========================================
@@ -372,7 +931,9 @@ ALTER TABLE public.staff_shifts ENABLE ROW LEVEL SECURITY;
 ALTER TABLE public.blog_posts ENABLE ROW LEVEL SECURITY;
 ALTER TABLE public.store_settings ENABLE ROW LEVEL SECURITY;
 ALTER TABLE public.daily_stats ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.checkout_requests ENABLE ROW LEVEL SECURITY;
 ALTER TABLE public.orders ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.verification_codes ENABLE ROW LEVEL SECURITY;
 
 -- Simple "everyone can read, staff can write" policies (Baseline)
 CREATE POLICY "Public Read" ON public.consoles FOR SELECT USING (true);
@@ -396,3 +957,34 @@ CREATE POLICY "Clients can view own orders" ON public.orders FOR SELECT USING (a
 CREATE POLICY "Owner Full Access" ON public.expenses FOR ALL USING (public.has_role(auth.uid(), 'owner'));
 CREATE POLICY "Owner Full Access" ON public.store_settings FOR ALL USING (public.has_role(auth.uid(), 'owner'));
 CREATE POLICY "Owner Full Access" ON public.user_roles FOR ALL USING (public.has_role(auth.uid(), 'owner'));
+
+-- ==========================================
+-- 6. TRIGGERS
+-- ==========================================
+-- Created last: deferred trigger events from the seed inserts above would block the ALTER TABLEs.
+CREATE CONSTRAINT TRIGGER products_catalogue_version AFTER INSERT OR UPDATE OR DELETE ON public.products
+  DEFERRABLE INITIALLY DEFERRED FOR EACH ROW EXECUTE FUNCTION public.bump_catalogue_version();
+CREATE CONSTRAINT TRIGGER services_catalog_catalogue_version AFTER INSERT OR UPDATE OR DELETE ON public.services_catalog
+  DEFERRABLE INITIALLY DEFERRED FOR EACH ROW EXECUTE FUNCTION public.bump_catalogue_version();
+CREATE CONSTRAINT TRIGGER pricing_catalogue_version AFTER INSERT OR UPDATE OR DELETE ON public.pricing
+  DEFERRABLE INITIALLY DEFERRED FOR EACH ROW EXECUTE FUNCTION public.bump_catalogue_version();
+CREATE CONSTRAINT TRIGGER consoles_catalogue_version AFTER INSERT OR UPDATE OR DELETE ON public.consoles
+  DEFERRABLE INITIALLY DEFERRED FOR EACH ROW EXECUTE FUNCTION public.bump_catalogue_version();
+CREATE CONSTRAINT TRIGGER store_settings_version AFTER INSERT OR UPDATE OR DELETE ON public.store_settings
+  DEFERRABLE INITIALLY DEFERRED FOR EACH ROW EXECUTE FUNCTION public.bump_store_settings_version();
+
+-- updated_at of the tables followed by change column (delta exports, stats rollup feeds)
+CREATE TRIGGER gaming_sessions_set_updated_at BEFORE UPDATE ON public.gaming_sessions
+  FOR EACH ROW EXECUTE FUNCTION public.set_updated_at();
+CREATE TRIGGER sales_set_updated_at BEFORE UPDATE ON public.sales
+  FOR EACH ROW EXECUTE FUNCTION public.set_updated_at();
+CREATE TRIGGER expenses_set_updated_at BEFORE UPDATE ON public.expenses
+  FOR EACH ROW EXECUTE FUNCTION public.set_updated_at();
+CREATE TRIGGER clients_set_updated_at BEFORE UPDATE ON public.clients
+  FOR EACH ROW EXECUTE FUNCTION public.set_updated_at();
+CREATE TRIGGER products_set_updated_at BEFORE UPDATE ON public.products
+  FOR EACH ROW EXECUTE FUNCTION public.set_updated_at();
+CREATE TRIGGER services_catalog_set_updated_at BEFORE UPDATE ON public.services_catalog
+  FOR EACH ROW EXECUTE FUNCTION public.set_updated_at();
+CREATE TRIGGER service_requests_set_updated_at BEFORE UPDATE ON public.service_requests
+  FOR EACH ROW EXECUTE FUNCTION public.set_updated_at();
@@ -0,0 +1,45 @@
+-- Game Store Zarzis - Catalogue versions (/api/catalogue cache and ETag)
+-- Brings a database created from an older docs/database_schema.sql up to date.
+-- Safe to re-run.
+
+-- catalogue_version_*: Change counters of the public catalogue tables, read by /api/catalogue.
+-- Sequences rather than a counter row, so concurrent writers never wait on each other.
+CREATE SEQUENCE IF NOT EXISTS public.catalogue_version_products;
+CREATE SEQUENCE IF NOT EXISTS public.catalogue_version_services_catalog;
+CREATE SEQUENCE IF NOT EXISTS public.catalogue_version_pricing;
+CREATE SEQUENCE IF NOT EXISTS public.catalogue_version_consoles;
+
+-- Bumps the catalogue version of the table that changed. Runs as a deferred
+-- constraint trigger, i.e. at commit, so a reader that sees the new version
+-- also sees the new rows.
+CREATE OR REPLACE FUNCTION public.bump_catalogue_version()
+RETURNS TRIGGER AS $$
+BEGIN
+  PERFORM nextval(format('public.catalogue_version_%s', TG_TABLE_NAME)::regclass);
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+-- Current catalogue versions, one cheap call for the backend cache
+CREATE OR REPLACE FUNCTION public.catalogue_versions()
+RETURNS JSONB AS $$
+  SELECT jsonb_build_object(
+    'products', (SELECT CASE WHEN is_called THEN last_value ELSE 0 END FROM public.catalogue_version_products),
+    'services_catalog', (SELECT CASE WHEN is_called THEN last_value ELSE 0 END FROM public.catalogue_version_services_catalog),
+    'pricing', (SELECT CASE WHEN is_called THEN last_value ELSE 0 END FROM public.catalogue_version_pricing),
+    'consoles', (SELECT CASE WHEN is_called THEN last_value ELSE 0 END FROM public.catalogue_version_consoles)
+  );
+$$ LANGUAGE sql STABLE SECURITY DEFINER;
+
+DROP TRIGGER IF EXISTS products_catalogue_version ON public.products;
+CREATE CONSTRAINT TRIGGER products_catalogue_version AFTER INSERT OR UPDATE OR DELETE ON public.products
+  DEFERRABLE INITIALLY DEFERRED FOR EACH ROW EXECUTE FUNCTION public.bump_catalogue_version();
+DROP TRIGGER IF EXISTS services_catalog_catalogue_version ON public.services_catalog;
+CREATE CONSTRAINT TRIGGER services_catalog_catalogue_version AFTER INSERT OR UPDATE OR DELETE ON public.services_catalog
+  DEFERRABLE INITIALLY DEFERRED FOR EACH ROW EXECUTE FUNCTION public.bump_catalogue_version();
+DROP TRIGGER IF EXISTS pricing_catalogue_version ON public.pricing;
+CREATE CONSTRAINT TRIGGER pricing_catalogue_version AFTER INSERT OR UPDATE OR DELETE ON public.pricing
+  DEFERRABLE INITIALLY DEFERRED FOR EACH ROW EXECUTE FUNCTION public.bump_catalogue_version();
+DROP TRIGGER IF EXISTS consoles_catalogue_version ON public.consoles;
+CREATE CONSTRAINT TRIGGER consoles_catalogue_version AFTER INSERT OR UPDATE OR DELETE ON public.consoles
+  DEFERRABLE INITIALLY DEFERRED FOR EACH ROW EXECUTE FUNCTION public.bump_catalogue_version();
@@ -0,0 +1,167 @@
+-- Game Store Zarzis - Basket checkout (/api/sales/checkout)
+-- Brings a database created from an older docs/database_schema.sql up to date.
+-- Safe to re-run.
+
+-- checkout_requests: Idempotency records of /api/sales/checkout
+CREATE TABLE IF NOT EXISTS public.checkout_requests (
+    idempotency_key TEXT PRIMARY KEY,
+    request_hash TEXT NOT NULL,
+    response JSONB NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT now() NOT NULL
+);
+ALTER TABLE public.checkout_requests ENABLE ROW LEVEL SECURITY;
+
+-- fn: checkout_sale - Sell a whole basket in one transaction
+-- p_items: [{"product_id": uuid, "quantity": int}, ...]
+-- Locks the products (in id order, so concurrent baskets cannot deadlock),
+-- checks and decrements stock, inserts one sales row per product and books
+-- points spent/earned. Points beyond the basket value are not spent: the
+-- client is debited what the discount actually used. A repeated idempotency
+-- key returns the stored result.
+CREATE OR REPLACE FUNCTION public.checkout_sale(
+  p_idempotency_key TEXT, p_request_hash TEXT, p_staff_id UUID, p_items JSONB,
+  p_client_id UUID DEFAULT NULL, p_payment_method TEXT DEFAULT 'cash', p_points_used INTEGER DEFAULT 0,
+  p_points_per_dt INTEGER DEFAULT 1000, p_notes TEXT DEFAULT NULL
+)
+RETURNS JSONB AS $$
+DECLARE
+  v_existing public.checkout_requests%ROWTYPE;
+  v_basket JSONB;
+  v_line RECORD;
+  v_sale public.sales%ROWTYPE;
+  v_sales JSONB := '[]'::jsonb;
+  v_subtotal DECIMAL(12,3) := 0;
+  v_discount DECIMAL(12,3);
+  v_line_discount DECIMAL(12,3);
+  v_points_earned INTEGER := 0;
+  v_points_used INTEGER;
+  v_balance INTEGER;
+  v_first_sale UUID;
+  v_response JSONB;
+BEGIN
+  -- Same key from concurrent retries: the second caller waits, then replays
+  PERFORM pg_advisory_xact_lock(hashtext(p_idempotency_key));
+  SELECT * INTO v_existing FROM public.checkout_requests WHERE idempotency_key = p_idempotency_key;
+  IF FOUND THEN
+    IF v_existing.request_hash <> p_request_hash THEN
+      RAISE EXCEPTION 'idempotency_key_reused';
+    END IF;
+    RETURN v_existing.response || '{"replayed": true}'::jsonb;
+  END IF;
+
+  -- One line per product, in id order
+  SELECT jsonb_agg(jsonb_build_object('product_id', product_id, 'quantity', quantity) ORDER BY product_id)
+  INTO v_basket
+  FROM (
+    SELECT (item->>'product_id')::uuid AS product_id, SUM((item->>'quantity')::int) AS quantity
+    FROM jsonb_array_elements(p_items) AS item
+    GROUP BY 1
+  ) lines;
+  IF v_basket IS NULL THEN
+    RAISE EXCEPTION 'empty_basket';
+  END IF;
+
+  -- Lock every product of the basket before reading stock
+  PERFORM 1 FROM public.products
+  WHERE id IN (SELECT product_id FROM jsonb_to_recordset(v_basket) AS b(product_id UUID, quantity INTEGER))
+  ORDER BY id
+  FOR UPDATE;
+
+  -- Validate and price every line before writing anything
+  FOR v_line IN
+    SELECT b.product_id, b.quantity, p.id AS found, p.is_active, p.stock_quantity, p.price, p.points_earned
+    FROM jsonb_to_recordset(v_basket) AS b(product_id UUID, quantity INTEGER)
+    LEFT JOIN public.products p ON p.id = b.product_id
+    ORDER BY b.product_id
+  LOOP
+    IF v_line.found IS NULL OR v_line.is_active IS FALSE THEN
+      RAISE EXCEPTION 'product_not_found:%', v_line.product_id;
+    END IF;
+    IF v_line.quantity <= 0 THEN
+      RAISE EXCEPTION 'invalid_quantity:%', v_line.product_id;
+    END IF;
+    IF COALESCE(v_line.stock_quantity, 0) < v_line.quantity THEN
+      RAISE EXCEPTION 'insufficient_stock:%', v_line.product_id;
+    END IF;
+    v_subtotal := v_subtotal + v_line.price * v_line.quantity;
+    v_points_earned := v_points_earned + COALESCE(v_line.points_earned, 0) * v_line.quantity;
+  END LOOP;
+
+  -- Never spend more points than the basket is worth
+  v_points_used := LEAST(COALESCE(p_points_used, 0), CEIL(v_subtotal * p_points_per_dt)::int);
+
+  IF p_client_id IS NULL THEN
+    IF v_points_used > 0 THEN
+      RAISE EXCEPTION 'client_required';
+    END IF;
+    v_points_earned := 0;
+  ELSE
+    SELECT COALESCE(points, 0) INTO v_balance FROM public.clients WHERE id = p_client_id FOR UPDATE;
+    IF NOT FOUND THEN
+      RAISE EXCEPTION 'client_not_found';
+    END IF;
+    IF v_balance < v_points_used THEN
+      RAISE EXCEPTION 'insufficient_points';
+    END IF;
+  END IF;
+
+  -- Points discount, spread over the lines in order
+  v_discount := LEAST(v_subtotal, v_points_used::DECIMAL / p_points_per_dt);
+
+  FOR v_line IN
+    SELECT b.product_id, b.quantity, p.price, p.points_earned
+    FROM jsonb_to_recordset(v_basket) AS b(product_id UUID, quantity INTEGER)
+    JOIN public.products p ON p.id = b.product_id
+    ORDER BY b.product_id
+  LOOP
+    v_line_discount := LEAST(v_line.price * v_line.quantity, v_discount);
+    v_discount := v_discount - v_line_discount;
+
+    UPDATE public.products
+    SET stock_quantity = stock_quantity - v_line.quantity, updated_at = now()
+    WHERE id = v_line.product_id;
+
+    INSERT INTO public.sales (product_id, client_id, staff_id, quantity, unit_price, total_amount,
+                              payment_method, points_earned, points_used, notes)
+    VALUES (v_line.product_id, p_client_id, p_staff_id, v_line.quantity, v_line.price,
+            v_line.price * v_line.quantity - v_line_discount, p_payment_method,
+            CASE WHEN p_client_id IS NULL THEN 0 ELSE COALESCE(v_line.points_earned, 0) * v_line.quantity END,
+            ROUND(v_line_discount * p_points_per_dt)::int, p_notes)
+    RETURNING * INTO v_sale;
+
+    v_first_sale := COALESCE(v_first_sale, v_sale.id);
+    v_sales := v_sales || to_jsonb(v_sale);
+  END LOOP;
+
+  IF p_client_id IS NOT NULL AND v_points_used > 0 THEN
+    v_balance := v_balance - v_points_used;
+    INSERT INTO public.points_transactions (client_id, transaction_type, amount, balance_after, description,
+                                            reference_type, reference_id, staff_id)
+    VALUES (p_client_id, 'spent', -v_points_used, v_balance, 'Used for purchase', 'sale', v_first_sale, p_staff_id);
+  END IF;
+  IF p_client_id IS NOT NULL AND v_points_earned > 0 THEN
+    v_balance := v_balance + v_points_earned;
+    INSERT INTO public.points_transactions (client_id, transaction_type, amount, balance_after, description,
+                                            reference_type, reference_id, staff_id)
+    VALUES (p_client_id, 'earned', v_points_earned, v_balance, 'Earned from purchase', 'sale', v_first_sale, p_staff_id);
+  END IF;
+  IF p_client_id IS NOT NULL THEN
+    UPDATE public.clients SET points = v_balance, updated_at = now() WHERE id = p_client_id;
+  END IF;
+
+  v_response := jsonb_build_object(
+    'idempotency_key', p_idempotency_key,
+    'sales', v_sales,
+    'subtotal', v_subtotal,
+    'total_amount', v_subtotal - LEAST(v_subtotal, v_points_used::DECIMAL / p_points_per_dt),
+    'points_used', v_points_used,
+    'points_earned', v_points_earned,
+    'points_balance', v_balance,
+    'replayed', false
+  );
+  INSERT INTO public.checkout_requests (idempotency_key, request_hash, response)
+  VALUES (p_idempotency_key, p_request_hash, v_response);
+
+  RETURN v_response;
+END;
+$$ LANGUAGE plpgsql;
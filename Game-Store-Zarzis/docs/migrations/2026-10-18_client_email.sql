@@ -0,0 +1,6 @@
+-- Game Store Zarzis - Client email addresses
+-- Brings a database created from an older docs/database_schema.sql up to date.
+-- Safe to re-run.
+
+-- Recipients of bulk notifications (/api/notifications); clients without one are skipped
+ALTER TABLE public.clients ADD COLUMN IF NOT EXISTS email TEXT;
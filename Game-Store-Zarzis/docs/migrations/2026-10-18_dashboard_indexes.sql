@@ -0,0 +1,40 @@
+-- Game Store Zarzis - Indexes for the dashboard and OTP queries
+-- Brings a database created from an older docs/database_schema.sql up to date.
+-- Safe to re-run: every statement is IF [NOT] EXISTS.
+--
+-- The SQL editor runs the file in one transaction. On tables large enough for
+-- the build to block writes noticeably, run the CREATE INDEX statements one by
+-- one with CONCURRENTLY added instead.
+--
+-- Check the plans afterwards with: python backend/test_query_indexes.py
+
+-- Stats of a period: completed revenue (status + range) and counts (range)
+CREATE INDEX IF NOT EXISTS idx_gaming_sessions_status_created ON public.gaming_sessions(status, created_at);
+CREATE INDEX IF NOT EXISTS idx_gaming_sessions_created ON public.gaming_sessions(created_at, id);
+CREATE INDEX IF NOT EXISTS idx_sales_created ON public.sales(created_at, id);
+CREATE INDEX IF NOT EXISTS idx_service_requests_status_created ON public.service_requests(status, created_at);
+
+-- Change feeds of services/stats_rollup.py, read in (updated_at, id) keyset order
+-- (the gaming_sessions and sales ones are in 2026-10-18_export_change_tracking.sql).
+-- The feeds no longer follow end_time, so its index only slows session writes.
+CREATE INDEX IF NOT EXISTS idx_service_requests_updated ON public.service_requests(updated_at, id);
+DROP INDEX IF EXISTS public.idx_gaming_sessions_end_time;
+
+-- Points history of one client, newest first
+CREATE INDEX IF NOT EXISTS idx_points_transactions_client_created ON public.points_transactions(client_id, created_at);
+
+-- verification_codes was created by hand on existing projects; create it if missing
+CREATE TABLE IF NOT EXISTS public.verification_codes (
+    id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
+    identifier TEXT NOT NULL,
+    code TEXT NOT NULL,
+    expires_at TIMESTAMPTZ NOT NULL,
+    is_verified BOOLEAN DEFAULT false NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT now() NOT NULL
+);
+ALTER TABLE public.verification_codes ENABLE ROW LEVEL SECURITY;
+
+-- Code check and invalidation of a code (identifier + code, unexpired)
+CREATE INDEX IF NOT EXISTS idx_verification_codes_lookup ON public.verification_codes(identifier, code, expires_at);
+
+ANALYZE public.gaming_sessions, public.sales, public.service_requests, public.points_transactions, public.verification_codes;
@@ -0,0 +1,39 @@
+-- Game Store Zarzis - Paginated expenses listing (GET /expenses/)
+-- Brings a database created from an older docs/database_schema.sql up to date.
+-- Safe to re-run.
+
+-- Keyset pages of expenses, newest first: ORDER BY date DESC, id DESC
+CREATE INDEX IF NOT EXISTS idx_expenses_date ON public.expenses(date, id);
+
+-- Expense totals per category and per month (newest first), for GET /expenses/?summary=true.
+-- NULL arguments mean no filter.
+CREATE OR REPLACE FUNCTION public.expense_summary(
+  p_start DATE DEFAULT NULL,
+  p_end DATE DEFAULT NULL,
+  p_categories TEXT[] DEFAULT NULL
+)
+RETURNS JSONB AS $$
+  WITH cells AS (
+    SELECT date_trunc('month', e.date)::date AS month, e.category, sum(e.amount) AS total, count(*) AS n
+    FROM public.expenses e
+    WHERE (p_start IS NULL OR e.date >= p_start)
+      AND (p_end IS NULL OR e.date <= p_end)
+      AND (p_categories IS NULL OR e.category = ANY(p_categories))
+    GROUP BY 1, 2
+  ), months AS (
+    SELECT month, jsonb_build_object(
+      'month', to_char(month, 'YYYY-MM'),
+      'total', sum(total),
+      'count', sum(n),
+      'categories', jsonb_object_agg(category, total)
+    ) AS entry
+    FROM cells GROUP BY month
+  )
+  SELECT jsonb_build_object(
+    'total', (SELECT COALESCE(sum(total), 0) FROM cells),
+    'count', (SELECT COALESCE(sum(n), 0) FROM cells),
+    'by_category', (SELECT COALESCE(jsonb_object_agg(category, total), '{}'::jsonb)
+                    FROM (SELECT category, sum(total) AS total FROM cells GROUP BY category) c),
+    'by_month', (SELECT COALESCE(jsonb_agg(entry ORDER BY month DESC), '[]'::jsonb) FROM months)
+  );
+$$ LANGUAGE sql STABLE;
@@ -0,0 +1,51 @@
+-- Game Store Zarzis - Change tracking for delta exports (/api/admin/export?since=...)
+-- Brings a database created from an older docs/database_schema.sql up to date.
+-- Safe to re-run.
+--
+-- Delta exports follow updated_at on every exported table. gaming_sessions and
+-- sales had no updated_at, and nothing kept the existing columns current, so
+-- ended sessions and edits made by RPCs or the dashboard never reached a delta.
+
+-- gaming_sessions / sales: backfill with the last known change, so the first
+-- delta after the migration picks up sessions that ended since its checkpoint
+-- without re-exporting the whole table.
+ALTER TABLE public.gaming_sessions ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ;
+UPDATE public.gaming_sessions SET updated_at = GREATEST(created_at, end_time) WHERE updated_at IS NULL;
+ALTER TABLE public.gaming_sessions ALTER COLUMN updated_at SET DEFAULT now(), ALTER COLUMN updated_at SET NOT NULL;
+
+ALTER TABLE public.sales ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ;
+UPDATE public.sales SET updated_at = created_at WHERE updated_at IS NULL;
+ALTER TABLE public.sales ALTER COLUMN updated_at SET DEFAULT now(), ALTER COLUMN updated_at SET NOT NULL;
+
+CREATE INDEX IF NOT EXISTS idx_gaming_sessions_updated ON public.gaming_sessions(updated_at, id);
+CREATE INDEX IF NOT EXISTS idx_sales_updated ON public.sales(updated_at, id);
+
+CREATE OR REPLACE FUNCTION public.set_updated_at()
+RETURNS TRIGGER AS $$
+BEGIN
+  NEW.updated_at := now();
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS gaming_sessions_set_updated_at ON public.gaming_sessions;
+CREATE TRIGGER gaming_sessions_set_updated_at BEFORE UPDATE ON public.gaming_sessions
+  FOR EACH ROW EXECUTE FUNCTION public.set_updated_at();
+DROP TRIGGER IF EXISTS sales_set_updated_at ON public.sales;
+CREATE TRIGGER sales_set_updated_at BEFORE UPDATE ON public.sales
+  FOR EACH ROW EXECUTE FUNCTION public.set_updated_at();
+DROP TRIGGER IF EXISTS expenses_set_updated_at ON public.expenses;
+CREATE TRIGGER expenses_set_updated_at BEFORE UPDATE ON public.expenses
+  FOR EACH ROW EXECUTE FUNCTION public.set_updated_at();
+DROP TRIGGER IF EXISTS clients_set_updated_at ON public.clients;
+CREATE TRIGGER clients_set_updated_at BEFORE UPDATE ON public.clients
+  FOR EACH ROW EXECUTE FUNCTION public.set_updated_at();
+DROP TRIGGER IF EXISTS products_set_updated_at ON public.products;
+CREATE TRIGGER products_set_updated_at BEFORE UPDATE ON public.products
+  FOR EACH ROW EXECUTE FUNCTION public.set_updated_at();
+DROP TRIGGER IF EXISTS services_catalog_set_updated_at ON public.services_catalog;
+CREATE TRIGGER services_catalog_set_updated_at BEFORE UPDATE ON public.services_catalog
+  FOR EACH ROW EXECUTE FUNCTION public.set_updated_at();
+DROP TRIGGER IF EXISTS service_requests_set_updated_at ON public.service_requests;
+CREATE TRIGGER service_requests_set_updated_at BEFORE UPDATE ON public.service_requests
+  FOR EACH ROW EXECUTE FUNCTION public.set_updated_at();
@@ -0,0 +1,185 @@
+-- Game Store Zarzis - Order pipeline (POST /api/orders, /api/orders/bulk-status)
+-- Brings a database created from an older docs/database_schema.sql up to date.
+-- Safe to re-run.
+
+ALTER TABLE public.orders ADD COLUMN IF NOT EXISTS status_reason TEXT;
+ALTER TABLE public.orders ADD COLUMN IF NOT EXISTS stock_reserved BOOLEAN DEFAULT false NOT NULL;
+-- The UNIQUE constraint is the conflict target of the create_order upsert
+ALTER TABLE public.orders ADD COLUMN IF NOT EXISTS idempotency_key TEXT UNIQUE;
+ALTER TABLE public.orders ADD COLUMN IF NOT EXISTS request_hash TEXT;
+
+CREATE INDEX IF NOT EXISTS idx_orders_status_created ON public.orders(status, created_at);
+
+-- Gives the stock of a reserved order back (caller holds the order row lock)
+CREATE OR REPLACE FUNCTION public.release_order_stock(p_order public.orders)
+RETURNS VOID AS $$
+BEGIN
+  UPDATE public.products p
+  SET stock_quantity = p.stock_quantity + lines.quantity, updated_at = now()
+  FROM (
+    SELECT (item->>'product_id')::uuid AS product_id, SUM((item->>'quantity')::int) AS quantity
+    FROM jsonb_array_elements(p_order.items) AS item
+    GROUP BY 1
+  ) lines
+  WHERE p.id = lines.product_id;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Reserves the stock of a pending order and moves it to 'processing', or
+-- cancels it with a status_reason when a product is missing or short.
+-- Orders that are no longer pending are returned unchanged, so the order
+-- pipeline can safely process the same order more than once.
+CREATE OR REPLACE FUNCTION public.process_order(p_order_id UUID)
+RETURNS JSONB AS $$
+DECLARE
+  v_order public.orders%ROWTYPE;
+  v_basket JSONB;
+  v_line RECORD;
+  v_reason TEXT;
+BEGIN
+  SELECT * INTO v_order FROM public.orders WHERE id = p_order_id FOR UPDATE;
+  IF NOT FOUND THEN
+    RAISE EXCEPTION 'order_not_found';
+  END IF;
+  IF v_order.status <> 'pending' OR v_order.stock_reserved THEN
+    RETURN to_jsonb(v_order) || '{"changed": false}'::jsonb;
+  END IF;
+
+  SELECT jsonb_agg(jsonb_build_object('product_id', product_id, 'quantity', quantity) ORDER BY product_id)
+  INTO v_basket
+  FROM (
+    SELECT (item->>'product_id')::uuid AS product_id, SUM((item->>'quantity')::int) AS quantity
+    FROM jsonb_array_elements(v_order.items) AS item
+    GROUP BY 1
+  ) lines;
+
+  IF v_basket IS NULL THEN
+    v_reason := 'empty_order';
+  ELSE
+    -- Same lock order as checkout_sale so the two cannot deadlock
+    PERFORM 1 FROM public.products
+    WHERE id IN (SELECT product_id FROM jsonb_to_recordset(v_basket) AS b(product_id UUID, quantity INTEGER))
+    ORDER BY id
+    FOR UPDATE;
+
+    FOR v_line IN
+      SELECT b.product_id, b.quantity, p.id AS found, p.is_active, p.stock_quantity
+      FROM jsonb_to_recordset(v_basket) AS b(product_id UUID, quantity INTEGER)
+      LEFT JOIN public.products p ON p.id = b.product_id
+      ORDER BY b.product_id
+    LOOP
+      IF v_line.found IS NULL OR v_line.is_active IS FALSE THEN
+        v_reason := 'product_not_found:' || v_line.product_id;
+      ELSIF v_line.quantity IS NULL OR v_line.quantity <= 0 THEN
+        v_reason := 'invalid_quantity:' || v_line.product_id;
+      ELSIF COALESCE(v_line.stock_quantity, 0) < v_line.quantity THEN
+        v_reason := 'insufficient_stock:' || v_line.product_id;
+      END IF;
+      EXIT WHEN v_reason IS NOT NULL;
+    END LOOP;
+  END IF;
+
+  IF v_reason IS NOT NULL THEN
+    UPDATE public.orders
+    SET status = 'cancelled', status_reason = v_reason, updated_at = now()
+    WHERE id = p_order_id
+    RETURNING * INTO v_order;
+    RETURN to_jsonb(v_order) || '{"changed": true}'::jsonb;
+  END IF;
+
+  UPDATE public.products p
+  SET stock_quantity = p.stock_quantity - b.quantity, updated_at = now()
+  FROM jsonb_to_recordset(v_basket) AS b(product_id UUID, quantity INTEGER)
+  WHERE p.id = b.product_id;
+
+  UPDATE public.orders
+  SET status = 'processing', stock_reserved = true, status_reason = NULL, updated_at = now()
+  WHERE id = p_order_id
+  RETURNING * INTO v_order;
+  RETURN to_jsonb(v_order) || '{"changed": true}'::jsonb;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Moves a batch of orders to a new status and/or payment status in one
+-- transaction. Orders whose current state does not allow the move are
+-- skipped and reported, not failed:
+--   status:         pending -> processing (reserves stock) | cancelled
+--                   processing -> completed | cancelled (stock given back)
+--   payment_status: pending -> paid | failed, failed -> paid
+-- Completing a cash order marks it paid.
+CREATE OR REPLACE FUNCTION public.transition_orders(
+  p_order_ids UUID[], p_status TEXT DEFAULT NULL, p_payment_status TEXT DEFAULT NULL, p_reason TEXT DEFAULT NULL
+)
+RETURNS JSONB AS $$
+DECLARE
+  v_order public.orders%ROWTYPE;
+  v_result JSONB;
+  v_updated JSONB := '[]'::jsonb;
+  v_skipped JSONB := '[]'::jsonb;
+  v_found UUID[] := '{}';
+BEGIN
+  IF p_status IS NULL AND p_payment_status IS NULL THEN
+    RAISE EXCEPTION 'nothing_to_change';
+  END IF;
+  IF p_status IS NOT NULL AND p_status NOT IN ('processing', 'completed', 'cancelled') THEN
+    RAISE EXCEPTION 'invalid_status';
+  END IF;
+  IF p_payment_status IS NOT NULL AND p_payment_status NOT IN ('paid', 'failed') THEN
+    RAISE EXCEPTION 'invalid_payment_status';
+  END IF;
+
+  -- Lock in id order so overlapping batches cannot deadlock
+  FOR v_order IN
+    SELECT * FROM public.orders WHERE id = ANY(p_order_ids) ORDER BY id FOR UPDATE
+  LOOP
+    v_found := v_found || v_order.id;
+
+    IF p_status IS NOT NULL AND NOT (
+      (v_order.status = 'pending' AND p_status IN ('processing', 'cancelled'))
+      OR (v_order.status = 'processing' AND p_status IN ('completed', 'cancelled'))
+    ) THEN
+      v_skipped := v_skipped || jsonb_build_object('id', v_order.id, 'reason', 'invalid_transition', 'status', v_order.status);
+      CONTINUE;
+    END IF;
+    IF p_payment_status IS NOT NULL AND NOT (
+      (COALESCE(v_order.payment_status, 'pending') = 'pending' AND p_payment_status IN ('paid', 'failed'))
+      OR (v_order.payment_status = 'failed' AND p_payment_status = 'paid')
+    ) THEN
+      v_skipped := v_skipped || jsonb_build_object('id', v_order.id, 'reason', 'invalid_payment_transition', 'payment_status', v_order.payment_status);
+      CONTINUE;
+    END IF;
+
+    IF p_status = 'processing' THEN
+      v_result := public.process_order(v_order.id);
+      IF v_result->>'status' <> 'processing' THEN
+        v_skipped := v_skipped || jsonb_build_object('id', v_order.id, 'reason', v_result->>'status_reason', 'status', v_result->>'status');
+        CONTINUE;
+      END IF;
+      SELECT * INTO v_order FROM public.orders WHERE id = v_order.id;
+    ELSIF p_status = 'cancelled' AND v_order.stock_reserved THEN
+      PERFORM public.release_order_stock(v_order);
+    END IF;
+
+    UPDATE public.orders
+    SET status = COALESCE(p_status, status),
+        status_reason = CASE WHEN p_status = 'cancelled' THEN p_reason ELSE status_reason END,
+        stock_reserved = CASE WHEN p_status = 'cancelled' THEN false ELSE stock_reserved END,
+        payment_status = CASE
+          WHEN p_payment_status IS NOT NULL THEN p_payment_status
+          WHEN p_status = 'completed' AND payment_method = 'cash' THEN 'paid'
+          ELSE payment_status
+        END,
+        updated_at = now()
+    WHERE id = v_order.id
+    RETURNING * INTO v_order;
+    v_updated := v_updated || to_jsonb(v_order);
+  END LOOP;
+
+  SELECT v_skipped || COALESCE(jsonb_agg(jsonb_build_object('id', missing, 'reason', 'order_not_found')), '[]'::jsonb)
+  INTO v_skipped
+  FROM unnest(p_order_ids) AS missing
+  WHERE missing <> ALL(v_found);
+
+  RETURN jsonb_build_object('updated', v_updated, 'skipped', v_skipped);
+END;
+$$ LANGUAGE plpgsql;
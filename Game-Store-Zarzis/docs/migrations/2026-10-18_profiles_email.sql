@@ -0,0 +1,5 @@
+-- Game Store Zarzis - Staff email on profiles (POST /api/admin/sync-profiles)
+-- Brings a database created from an older docs/database_schema.sql up to date.
+-- Safe to re-run.
+
+ALTER TABLE public.profiles ADD COLUMN IF NOT EXISTS email TEXT;
@@ -0,0 +1,110 @@
+-- Game Store Zarzis - Live session RPCs (/api/sessions)
+-- Brings a database created from an older docs/database_schema.sql up to date.
+-- Safe to re-run: every function is CREATE OR REPLACE.
+--
+-- The backend starts, updates and ends gaming sessions through these
+-- functions (services/session_state.py), so the session row, its console and
+-- the client totals always change together.
+
+-- fn: increment_client_stats - Atomic client totals increase
+CREATE OR REPLACE FUNCTION public.increment_client_stats(p_client_id UUID, p_spent DECIMAL, p_games INTEGER)
+RETURNS VOID AS $$
+BEGIN
+  UPDATE public.clients
+  SET total_spent = COALESCE(total_spent, 0) + p_spent,
+      total_games_played = COALESCE(total_games_played, 0) + p_games,
+      updated_at = now()
+  WHERE id = p_client_id;
+END;
+$$ LANGUAGE plpgsql;
+
+-- fn: start_gaming_session - Create a session and occupy its console in one transaction
+CREATE OR REPLACE FUNCTION public.start_gaming_session(
+  p_console_id UUID, p_pricing_id UUID, p_staff_id UUID, p_session_type TEXT,
+  p_client_id UUID DEFAULT NULL, p_is_free_game BOOLEAN DEFAULT false, p_notes TEXT DEFAULT NULL
+)
+RETURNS JSONB AS $$
+DECLARE
+  v_console public.consoles%ROWTYPE;
+  v_session public.gaming_sessions%ROWTYPE;
+BEGIN
+  -- Row lock serializes concurrent starts on the same console
+  SELECT * INTO v_console FROM public.consoles WHERE id = p_console_id FOR UPDATE;
+  IF NOT FOUND THEN
+    RAISE EXCEPTION 'console_not_found';
+  END IF;
+  IF EXISTS (SELECT 1 FROM public.gaming_sessions WHERE console_id = p_console_id AND status = 'active') THEN
+    RAISE EXCEPTION 'console_busy';
+  END IF;
+
+  INSERT INTO public.gaming_sessions (console_id, client_id, pricing_id, staff_id, session_type, status, start_time, is_free_game, notes)
+  VALUES (p_console_id, p_client_id, p_pricing_id, p_staff_id, p_session_type, 'active', now(), p_is_free_game, p_notes)
+  RETURNING * INTO v_session;
+
+  UPDATE public.consoles
+  SET status = 'in_use', current_session_id = v_session.id, updated_at = now()
+  WHERE id = p_console_id;
+
+  RETURN to_jsonb(v_session);
+END;
+$$ LANGUAGE plpgsql;
+
+-- fn: end_gaming_session - Complete a session, free its console and update client totals atomically
+CREATE OR REPLACE FUNCTION public.end_gaming_session(
+  p_session_id UUID, p_total_amount DECIMAL, p_games_played INTEGER DEFAULT 0,
+  p_extra_time_minutes INTEGER DEFAULT 0, p_extra_amount DECIMAL DEFAULT 0, p_points_earned INTEGER DEFAULT 0,
+  p_payment_method TEXT DEFAULT 'cash', p_points_used INTEGER DEFAULT 0, p_client_id UUID DEFAULT NULL
+)
+RETURNS JSONB AS $$
+DECLARE
+  v_session public.gaming_sessions%ROWTYPE;
+BEGIN
+  SELECT * INTO v_session FROM public.gaming_sessions WHERE id = p_session_id FOR UPDATE;
+  IF NOT FOUND THEN
+    RAISE EXCEPTION 'session_not_found';
+  END IF;
+  IF v_session.status <> 'active' THEN
+    RAISE EXCEPTION 'session_not_active';
+  END IF;
+
+  UPDATE public.gaming_sessions
+  SET status = 'completed', end_time = now(), total_amount = p_total_amount,
+      games_played = COALESCE(p_games_played, 0), extra_time_minutes = COALESCE(p_extra_time_minutes, 0),
+      extra_amount = COALESCE(p_extra_amount, 0), points_earned = COALESCE(p_points_earned, 0),
+      payment_method = COALESCE(p_payment_method, 'cash'), points_used = COALESCE(p_points_used, 0),
+      client_id = p_client_id
+  WHERE id = p_session_id
+  RETURNING * INTO v_session;
+
+  UPDATE public.consoles
+  SET status = 'available', current_session_id = NULL, updated_at = now()
+  WHERE id = v_session.console_id AND (current_session_id = p_session_id OR current_session_id IS NULL);
+
+  IF p_client_id IS NOT NULL THEN
+    PERFORM public.increment_client_stats(p_client_id, p_total_amount, GREATEST(COALESCE(p_games_played, 0), 1));
+  END IF;
+
+  RETURN to_jsonb(v_session);
+END;
+$$ LANGUAGE plpgsql;
+
+-- fn: add_games_to_session - Update the game count / extra time of an active session
+CREATE OR REPLACE FUNCTION public.add_games_to_session(
+  p_session_id UUID, p_games_played INTEGER, p_extra_time_minutes INTEGER DEFAULT 0, p_extra_amount DECIMAL DEFAULT 0
+)
+RETURNS JSONB AS $$
+DECLARE
+  v_session public.gaming_sessions%ROWTYPE;
+BEGIN
+  UPDATE public.gaming_sessions
+  SET games_played = p_games_played, extra_time_minutes = COALESCE(p_extra_time_minutes, 0),
+      extra_amount = COALESCE(p_extra_amount, 0)
+  WHERE id = p_session_id AND status = 'active'
+  RETURNING * INTO v_session;
+  IF NOT FOUND THEN
+    RAISE EXCEPTION 'session_not_active';
+  END IF;
+
+  RETURN to_jsonb(v_session);
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,24 @@
+-- Game Store Zarzis - store_settings change counter (backend settings snapshot)
+-- Brings a database created from an older docs/database_schema.sql up to date.
+-- Safe to re-run.
+
+-- store_settings_version: Change counter of store_settings, polled by the backend settings snapshot
+CREATE SEQUENCE IF NOT EXISTS public.store_settings_version;
+
+-- Bumps store_settings_version at commit (deferred constraint trigger)
+CREATE OR REPLACE FUNCTION public.bump_store_settings_version()
+RETURNS TRIGGER AS $$
+BEGIN
+  PERFORM nextval('public.store_settings_version');
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+CREATE OR REPLACE FUNCTION public.store_settings_version()
+RETURNS BIGINT AS $$
+  SELECT CASE WHEN is_called THEN last_value ELSE 0 END FROM public.store_settings_version;
+$$ LANGUAGE sql STABLE SECURITY DEFINER;
+
+DROP TRIGGER IF EXISTS store_settings_version ON public.store_settings;
+CREATE CONSTRAINT TRIGGER store_settings_version AFTER INSERT OR UPDATE OR DELETE ON public.store_settings
+  DEFERRABLE INITIALLY DEFERRED FOR EACH ROW EXECUTE FUNCTION public.bump_store_settings_version();
@@ -2,7 +2,7 @@ import { useMemo, memo, useState, useEffect } from "react";
 import { Gamepad2, Wrench, User } from "lucide-react";
 import { useLanguage } from "@/contexts/LanguageContext";
 import { Link } from "react-router-dom";
-import { supabase } from "@/lib/supabase";
+import { fetchCatalogueSection } from "@/services/catalogueService";
 
 const Hero = () => {
   const { t } = useLanguage();
@@ -12,13 +12,8 @@ const Hero = () => {
   useEffect(() => {
     const fetchConsoleCount = async () => {
       try {
-        const { count, error } = await supabase
-          .from('consoles')
-          .select('*', { count: 'exact', head: true });
-
-        if (count !== null && !error) {
-          setConsoleCount(count.toString().padStart(2, '0'));
-        }
+        const consoles = await fetchCatalogueSection('consoles');
+        setConsoleCount(consoles.length.toString().padStart(2, '0'));
       } catch (e) {
         console.error("Failed to fetch console count", e);
       }
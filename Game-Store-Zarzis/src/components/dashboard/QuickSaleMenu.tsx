@@ -10,9 +10,9 @@
 
 import { useState } from 'react';
 import { useConsumablesByCategory } from '@/hooks/useConsumables';
-import { useCreateSale } from '@/hooks/useSales';
+import { useCheckout } from '@/hooks/useSales';
+import { useIdempotencyKey } from '@/hooks/useIdempotencyKey';
 import { useAddSessionConsumption } from '@/hooks/useSessionConsumptions';
-import { useCreatePointsTransaction } from '@/hooks/usePointsTransactions';
 import { useAuth } from '@/contexts/AuthContext';
 import { useLanguage } from '@/contexts/LanguageContext';
 import {
@@ -46,11 +46,13 @@ export const QuickSaleMenu = ({ isOpen, onOpenChange, clientId, sessionId }: Qui
     const { user } = useAuth();
     const { t } = useLanguage();
     const { data: groupedConsumables, isLoading } = useConsumablesByCategory();
-    const createSale = useCreateSale();
+    const checkout = useCheckout();
     const addSessionConsumption = useAddSessionConsumption();
-    const createPointsTransaction = useCreatePointsTransaction();
 
     const [cart, setCart] = useState<CartItem[]>([]);
+    const basket = cart.map((item) => ({ product_id: item.product.id, quantity: item.quantity }));
+    // Same key while the basket is unchanged, so retrying after a network error cannot sell twice
+    const [checkoutKey, renewCheckoutKey] = useIdempotencyKey({ basket, clientId });
 
     // ==========================================
     // 🛒 CART MANAGEMENT
@@ -129,33 +131,14 @@ export const QuickSaleMenu = ({ isOpen, onOpenChange, clientId, sessionId }: Qui
                     description: t('quicksale.items_added', { count: getTotalItems() }),
                 });
             } else {
-                // OTHERWISE, PROCESS AS DIRECT SALE
-                for (const item of cart) {
-                    await createSale.mutateAsync({
-                        product_id: item.product.id,
-                        quantity: item.quantity,
-                        unit_price: item.product.price,
-                        total_amount: item.product.price * item.quantity,
-                        payment_method: 'cash',
-                        points_used: 0,
-                        points_earned: (item.product.points_earned || 0) * item.quantity,
-                        client_id: clientId || null,
-                        staff_id: user?.id || null,
-                        notes: null,
-                    });
-
-                    // Award points if client is associated
-                    if (clientId && item.product.points_earned > 0) {
-                        await createPointsTransaction.mutateAsync({
-                            client_id: clientId,
-                            transaction_type: "earned",
-                            amount: (item.product.points_earned || 0) * item.quantity,
-                            description: `Quick Sale: ${item.product.name} x${item.quantity}`,
-                            reference_type: "sale",
-                            staff_id: user?.id || null,
-                        });
-                    }
-                }
+                // OTHERWISE, PROCESS AS DIRECT SALE (whole basket in one transaction)
+                await checkout.mutateAsync({
+                    items: basket,
+                    client_id: clientId || null,
+                    payment_method: 'cash',
+                    idempotency_key: checkoutKey,
+                });
+                renewCheckoutKey();
 
                 toast({
                     title: t('quicksale.sale_complete'),
@@ -1,6 +1,7 @@
 import React, { createContext, useContext, useState, useEffect, ReactNode } from 'react';
 import { toast } from '@/hooks/use-toast';
 import { supabase, TABLES } from '@/lib/supabase';
+import { fetchCatalogueSection } from '@/services/catalogueService';
 import {
   Product,
   ServiceCatalog,
@@ -169,24 +170,20 @@ export const DataProvider: React.FC<DataProviderProps> = ({ children }) => {
         // Load what's needed for initial view and app configuration
         // Including products for home page showcase
         const [
-          consolesResponse,
+          consolesData,
           settingsResponse,
-          pricingResponse,
           gameShortcutsResponse
         ] = await Promise.all([
-          supabase.from(TABLES.CONSOLES).select('*'),
+          // Served from the backend catalogue cache (ETag revalidation)
+          fetchCatalogueSection('consoles').catch(() => null),
           supabase.from(TABLES.STORE_SETTINGS).select('*'),
-          supabase.from(TABLES.PRICING).select('*').order('sort_order', { ascending: true }),
           supabase.from(TABLES.GAME_SHORTCUTS).select('*').order('display_order', { ascending: true })
         ]);
 
-        setConsoles(consolesResponse.data?.map(mapConsoleFromDB) || []);
+        setConsoles((consolesData || []).map(mapConsoleFromDB));
         setSettings(settingsResponse.data ? mapStoreSettingsFromDB(settingsResponse.data) : null);
         setGameShortcuts(gameShortcutsResponse.data?.map(mapGameShortcutFromDB) || []);
 
-        // Pricing is kept local if not already moved to hooks
-        // setPricing(pricingResponse.data || []); 
-
       } catch (error) {
         console.error('Error loading essential data:', error);
       } finally {
@@ -206,8 +203,8 @@ export const DataProvider: React.FC<DataProviderProps> = ({ children }) => {
     const fetchSecondary = async () => {
       try {
         const [
-          productsResponse,
-          servicesResponse,
+          productsData,
+          servicesData,
           clientsResponse,
           sessionsResponse,
           serviceRequestsResponse,
@@ -216,8 +213,8 @@ export const DataProvider: React.FC<DataProviderProps> = ({ children }) => {
           salesResponse,
           ordersResponse
         ] = await Promise.all([
-          supabase.from(TABLES.PRODUCTS).select('*').order('created_at', { ascending: false }).limit(100),
-          supabase.from(TABLES.SERVICES_CATALOG).select('*').eq('is_active', true).order('created_at', { ascending: false }),
+          fetchCatalogueSection('products').catch(() => null),
+          fetchCatalogueSection('services').catch(() => null),
           supabase.from(TABLES.CLIENTS).select('*').order('created_at', { ascending: false }).limit(100),
           supabase.from(TABLES.GAMING_SESSIONS).select('*').order('start_time', { ascending: false }).limit(50),
           supabase.from(TABLES.SERVICE_REQUESTS).select('*').order('created_at', { ascending: false }).limit(50),
@@ -227,8 +224,10 @@ export const DataProvider: React.FC<DataProviderProps> = ({ children }) => {
           supabase.from(TABLES.ORDERS).select('*').order('created_at', { ascending: false }).limit(50)
         ]);
 
-        setProducts(productsResponse.data?.map(mapProductFromDB) || []);
-        setServices(servicesResponse.data?.map(mapServiceCatalogFromDB) || []);
+        // Newest first, as the showcase expects
+        const newestFirst = (a: any, b: any) => (b.created_at || '').localeCompare(a.created_at || '');
+        setProducts((productsData || []).sort(newestFirst).map(mapProductFromDB));
+        setServices((servicesData || []).sort(newestFirst).map(mapServiceCatalogFromDB));
         setClients(clientsResponse.data?.map(mapClientFromDB) || []);
         setSessions(sessionsResponse.data?.map(mapGameSessionFromDB) || []);
         setServiceRequests(serviceRequestsResponse.data?.map(mapServiceRequestFromDB) || []);
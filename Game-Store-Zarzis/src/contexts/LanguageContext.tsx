@@ -683,6 +683,14 @@ export const translations: Translations = {
   "orders.status.marked_as": { fr: "Commande marquée comme", en: "Order marked as", ar: "تم تحديد الطلب كـ" },
   "orders.error": { fr: "Erreur", en: "Error", ar: "خطأ" },
   "orders.error.update": { fr: "Échec de mise à jour du statut", en: "Failed to update status", ar: "فشل في تحديث الحالة" },
+  "orders.detail.final_status": { fr: "Cette commande est clôturée.", en: "This order is closed.", ar: "هذا الطلب مغلق." },
+  "orders.skip.invalid_transition": { fr: "Cette commande ne peut plus passer à ce statut.", en: "This order can no longer move to that status.", ar: "لا يمكن نقل هذا الطلب إلى هذه الحالة." },
+  "orders.skip.invalid_payment_transition": { fr: "Ce changement de paiement n'est pas permis.", en: "That payment change is not allowed.", ar: "تغيير الدفع هذا غير مسموح." },
+  "orders.skip.order_not_found": { fr: "Commande introuvable.", en: "Order not found.", ar: "الطلب غير موجود." },
+  "orders.skip.insufficient_stock": { fr: "Stock insuffisant, la commande a été annulée.", en: "Not enough stock, the order was cancelled.", ar: "المخزون غير كافٍ، تم إلغاء الطلب." },
+  "orders.skip.product_not_found": { fr: "Un produit n'existe plus, la commande a été annulée.", en: "A product no longer exists, the order was cancelled.", ar: "منتج لم يعد موجودًا، تم إلغاء الطلب." },
+  "orders.skip.invalid_quantity": { fr: "Quantité invalide, la commande a été annulée.", en: "Invalid quantity, the order was cancelled.", ar: "كمية غير صالحة، تم إلغاء الطلب." },
+  "orders.skip.empty_order": { fr: "Commande vide, elle a été annulée.", en: "Empty order, it was cancelled.", ar: "طلب فارغ، تم إلغاؤه." },
   "orders.empty": { fr: "Aucune commande trouvée.", en: "No orders found.", ar: "لم يتم العثور على طلبات." },
 
   // Client Management Placeholders
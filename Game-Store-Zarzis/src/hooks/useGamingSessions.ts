@@ -3,6 +3,35 @@ import { supabase } from "@/lib/supabase";
 import { useEffect } from "react";
 import { getBusinessDayBoundsStr } from "@/hooks/useTunisianTime";
 
+const rawUrl = import.meta.env.VITE_BACKEND_URL || 'https://bck.gamestorezarzis.com.tn';
+const API_URL = rawUrl.startsWith('http') ? rawUrl : `https://${rawUrl}`;
+const SESSIONS_API = `${API_URL}/api/sessions`;
+
+const authHeaders = async (): Promise<Record<string, string>> => {
+  const { data: { session } } = await supabase.auth.getSession();
+  return { 'Authorization': `Bearer ${session?.access_token || ""}` };
+};
+
+// Session writes go through the backend, which runs them as one database transaction
+const sessionsApi = async <T = unknown>(path: string, body?: unknown): Promise<T> => {
+  const response = await fetch(`${SESSIONS_API}${path}`, {
+    method: body === undefined ? 'GET' : 'POST',
+    headers: { 'Content-Type': 'application/json', ...(await authHeaders()) },
+    body: body === undefined ? undefined : JSON.stringify(body),
+  });
+  if (!response.ok) {
+    let message = `Server error: ${response.status} ${response.statusText}`;
+    try {
+      const error = await response.json();
+      message = error.detail || message;
+    } catch {
+      // Not JSON, keep status text
+    }
+    throw new Error(message);
+  }
+  return await response.json() as T;
+};
+
 export interface GamingSession {
   id: string;
   console_id: string;
@@ -29,31 +58,53 @@ export const useSessionsSubscription = () => {
   const queryClient = useQueryClient();
 
   useEffect(() => {
-    let debounceTimer: NodeJS.Timeout;
+    // Occupancy changes are pushed by the backend over Server-Sent Events.
+    // fetch() is used instead of EventSource so the bearer token can be sent.
+    const controller = new AbortController();
+    let retryTimer: NodeJS.Timeout;
+    let retryDelay = 1000;
 
-    const channel = supabase
-      .channel("sessions-realtime")
-      .on(
-        "postgres_changes",
-        {
-          event: "*",
-          schema: "public",
-          table: "gaming_sessions",
-        },
-        () => {
-          clearTimeout(debounceTimer);
-          debounceTimer = setTimeout(() => {
-            queryClient.invalidateQueries({ queryKey: ["active-sessions"] });
-            queryClient.invalidateQueries({ queryKey: ["consoles"] });
-            queryClient.invalidateQueries({ queryKey: ["today-sessions"] });
-          }, 1000);
+    const refresh = () => {
+      queryClient.invalidateQueries({ queryKey: ["active-sessions"] });
+      queryClient.invalidateQueries({ queryKey: ["consoles"] });
+      queryClient.invalidateQueries({ queryKey: ["today-sessions"] });
+    };
+
+    const connect = async () => {
+      try {
+        const response = await fetch(`${SESSIONS_API}/events`, {
+          headers: await authHeaders(),
+          signal: controller.signal,
+        });
+        if (!response.ok || !response.body) throw new Error(`SSE ${response.status}`);
+        retryDelay = 1000;
+
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = "";
+        while (true) {
+          const { value, done } = await reader.read();
+          if (done) break;
+          buffer += decoder.decode(value, { stream: true });
+          const events = buffer.split("\n\n");
+          buffer = events.pop() || "";
+          if (events.some((e) => e.startsWith("event:") && !e.startsWith("event: snapshot"))) {
+            refresh();
+          }
         }
-      )
-      .subscribe();
+      } catch (err) {
+        if (controller.signal.aborted) return;
+      }
+      // Reconnect with backoff; refresh in case events were missed meanwhile
+      retryTimer = setTimeout(() => { refresh(); connect(); }, retryDelay);
+      retryDelay = Math.min(retryDelay * 2, 30000);
+    };
+
+    connect();
 
     return () => {
-      supabase.removeChannel(channel);
-      clearTimeout(debounceTimer);
+      controller.abort();
+      clearTimeout(retryTimer);
     };
   }, [queryClient]);
 };
@@ -61,20 +112,7 @@ export const useSessionsSubscription = () => {
 export const useActiveSessions = () => {
   return useQuery({
     queryKey: ["active-sessions"],
-    queryFn: async () => {
-      const { data, error } = await supabase
-        .from("gaming_sessions")
-        .select(`
-          *,
-          console:consoles(*),
-          client:clients(*),
-          pricing:pricing(*)
-        `)
-        .eq("status", "active");
-
-      if (error) throw error;
-      return data;
-    },
+    queryFn: () => sessionsApi<unknown[]>("/active"),
   });
 };
 
@@ -113,32 +151,9 @@ export const useStartSession = () => {
       is_free_game?: boolean;
       notes?: string;
     }) => {
-      // Start the session
-      const { data: newSession, error: sessionError } = await supabase
-        .from("gaming_sessions")
-        .insert({
-          ...session,
-          status: "active",
-          start_time: new Date().toISOString(),
-          notes: session.notes || null,
-        })
-        .select()
-        .single();
-
-      if (sessionError) throw sessionError;
-
-      // Update console status
-      const { error: consoleError } = await supabase
-        .from("consoles")
-        .update({
-          status: "in_use",
-          current_session_id: newSession.id,
-        })
-        .eq("id", session.console_id);
-
-      if (consoleError) throw consoleError;
-
-      return newSession;
+      // staff_id is taken from the authenticated user on the backend
+      const { staff_id: _staffId, ...payload } = session;
+      return await sessionsApi<GamingSession>("/start", payload);
     },
     onSuccess: () => {
       queryClient.invalidateQueries({ queryKey: ["active-sessions"] });
@@ -154,7 +169,6 @@ export const useEndSession = () => {
   return useMutation({
     mutationFn: async ({
       session_id,
-      console_id,
       total_amount,
       games_played,
       extra_time_minutes,
@@ -175,72 +189,17 @@ export const useEndSession = () => {
       points_used?: number;
       client_id?: string | null;
     }) => {
-      // End the session
-      const { error: sessionError } = await supabase
-        .from("gaming_sessions")
-        .update({
-          status: "completed",
-          end_time: new Date().toISOString(),
-          total_amount,
-          games_played: games_played || 0,
-          extra_time_minutes: extra_time_minutes || 0,
-          extra_amount: extra_amount || 0,
-          points_earned: points_earned || 0,
-          payment_method: payment_method || "cash",
-          points_used: points_used || 0,
-          client_id: client_id || null,
-        })
-        .eq("id", session_id);
-
-      if (sessionError) throw sessionError;
-
-      // Update console status
-      const { error: consoleError } = await supabase
-        .from("consoles")
-        .update({
-          status: "available",
-          current_session_id: null,
-        })
-        .eq("id", console_id);
-
-      if (consoleError) throw consoleError;
-
-      // Update Client Stats (Total Spent & Games Played)
-      if (client_id) {
-        const gamesToAdd = (games_played && games_played > 0) ? games_played : 1;
-
-        try {
-          // Try atomic RPC first
-          const { error: rpcError } = await supabase.rpc('increment_client_stats', {
-            p_client_id: client_id,
-            p_spent: total_amount,
-            p_games: gamesToAdd
-          });
-
-          if (rpcError) {
-            // Fallback: read-then-update (less safe but functional)
-            console.warn('RPC increment_client_stats not available, using fallback:', rpcError.message);
-            const { data: clientData } = await supabase
-              .from("clients")
-              .select("total_spent, total_games_played")
-              .eq("id", client_id)
-              .single();
-
-            if (clientData) {
-              await supabase
-                .from("clients")
-                .update({
-                  total_spent: (clientData.total_spent || 0) + total_amount,
-                  total_games_played: (clientData.total_games_played || 0) + gamesToAdd,
-                  updated_at: new Date().toISOString()
-                })
-                .eq("id", client_id);
-            }
-          }
-        } catch (statsErr) {
-          console.warn('Client stats update failed (session still completed):', statsErr);
-        }
-      }
+      // Session, console and client totals are updated in one transaction
+      await sessionsApi(`/${session_id}/end`, {
+        total_amount,
+        games_played: games_played || 0,
+        extra_time_minutes: extra_time_minutes || 0,
+        extra_amount: extra_amount || 0,
+        points_earned: points_earned || 0,
+        payment_method: payment_method || "cash",
+        points_used: points_used || 0,
+        client_id: client_id || null,
+      });
     },
     onSuccess: () => {
       queryClient.invalidateQueries({ queryKey: ["active-sessions"] });
@@ -266,16 +225,11 @@ export const useAddGameToSession = () => {
       extra_time_minutes?: number;
       extra_amount?: number;
     }) => {
-      const { error } = await supabase
-        .from("gaming_sessions")
-        .update({
-          games_played,
-          extra_time_minutes: extra_time_minutes || 0,
-          extra_amount: extra_amount || 0,
-        })
-        .eq("id", session_id);
-
-      if (error) throw error;
+      await sessionsApi(`/${session_id}/games`, {
+        games_played,
+        extra_time_minutes: extra_time_minutes || 0,
+        extra_amount: extra_amount || 0,
+      });
     },
     onSuccess: () => {
       queryClient.invalidateQueries({ queryKey: ["active-sessions"] });
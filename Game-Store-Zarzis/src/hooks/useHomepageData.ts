@@ -1,5 +1,6 @@
 import { useQuery } from "@tanstack/react-query";
 import { supabase } from "@/lib/supabase";
+import { fetchCatalogueSection } from "@/services/catalogueService";
 
 // Types for homepage data
 export interface Product {
@@ -42,13 +43,10 @@ export const useHomepageData = () => {
     queryKey: ["homepage-products"],
     queryFn: async () => {
       try {
-        const { data, error } = await supabase
-          .from("products")
-          .select("*")
-          .eq("featured", true)
-          .limit(6);
+        const products = await fetchCatalogueSection<Product>("products").catch(() => null);
+        const data = products?.filter(p => p.featured).slice(0, 6);
 
-        if (error) {
+        if (!data) {
 
           // Fallback demo data
           return [
@@ -75,13 +73,10 @@ export const useHomepageData = () => {
     queryKey: ["homepage-services"],
     queryFn: async () => {
       try {
-        const { data, error } = await supabase
-          .from("services_catalog")
-          .select("*")
-          .eq("is_complex", false)
-          .limit(6);
+        const services = await fetchCatalogueSection<Service>("services").catch(() => null);
+        const data = services?.filter(s => !s.is_complex).slice(0, 6);
 
-        if (error) {
+        if (!data) {
 
           // Fallback demo data
           return [
@@ -145,12 +140,9 @@ export const useHomepageData = () => {
     queryKey: ["homepage-consoles"],
     queryFn: async () => {
       try {
-        const { data, error } = await supabase
-          .from("consoles")
-          .select("*")
-          .order("station_number");
+        const data = await fetchCatalogueSection<ConsoleStatus>("consoles").catch(() => null);
 
-        if (error) {
+        if (!data) {
 
           // Fallback demo data
           return [
@@ -179,12 +171,10 @@ export const useHomepageData = () => {
     queryKey: ["homepage-pricing"],
     queryFn: async () => {
       try {
-        const { data, error } = await supabase
-          .from("pricing")
-          .select("name, price, console_type")
-          .limit(4);
+        const pricing = await fetchCatalogueSection("pricing").catch(() => null);
+        const data = pricing?.slice(0, 4).map(({ name, price, console_type }) => ({ name, price, console_type }));
 
-        if (error) {
+        if (!data) {
 
           // Fallback demo data
           return [
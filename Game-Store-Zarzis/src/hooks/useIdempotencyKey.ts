@@ -0,0 +1,24 @@
+import { useCallback, useRef } from "react";
+
+/**
+ * Idempotency key for submitting `payload` (a basket, an order form...).
+ * The key stays the same while the payload is unchanged, so a retry after a
+ * network error is recognised by the backend instead of recording twice. It
+ * changes with the payload, and `renew()` (call it after a success) starts a
+ * new one for the next submission of the same payload.
+ */
+export const useIdempotencyKey = (payload: unknown) => {
+  const fingerprint = JSON.stringify(payload ?? null);
+  const current = useRef<{ fingerprint: string; key: string } | null>(null);
+  if (!current.current || current.current.fingerprint !== fingerprint) {
+    current.current = { fingerprint, key: crypto.randomUUID() };
+  }
+
+  const renew = useCallback(() => {
+    if (current.current) {
+      current.current = { ...current.current, key: crypto.randomUUID() };
+    }
+  }, []);
+
+  return [current.current.key, renew] as const;
+};
@@ -2,34 +2,56 @@ import { useQuery, useMutation, useQueryClient } from "@tanstack/react-query";
 import { supabase } from "@/lib/supabase";
 import { Order, OrderFormData } from "@/types";
 
+const rawUrl = import.meta.env.VITE_BACKEND_URL || 'https://bck.gamestorezarzis.com.tn';
+const API_URL = rawUrl.startsWith('http') ? rawUrl : `https://${rawUrl}`;
+
+const postJson = async (path: string, body: unknown, headers: Record<string, string> = {}) => {
+    const response = await fetch(`${API_URL}${path}`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json', ...headers },
+        body: JSON.stringify(body),
+    });
+
+    if (!response.ok) {
+        let message = `Server error: ${response.status} ${response.statusText}`;
+        try {
+            const error = await response.json();
+            message = error.detail?.message || error.detail || message;
+        } catch {
+            // Not JSON, keep status text
+        }
+        throw new Error(message);
+    }
+    return await response.json();
+};
+
+/**
+ * Places an order through the backend, which prices it from the catalogue
+ * and reserves stock in the background. Pass the same idempotency_key when
+ * retrying a submission so only one order is created.
+ */
 export const useCreateOrder = () => {
     const queryClient = useQueryClient();
     return useMutation({
-        mutationFn: async (orderData: OrderFormData) => {
-            // Insert Order with all client fields directly
-            const { data: order, error: orderError } = await supabase
-                .from("orders")
-                .insert({
-                    client_name: orderData.client_name,
-                    client_phone: orderData.client_phone,
-                    client_email: orderData.client_email || null,
-                    delivery_address: orderData.delivery_address || null,
-                    subtotal: orderData.subtotal,
-                    delivery_cost: orderData.delivery_cost,
-                    delivery_method: orderData.delivery_method,
-                    total_amount: orderData.total_amount,
-                    items: orderData.items, // JSONB column
-                    payment_method: orderData.payment_method || 'cash',
-                    payment_reference: orderData.payment_reference || null,
-                    payment_status: 'pending',
-                    status: 'pending',
-                    notes: orderData.notes || null
-                })
-                .select()
-                .single();
+        mutationFn: async ({ idempotency_key, ...orderData }: OrderFormData) => {
+            const { data: { session } } = await supabase.auth.getSession();
+            const headers: Record<string, string> = {
+                'Idempotency-Key': idempotency_key || crypto.randomUUID(),
+            };
+            // Guests can order too; signed-in customers get the order linked to their account
+            if (session?.access_token) headers['Authorization'] = `Bearer ${session.access_token}`;
 
-            if (orderError) throw orderError;
-            return order;
+            return await postJson('/api/orders', {
+                client_name: orderData.client_name,
+                client_phone: orderData.client_phone,
+                client_email: orderData.client_email || null,
+                delivery_address: orderData.delivery_address || null,
+                delivery_method: orderData.delivery_method,
+                items: orderData.items.map(item => ({ product_id: item.product_id, quantity: item.quantity })),
+                payment_method: orderData.payment_method || 'cash',
+                payment_reference: orderData.payment_reference || null,
+                notes: orderData.notes || null
+            }, headers) as Order & { replayed: boolean };
         },
         onSuccess: () => {
             queryClient.invalidateQueries({ queryKey: ["orders"] });
@@ -52,19 +74,70 @@ export const useOrders = () => {
     });
 };
 
+export interface OrderTransitionResult {
+    updated: Order[];
+    skipped: { id: string; reason: string; status?: string; payment_status?: string }[];
+    updated_count: number;
+    skipped_count: number;
+}
+
+/**
+ * Statuses an order can move to from its current status, mirroring the
+ * transitions transition_orders accepts. Completed and cancelled are final.
+ */
+export const NEXT_ORDER_STATUSES: Record<string, ('processing' | 'completed' | 'cancelled')[]> = {
+    pending: ['processing', 'cancelled'],
+    processing: ['completed', 'cancelled'],
+};
+
+/** Raised when /bulk-status skips the order, with the reason it gave. */
+export class OrderTransitionError extends Error {
+    constructor(public reason: string) {
+        super(reason);
+        this.name = 'OrderTransitionError';
+    }
+}
+
+/**
+ * Moves one or more orders to a new status and/or payment status. Cancelling
+ * a processing order gives its reserved stock back.
+ */
+export const useBulkOrderStatus = () => {
+    const queryClient = useQueryClient();
+    return useMutation({
+        mutationFn: async (body: {
+            order_ids: string[];
+            status?: 'processing' | 'completed' | 'cancelled';
+            payment_status?: 'paid' | 'failed';
+            reason?: string;
+        }): Promise<OrderTransitionResult> => {
+            const { data: { session } } = await supabase.auth.getSession();
+            return await postJson('/api/orders/bulk-status', body, {
+                'Authorization': `Bearer ${session?.access_token || ""}`,
+            });
+        },
+        onSuccess: () => {
+            queryClient.invalidateQueries({ queryKey: ["orders"] });
+            queryClient.invalidateQueries({ queryKey: ["products"] });
+        },
+    });
+};
+
 export const useUpdateOrderStatus = () => {
     const queryClient = useQueryClient();
     return useMutation({
         mutationFn: async ({ id, status }: { id: string; status: string }) => {
-            const { error } = await supabase
-                .from("orders")
-                .update({ status })
-                .eq("id", id);
-
-            if (error) throw error;
+            const { data: { session } } = await supabase.auth.getSession();
+            const result: OrderTransitionResult = await postJson('/api/orders/bulk-status', { order_ids: [id], status }, {
+                'Authorization': `Bearer ${session?.access_token || ""}`,
+            });
+            if (result.skipped_count > 0) {
+                throw new OrderTransitionError(result.skipped[0].reason);
+            }
         },
         onSuccess: () => {
             queryClient.invalidateQueries({ queryKey: ["orders"] });
+            queryClient.invalidateQueries({ queryKey: ["products"] });
         },
     });
 };
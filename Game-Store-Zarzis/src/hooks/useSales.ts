@@ -86,4 +86,73 @@ export const useCreateSale = () => {
       queryClient.invalidateQueries({ queryKey: ["products"] });
     },
   });
-};
\ No newline at end of file
+};
+
+const rawUrl = import.meta.env.VITE_BACKEND_URL || 'https://bck.gamestorezarzis.com.tn';
+const API_URL = rawUrl.startsWith('http') ? rawUrl : `https://${rawUrl}`;
+
+export interface CheckoutItem {
+  product_id: string;
+  quantity: number;
+}
+
+export interface CheckoutResult {
+  sales: Sale[];
+  subtotal: number;
+  total_amount: number;
+  points_used: number;
+  points_earned: number;
+  points_balance: number | null;
+  replayed: boolean;
+}
+
+/**
+ * Sells a whole basket in one backend transaction: stock check and
+ * decrement, sale rows and points are all applied or none are.
+ * Callers hold the basket's idempotency key (useIdempotencyKey), so a retry
+ * of the same basket replays the first result instead of selling twice.
+ */
+export const useCheckout = () => {
+  const queryClient = useQueryClient();
+
+  return useMutation({
+    mutationFn: async ({ idempotency_key, ...basket }: {
+      items: CheckoutItem[];
+      client_id?: string | null;
+      payment_method?: "cash" | "points" | "mixed";
+      points_used?: number;
+      notes?: string | null;
+      idempotency_key: string;
+    }): Promise<CheckoutResult> => {
+      const { data: { session } } = await supabase.auth.getSession();
+      const response = await fetch(`${API_URL}/api/sales/checkout`, {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+          'Authorization': `Bearer ${session?.access_token || ""}`,
+          // Same key on a retry returns the first result instead of selling twice
+          'Idempotency-Key': idempotency_key,
+        },
+        body: JSON.stringify(basket),
+      });
+
+      if (!response.ok) {
+        let message = `Server error: ${response.status} ${response.statusText}`;
+        try {
+          const error = await response.json();
+          message = error.detail?.message || error.detail || message;
+        } catch {
+          // Not JSON, keep status text
+        }
+        throw new Error(message);
+      }
+      return await response.json() as CheckoutResult;
+    },
+    onSuccess: () => {
+      queryClient.invalidateQueries({ queryKey: ["today-sales"] });
+      queryClient.invalidateQueries({ queryKey: ["products"] });
+      queryClient.invalidateQueries({ queryKey: ["clients"] });
+      queryClient.invalidateQueries({ queryKey: ["points-transactions"] });
+    },
+  });
+};
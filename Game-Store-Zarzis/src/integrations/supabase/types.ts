@@ -69,6 +69,7 @@ export type Database = {
         Row: {
           created_at: string
           created_by: string | null
+          email: string | null
           id: string
           name: string
           phone: string
@@ -80,6 +81,7 @@ export type Database = {
         Insert: {
           created_at?: string
           created_by?: string | null
+          email?: string | null
           id?: string
           name: string
           phone: string
@@ -91,6 +93,7 @@ export type Database = {
         Update: {
           created_at?: string
           created_by?: string | null
+          email?: string | null
           id?: string
           name?: string
           phone?: string
@@ -198,6 +201,7 @@ export type Database = {
           start_time: string
           status: string | null
           total_amount: number | null
+          updated_at: string
         }
         Insert: {
           base_amount?: number | null
@@ -220,6 +224,7 @@ export type Database = {
           start_time?: string
           status?: string | null
           total_amount?: number | null
+          updated_at?: string
         }
         Update: {
           base_amount?: number | null
@@ -242,6 +247,7 @@ export type Database = {
           start_time?: string
           status?: string | null
           total_amount?: number | null
+          updated_at?: string
         }
         Relationships: [
           {
@@ -517,6 +523,7 @@ export type Database = {
           staff_id: string
           total_amount: number
           unit_price: number
+          updated_at: string
         }
         Insert: {
           client_id?: string | null
@@ -531,6 +538,7 @@ export type Database = {
           staff_id: string
           total_amount: number
           unit_price: number
+          updated_at?: string
         }
         Update: {
           client_id?: string | null
@@ -545,6 +553,7 @@ export type Database = {
           staff_id?: string
           total_amount?: number
           unit_price?: number
+          updated_at?: string
         }
         Relationships: [
           {
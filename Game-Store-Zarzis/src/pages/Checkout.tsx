@@ -5,6 +5,7 @@ import { useAuth } from "@/contexts/AuthContext";
 import { useData } from "@/contexts/DataContext";
 import { useCreateOrder } from "@/hooks/useOrders";
 import { useStoreSettings } from "@/hooks/useStoreSettings";
+import { useIdempotencyKey } from "@/hooks/useIdempotencyKey";
 import { Button } from "@/components/ui/button";
 import { Input } from "@/components/ui/input";
 import { Label } from "@/components/ui/label";
@@ -59,6 +60,12 @@ const Checkout = () => {
         paymentReference: "",
         notes: ""
     });
+    // Same key while the basket and form are unchanged, so resubmitting after a
+    // network error cannot create a second order; editing either starts a new one
+    const [orderKey, renewOrderKey] = useIdempotencyKey({
+        items: items.map(item => [item.id, item.quantity]),
+        formData,
+    });
 
     // Auto-fill when client data loads
     useEffect(() => {
@@ -158,10 +165,12 @@ const Checkout = () => {
                 delivery_address: formData.address,
                 payment_method: formData.paymentMethod,
                 payment_reference: formData.paymentReference,
-                notes: formData.notes
+                notes: formData.notes,
+                idempotency_key: orderKey
             });
 
             setIsSuccess(true);
+            renewOrderKey();
             clearCart();
 
             // Celebration effect
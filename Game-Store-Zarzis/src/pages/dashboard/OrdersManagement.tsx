@@ -1,5 +1,5 @@
 import { useState } from "react";
-import { useOrders, useUpdateOrderStatus } from "@/hooks/useOrders";
+import { useOrders, useUpdateOrderStatus, NEXT_ORDER_STATUSES, OrderTransitionError } from "@/hooks/useOrders";
 import DashboardLayout from "@/components/DashboardLayout";
 import { Card, CardContent } from "@/components/ui/card";
 import { Table, TableBody, TableCell, TableHead, TableHeader, TableRow } from "@/components/ui/table";
@@ -30,12 +30,21 @@ const OrdersManagement = () => {
         return matchesSearch && matchesStatus;
     });
 
+    // Skip reasons look like "insufficient_stock:<product id>"; translate the
+    // code and fall back to the raw reason for one we have no text for.
+    const describeUpdateError = (error: unknown) => {
+        if (!(error instanceof OrderTransitionError)) return t('orders.error.update');
+        const key = `orders.skip.${error.reason.split(':')[0]}`;
+        const text = t(key);
+        return text === key ? error.reason : text;
+    };
+
     const handleStatusUpdate = async (id: string, newStatus: string) => {
         try {
             await updateStatus.mutateAsync({ id, status: newStatus });
             toast({ title: t('orders.status.updated'), description: `${t('orders.status.marked_as')} ${newStatus}` });
         } catch (error) {
-            toast({ title: t('orders.error'), description: t('orders.error.update'), variant: "destructive" });
+            toast({ title: t('orders.error'), description: describeUpdateError(error), variant: "destructive" });
         }
     };
 
@@ -235,17 +244,21 @@ const OrdersManagement = () => {
                                                             <div className="space-y-2">
                                                                 <span className="font-bold text-sm">{t('orders.detail.update_status')}</span>
                                                                 <div className="flex gap-2 flex-wrap">
-                                                                    {['pending', 'processing', 'completed', 'cancelled'].map(status => (
+                                                                    {(NEXT_ORDER_STATUSES[order.status] ?? []).map(status => (
                                                                         <Button
                                                                             key={status}
                                                                             size="sm"
-                                                                            variant={order.status === status ? "default" : "outline"}
+                                                                            variant="outline"
                                                                             className="capitalize"
+                                                                            disabled={updateStatus.isPending}
                                                                             onClick={() => handleStatusUpdate(order.id, status)}
                                                                         >
                                                                             {t(`orders.filter.${status}`)}
                                                                         </Button>
                                                                     ))}
+                                                                    {!NEXT_ORDER_STATUSES[order.status] && (
+                                                                        <span className="text-sm text-muted-foreground">{t('orders.detail.final_status')}</span>
+                                                                    )}
                                                                 </div>
                                                             </div>
                                                         </div>
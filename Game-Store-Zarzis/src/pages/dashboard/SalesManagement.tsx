@@ -4,8 +4,8 @@ import ProtectedRoute from "@/components/ProtectedRoute";
 import { useAuth } from "@/contexts/AuthContext";
 import { useProducts } from "@/hooks/useProducts";
 import { useClients, useClientByPhone, useCreateClient } from "@/hooks/useClients";
-import { useTodaySales, useCreateSale } from "@/hooks/useSales";
-import { useCreatePointsTransaction } from "@/hooks/usePointsTransactions";
+import { useTodaySales, useCheckout } from "@/hooks/useSales";
+import { useIdempotencyKey } from "@/hooks/useIdempotencyKey";
 import { ClientSearch } from "@/components/dashboard/ClientSearch";
 import { Button } from "@/components/ui/button";
 import { Input } from "@/components/ui/input";
@@ -43,8 +43,11 @@ const SalesManagement = () => {
   const [clientConfirmed, setClientConfirmed] = useState(false);
 
   const createClient = useCreateClient();
-  const createSale = useCreateSale();
-  const createPointsTransaction = useCreatePointsTransaction();
+  const checkout = useCheckout();
+  // Same key while the sale form is unchanged, so retrying after a network error cannot sell twice
+  const [checkoutKey, renewCheckoutKey] = useIdempotencyKey({
+    product: selectedProduct?.id, quantity, client: selectedClientForSale?.id, newClientPhone, paymentMethod, pointsToUse,
+  });
 
   const calculateTotal = () => {
     if (!selectedProduct) return { total: 0, pointsUsed: 0, cashPaid: 0 };
@@ -81,43 +84,16 @@ const SalesManagement = () => {
         clientId = newClient.id;
       }
 
-      // Process the sale
-      await createSale.mutateAsync({
-        product_id: selectedProduct.id,
-        quantity,
-        unit_price: selectedProduct.price,
-        total_amount: total,
-        staff_id: user.id,
-        client_id: clientId,
+      // Stock, sale and points (spent + earned) are applied in one transaction
+      await checkout.mutateAsync({
+        items: [{ product_id: selectedProduct.id, quantity }],
+        client_id: clientId || null,
         payment_method: paymentMethod,
-        points_used: pointsUsed,
-        points_earned: selectedProduct.points_earned * quantity,
+        points_used: Math.round(pointsUsed),
         notes: paymentMethod !== "cash" ? `Paid with ${paymentMethod} payment` : null,
+        idempotency_key: checkoutKey,
       });
-
-      // Process points earned
-      if (clientId && selectedProduct.points_earned > 0) {
-        await createPointsTransaction.mutateAsync({
-          client_id: clientId,
-          transaction_type: "earned",
-          amount: selectedProduct.points_earned * quantity,
-          description: `Earned from purchase: ${selectedProduct.name} x${quantity}`,
-          reference_type: "sale",
-          staff_id: user.id,
-        });
-      }
-
-      // If points were used, create a transaction record
-      if (pointsUsed > 0 && clientId) {
-        await createPointsTransaction.mutateAsync({
-          client_id: clientId,
-          transaction_type: "spent",
-          amount: -pointsUsed,
-          description: `Used for purchase: ${selectedProduct.name} x${quantity}`,
-          reference_type: "sale",
-          staff_id: user.id,
-        });
-      }
+      renewCheckoutKey();
 
       toast({
         title: "Sale completed!",
@@ -395,7 +371,7 @@ const SalesManagement = () => {
                     variant="hero"
                     className="w-full h-12 text-lg font-bold"
                     onClick={handleSell}
-                    disabled={createSale.isPending || selectedProduct.stock_quantity < 1}
+                    disabled={checkout.isPending || selectedProduct.stock_quantity < 1}
                   >
                     <ShoppingCart className="w-5 h-5 mr-2" />
                     {paymentMethod === "cash" ? t('sales.complete') : t('sales.confirm')}
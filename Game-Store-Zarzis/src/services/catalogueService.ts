@@ -0,0 +1,36 @@
+/**
+ * Public Catalogue API Client
+ * Products, services, pricing and consoles served from the backend cache.
+ * The browser revalidates with If-None-Match, so unchanged data costs a 304.
+ */
+
+const rawUrl = import.meta.env.VITE_BACKEND_URL || 'https://bck.gamestorezarzis.com.tn';
+const API_URL = rawUrl.startsWith('http') ? rawUrl : `https://${rawUrl}`;
+const API_BASE_URL = `${API_URL}/api/catalogue`;
+
+export type CatalogueSection = 'products' | 'services' | 'pricing' | 'consoles';
+
+export type Catalogue = Record<CatalogueSection, any[]>;
+
+async function getJson<T>(url: string): Promise<T> {
+    // 'no-cache' = always revalidate with the stored ETag instead of trusting the heuristic cache
+    const response = await fetch(url, { cache: 'no-cache' });
+    if (!response.ok) {
+        throw new Error(`Catalogue request failed: ${response.status} ${response.statusText}`);
+    }
+    return await response.json() as T;
+}
+
+/**
+ * Whole public catalogue: active products, services and pricing, and all consoles
+ */
+export async function fetchCatalogue(): Promise<Catalogue> {
+    return getJson<Catalogue>(API_BASE_URL);
+}
+
+/**
+ * One catalogue section as an array
+ */
+export async function fetchCatalogueSection<T = any>(section: CatalogueSection): Promise<T[]> {
+    return getJson<T[]>(`${API_BASE_URL}/${section}`);
+}
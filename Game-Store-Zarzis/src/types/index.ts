@@ -401,6 +401,7 @@ export interface OrderFormData {
   payment_method: 'cash' | 'bank_transfer' | 'd17' | 'card';
   payment_reference?: string;
   notes?: string;
+  idempotency_key?: string; // reuse when retrying the same submission
 }
 // Service Requests
 // ServiceStatus enum is defined at the top of the file